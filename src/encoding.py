@@ -0,0 +1,64 @@
+from typing import List, Union
+
+import numpy as np
+
+from substitution_matrix import SubstitutionMatrix
+
+
+class Encoder:
+    """
+    Integer encoding of sequences for a substitution matrix.
+
+    Every character of the alphabet of the substitution matrix gets a code into its dense table, so substitution scores
+    can be looked up with array operations, e.g. table[codes_1[:, None], codes_2[None, :]]. Characters outside of the
+    alphabet are added when they are first encoded, scored as the substitution matrix scores them (BLOSUM matrices
+    score them as minus infinity, plain dictionaries raise a KeyError).
+    """
+    max_alphabet_size = 256
+
+    def __init__(self, substitution_matrix: Union[dict, SubstitutionMatrix]):
+        """
+        Initialise the encoder.
+        :param substitution_matrix: Compiled substitution matrix, or a dictionary of dictionaries to compile.
+        """
+        self.substitution_matrix = SubstitutionMatrix.from_dict(substitution_matrix)
+        if len(self.substitution_matrix.alphabet) > self.max_alphabet_size:
+            raise ValueError(f"Alphabet holds more than {self.max_alphabet_size} characters")
+        self.alphabet: List[str] = list(self.substitution_matrix.alphabet)
+        self.table = self.substitution_matrix.table
+        self.lookup = np.full(256, -1, dtype=np.int16)
+        for index, char in enumerate(self.alphabet):
+            if ord(char) < len(self.lookup):
+                self.lookup[ord(char)] = index
+
+    def add_characters(self, characters: List[str]) -> None:
+        """
+        Add characters to the alphabet and recompile the substitution table.
+        :param characters: Characters to add.
+        """
+        if len(self.alphabet) + len(characters) > self.max_alphabet_size:
+            raise ValueError(f"Alphabet holds more than {self.max_alphabet_size} characters")
+
+        alphabet = self.alphabet + list(characters)
+        table = np.array([[self.substitution_matrix[char][other_char] for other_char in alphabet] for char in alphabet])
+        self.table = table.reshape(len(alphabet), len(alphabet))
+        self.alphabet = alphabet
+        for index, char in enumerate(characters, start=len(alphabet) - len(characters)):
+            if ord(char) < len(self.lookup):
+                self.lookup[ord(char)] = index
+
+    def encode(self, sequence: str) -> np.ndarray:
+        """
+        Encode a sequence as codes into the substitution table.
+        :param sequence: Sequence to encode.
+        :return: Array of codes.
+        """
+        characters = np.frombuffer(sequence.encode('utf-32-le'), dtype=np.uint32)
+        codes = np.where(characters < len(self.lookup), self.lookup[np.minimum(characters, len(self.lookup) - 1)], -1)
+        if np.any(codes < 0):
+            unknown = sorted(set(sequence) - set(self.alphabet))
+            if any(ord(char) >= len(self.lookup) for char in unknown):
+                raise KeyError(next(char for char in unknown if ord(char) >= len(self.lookup)))
+            self.add_characters(unknown)
+            codes = self.lookup[characters]
+        return codes.astype(np.uint8)
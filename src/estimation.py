@@ -0,0 +1,367 @@
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from msa.center_star import CenterStarMSASolver
+from msa.msa_solver import MSASolver
+from msa.progressive import ProgressiveMSASolver
+from msa.scoring_matrix.memmap_scoring_matrix import MemmapScoringMatrix as MemmapMSAScoringMatrix
+from msa.scoring_matrix.scoring_matrix import ScoringMatrix as MSAScoringMatrix
+from psa.enums import Engine
+from psa.psa_solver import PSASolver
+from psa.scoring_matrix.memmap_scoring_matrix import MemmapScoringMatrix
+
+# Seconds and bytes of memory per calculated matrix entry, measured with numpy 1.24 on a desktop CPU. The runtimes only
+# give the order of magnitude, the choice of engine depends on how they relate to each other.
+PSA_COSTS = {
+    Engine.PYTHON: (8e-6, 100),
+    Engine.WAVEFRONT: (2e-7, 100),
+    Engine.BANDED: (3e-7, 30),
+    Engine.HIRSCHBERG: (5e-7, 0),
+    Engine.MYERS: (5e-9, 0.25),
+    Engine.WFA: (1.5e-5, 24),
+}
+# Seconds per entry of a memory-mapped matrix filled row by row, and of a global and local score-only pass
+MEMMAP_SECONDS = 2.5e-7
+GLOBAL_SCORE_SECONDS = 3.5e-8
+LOCAL_SCORE_SECONDS = 9e-8
+# Seconds and bytes per entry of the Waterman-Eggert matrices
+DECLUMPING_COSTS = (3e-7, 33)
+# Bytes per entry of the rows kept by the engines that use linear memory
+ROW_BYTES = 64
+# Seconds per entry and neighbour of the scoring matrix of the msa solvers
+MSA_SECONDS = {
+    Engine.PYTHON: 1e-5,
+    Engine.WAVEFRONT: 2e-8,
+}
+# Bytes per entry of the substitution scores of a pair of sequences and of the index grid of the msa wavefront engine
+PAIR_SCORE_BYTES = 8
+INDEX_BYTES = 8
+# Seconds and bytes per entry of a profile-profile alignment of the progressive msa solver
+PROFILE_COSTS = (2e-7, 17)
+# What was estimated, for the estimates that are not of a psa engine
+ESTIMATE_NAMES = {
+    "score-only": "Calculating only the score",
+    "waterman-eggert": "Waterman-Eggert declumping",
+    "full matrix": "The msa scoring matrix",
+    "memmap": "The memory-mapped msa scoring matrix",
+    "progressive": "The progressive msa solver",
+    "center-star": "The center-star msa solver",
+}
+
+
+class Estimate(NamedTuple):
+    """
+    Estimated resources to solve an alignment problem with an engine.
+    """
+    engine: str
+    cells: int
+    traceback_bytes: int
+    memory: int
+    disk: int
+    seconds: float
+    all_alignments: bool
+
+
+class MemoryLimitError(ValueError):
+    """
+    Raised when an alignment would need more memory than allowed.
+    """
+    pass
+
+
+def format_bytes(size: int) -> str:
+    """
+    Format a size in bytes in MB, or GB above 1024 MB.
+    :param size: Size in bytes.
+    :return: Formatted size.
+    """
+    megabytes = size / 1024 ** 2
+    return f"{megabytes / 1024:.1f} GB" if megabytes >= 1024 else f"{megabytes:.1f} MB"
+
+
+def describe(estimate: Estimate) -> str:
+    """
+    Describe an estimate in one line.
+    :param estimate: Estimate to describe.
+    :return: Description of the estimate.
+    """
+    disk = f", {format_bytes(estimate.disk)} on disk" if estimate.disk else ""
+    return (f"engine {estimate.engine}: {estimate.cells} cells, {format_bytes(estimate.traceback_bytes)} of "
+            f"tracebacks, {format_bytes(estimate.memory)} of memory{disk}, about {estimate.seconds:.2g} s")
+
+
+def estimate_edits(sequence_1: str, sequence_2: str, word_size: int = 12, samples: int = 200) -> int:
+    """
+    Estimate the number of edits between two sequences, from how many sampled words of the shorter sequence also occur
+    in the longer one. With an edit rate p a word survives with probability (1 - p) ** word_size.
+    :param sequence_1: The first sequence.
+    :param sequence_2: The second sequence.
+    :param word_size: Length of the sampled words.
+    :param samples: Maximum number of sampled words.
+    :return: Estimated number of edits, the length of the longer sequence if no word is shared.
+    """
+    shorter, longer = sorted((sequence_1, sequence_2), key=len)
+    if len(shorter) < word_size:
+        return len(longer)
+    positions = range(0, len(shorter) - word_size + 1, max(1, (len(shorter) - word_size + 1) // samples))
+    shared = sum(shorter[position:position + word_size] in longer for position in positions)
+    if shared == 0:
+        return len(longer)
+    rate = 1 - (shared / len(positions)) ** (1 / word_size)
+    return max(len(longer) - len(shorter), round(rate * len(longer)))
+
+
+def supports_engine(solver: PSASolver, engine: Engine) -> bool:
+    """
+    Check if a solver can align with an engine, given its scoring.
+    :param solver: Pairwise solver.
+    :param engine: Engine to check.
+    :return: Whether the engine can be used.
+    """
+    if engine not in solver.supported_engines:
+        return False
+    if engine == Engine.MYERS:
+        return solver.edit_cost() is not None
+    if engine == Engine.WFA:
+        return solver.wfa_penalties() is not None
+    return True
+
+
+def estimate_psa(solver: PSASolver, sequence_1: str, sequence_2: str, engine: Optional[Union[Engine, str]] = None,
+                 edits: Optional[int] = None) -> Estimate:
+    """
+    Estimate the resources to align two sequences with an engine.
+    :param solver: Pairwise solver.
+    :param sequence_1: The first sequence, along the columns.
+    :param sequence_2: The second sequence, along the rows.
+    :param engine: Engine to estimate, the engine of the solver if None.
+    :param edits: Estimated number of edits between the sequences, for the banded and WFA engines. Estimated from the
+    sequences if None.
+    :return: The estimate.
+    """
+    engine = solver.engine if engine is None else Engine(engine)
+    width, height = len(sequence_1) + 1, len(sequence_2) + 1
+    cells = width * height
+    seconds, entry_bytes = PSA_COSTS[engine]
+    if engine in (Engine.BANDED, Engine.WFA) and edits is None:
+        edits = estimate_edits(sequence_1, sequence_2)
+
+    if engine in (Engine.PYTHON, Engine.WAVEFRONT) and solver.use_memmap(sequence_1, sequence_2):
+        # Memory-mapped matrices are filled row by row, whatever the engine
+        disk = cells * MemmapScoringMatrix.bytes_per_entry(solver.score_dtype)
+        return Estimate(engine.value, cells, cells, ROW_BYTES * width, disk, cells * MEMMAP_SECONDS, True)
+    if engine in (Engine.PYTHON, Engine.WAVEFRONT):
+        return Estimate(engine.value, cells, cells, cells * entry_bytes, 0, cells * seconds, True)
+    if engine == Engine.BANDED:
+        # The band is doubled until it holds every optimal alignment, every earlier band adds up to at most the last
+        band = solver.band
+        while band < edits and (band + 1) * height < cells:
+            band = max(2 * band, 1)
+        band_cells = min(cells, height * (abs(width - height) + 2 * band + 1))
+        return Estimate(engine.value, band_cells, band_cells, band_cells * entry_bytes, 0, 2 * band_cells * seconds,
+                        True)
+    if engine == Engine.HIRSCHBERG:
+        # Every level of the recursion calculates half of the entries of the level above it
+        return Estimate(engine.value, cells, 0, ROW_BYTES * (width + height), 0, 2 * cells * seconds, False)
+    if engine == Engine.MYERS:
+        # The bit vectors of every column are kept for the traceback
+        traceback_bytes = int(cells * entry_bytes)
+        return Estimate(engine.value, cells, traceback_bytes, traceback_bytes, 0, cells * seconds, False)
+    # The wavefronts grow by a diagonal on either side for every edit, and are all kept for the traceback
+    entries = min(cells, (edits + 1) ** 2)
+    return Estimate(engine.value, entries, entries * entry_bytes, entries * entry_bytes, 0,
+                    entries * seconds + (width + height) * PSA_COSTS[Engine.WAVEFRONT][0], False)
+
+
+def estimate_score(solver: PSASolver, sequence_1: str, sequence_2: str) -> Estimate:
+    """
+    Estimate the resources to only calculate the alignment score of two sequences, see PSASolver.score.
+    :param solver: Pairwise solver.
+    :param sequence_1: The first sequence.
+    :param sequence_2: The second sequence.
+    :return: The estimate.
+    """
+    width, height = len(sequence_1) + 1, len(sequence_2) + 1
+    cells = width * height
+    if not solver.add_zero_score:
+        seconds = PSA_COSTS[Engine.MYERS][0] if solver.edit_cost() is not None else GLOBAL_SCORE_SECONDS
+    else:
+        # Locating the start takes a second pass over at most the whole matrix
+        seconds = 2 * LOCAL_SCORE_SECONDS
+    return Estimate("score-only", cells, 0, ROW_BYTES * min(width, height), 0, cells * seconds, False)
+
+
+def estimate_top_alignments(sequence_1: str, sequence_2: str) -> Estimate:
+    """
+    Estimate the resources to find the best local alignments with Waterman-Eggert declumping.
+    :param sequence_1: The first sequence.
+    :param sequence_2: The second sequence.
+    :return: The estimate.
+    """
+    cells = (len(sequence_1) + 1) * (len(sequence_2) + 1)
+    seconds, entry_bytes = DECLUMPING_COSTS
+    return Estimate("waterman-eggert", cells, 0, cells * entry_bytes, 0, cells * seconds, True)
+
+
+def select_psa_engine(solver: PSASolver, sequence_1: str, sequence_2: str, memory_limit: Optional[int] = None,
+                      all_alignments: bool = True, single_alignment_fallback: bool = True,
+                      score_only_fallback: bool = False) -> Estimate:
+    """
+    Select the fastest engine of a solver that fits in the memory limit.
+
+    When all optimal alignments are wanted, engines that store the scoring matrix (python, wavefront and banded) are
+    preferred, and the linear-space engines (hirschberg, myers and wfa), which return a single optimal alignment, are
+    only selected when none of them fits and a single alignment will do. When no engine fits at all, only the score can
+    be calculated, in linear space, see estimate_score.
+    :param solver: Pairwise solver.
+    :param sequence_1: The first sequence.
+    :param sequence_2: The second sequence.
+    :param memory_limit: Memory limit in bytes, unlimited if None.
+    :param all_alignments: Whether all optimal alignments are wanted.
+    :param single_alignment_fallback: Whether a linear-space engine may be selected when all optimal alignments are
+    wanted but no engine that stores the scoring matrix fits.
+    :param score_only_fallback: Whether to return the estimate of only calculating the score when no engine fits.
+    :return: Estimate of the selected engine, or of only calculating the score.
+    :raises MemoryLimitError: If no engine fits in the memory limit, and neither does the score when it may be selected.
+    """
+    engines = [engine for engine in Engine if supports_engine(solver, engine)]
+    edits = estimate_edits(sequence_1, sequence_2) if {Engine.BANDED, Engine.WFA} & set(engines) else None
+    estimates = [estimate_psa(solver, sequence_1, sequence_2, engine, edits) for engine in engines]
+
+    if all_alignments and not single_alignment_fallback:
+        estimates = [estimate for estimate in estimates if estimate.all_alignments]
+    fitting = [estimate for estimate in estimates if memory_limit is None or estimate.memory <= memory_limit]
+    if not fitting and score_only_fallback:
+        estimate = estimate_score(solver, sequence_1, sequence_2)
+        check_memory_limit(estimate, memory_limit)
+        return estimate
+    if not fitting:
+        check_memory_limit(min(estimates, key=lambda estimate: estimate.memory), memory_limit)
+    if all_alignments:
+        fitting = [estimate for estimate in fitting if estimate.all_alignments] or fitting
+    return min(fitting, key=lambda estimate: estimate.seconds)
+
+
+def estimate_msa(solver: MSASolver, sequences: List[str]) -> Estimate:
+    """
+    Estimate the resources to align sequences with a scoring matrix of every combination of positions, which grows
+    exponentially with the number of sequences.
+    :param solver: Multiple sequence alignment solver.
+    :param sequences: Sequences to align.
+    :return: The estimate.
+    """
+    # The substitution table only has its final type once every character was encoded
+    for sequence in sequences:
+        solver.encode(sequence)
+    shape = tuple(len(sequence) + 1 for sequence in sequences)
+    cells = int(np.prod(shape, dtype=object))
+    seconds = cells * ((1 << len(sequences)) - 1) * MSA_SECONDS[solver.engine]
+    matrix_bytes = cells * MSAScoringMatrix.bytes_per_entry(len(sequences), solver.score_dtype)
+    traceback_bytes = cells * MSAScoringMatrix.traceback_dtype(len(sequences)).itemsize
+    working_bytes = msa_working_bytes(solver, shape)
+    if len(sequences) <= MemmapMSAScoringMatrix.max_sequences and solver.use_memmap(sequences):
+        return Estimate("memmap", cells, traceback_bytes, working_bytes, matrix_bytes, seconds, True)
+    return Estimate("full matrix", cells, traceback_bytes, matrix_bytes + working_bytes, 0, seconds, True)
+
+
+def msa_working_bytes(solver: MSASolver, shape: Tuple[int, ...]) -> int:
+    """
+    Estimate the memory the msa solvers keep besides the scoring matrix, which is all that stays in memory when the
+    matrix is memory-mapped: the substitution scores of every pair of sequences and, for the wavefront engine, the grid
+    of indices it orders by their sum and the gathers of the largest hyperplane, see fill_hyperplanes.
+    :param solver: Multiple sequence alignment solver.
+    :param shape: Shape of the scoring matrix.
+    :return: The number of bytes.
+    """
+    count = len(shape)
+    pairs = [(p, q) for p in range(count) for q in range(p + 1, count)]
+    memory = PAIR_SCORE_BYTES * sum(shape[p] * shape[q] for p, q in pairs)
+    if solver.engine == Engine.WAVEFRONT and count > 0:
+        # Every line along the longest sequence crosses a hyperplane at most once
+        prefix_cells = int(np.prod([length - 1 for length in shape[:-1]], dtype=object))
+        hyperplane_cells = int(np.prod(shape, dtype=object)) // max(shape)
+        memory += INDEX_BYTES * (count + 2) * prefix_cells
+        memory += INDEX_BYTES * ((1 << count) + count + len(pairs) + 2) * hyperplane_cells
+    return memory
+
+
+def all_pairs_cells(sequences: List[str]) -> int:
+    """
+    Count the matrix entries of the global alignment scores of every pair of sequences, each sequence with itself
+    included, as calculated by align_all_pairs.
+    :param sequences: Sequences to align.
+    :return: The number of entries.
+    """
+    lengths = np.array([len(sequence) + 1 for sequence in sequences], dtype=np.int64)
+    return int((lengths.sum() ** 2 + (lengths ** 2).sum()) // 2)
+
+
+def estimate_progressive(solver: ProgressiveMSASolver, sequences: List[str]) -> Estimate:
+    """
+    Estimate the resources to align sequences progressively: a global alignment score of every pair of sequences, and
+    a profile-profile alignment per merge of the guide tree, estimated with the longest sequence as profile length.
+    :param solver: Progressive multiple sequence alignment solver.
+    :param sequences: Sequences to align.
+    :return: The estimate.
+    """
+    pair_cells = all_pairs_cells(sequences)
+    merge_cells = max((len(sequence) + 1 for sequence in sequences), default=1) ** 2
+    profile_cells = max(len(sequences) - 1, 0) * merge_cells
+    seconds, entry_bytes = PROFILE_COSTS
+    return Estimate("progressive", pair_cells + profile_cells, merge_cells,
+                    8 * len(sequences) ** 2 + merge_cells * entry_bytes, 0,
+                    pair_cells * GLOBAL_SCORE_SECONDS + profile_cells * seconds, False)
+
+
+def estimate_center_star(solver: CenterStarMSASolver, sequences: List[str]) -> Estimate:
+    """
+    Estimate the resources to align sequences with the center-star method: a global alignment score of every pair of
+    sequences, and a pairwise alignment of every other sequence to the center, estimated with the longest sequence as
+    center.
+    :param solver: Center-star multiple sequence alignment solver.
+    :param sequences: Sequences to align.
+    :return: The estimate.
+    """
+    pair_cells = all_pairs_cells(sequences)
+    center = max(range(len(sequences)), key=lambda index: len(sequences[index]), default=None)
+    alignments = [estimate_psa(solver.psa_solver, sequences[center], sequence)
+                  for index, sequence in enumerate(sequences) if index != center]
+    cells = pair_cells + sum(alignment.cells for alignment in alignments)
+    memory = 8 * len(sequences) ** 2 + max((alignment.memory for alignment in alignments), default=0)
+    return Estimate("center-star", cells, max((alignment.traceback_bytes for alignment in alignments), default=0),
+                    memory, max((alignment.disk for alignment in alignments), default=0),
+                    pair_cells * GLOBAL_SCORE_SECONDS + sum(alignment.seconds for alignment in alignments), False)
+
+
+def select_msa_solver(candidates: List[Tuple[MSASolver, Estimate]],
+                      memory_limit: Optional[int] = None) -> Tuple[MSASolver, Estimate]:
+    """
+    Select the fastest of the heuristic msa solvers that fits in the memory limit, for sequences that the exact solvers
+    cannot align within it.
+    :param candidates: Progressive and center-star solvers to select from, with their estimates, see
+    estimate_progressive and estimate_center_star.
+    :param memory_limit: Memory limit in bytes, unlimited if None.
+    :return: The selected solver and its estimate.
+    :raises MemoryLimitError: If no solver fits in the memory limit.
+    """
+    fitting = [(solver, estimate) for solver, estimate in candidates
+               if memory_limit is None or estimate.memory <= memory_limit]
+    if not fitting:
+        check_memory_limit(min((estimate for _, estimate in candidates), key=lambda estimate: estimate.memory),
+                           memory_limit)
+    return min(fitting, key=lambda candidate: candidate[1].seconds)
+
+
+def check_memory_limit(estimate: Estimate, memory_limit: Optional[int]) -> None:
+    """
+    Refuse an alignment that would need more memory than allowed.
+    :param estimate: Estimate of the alignment.
+    :param memory_limit: Memory limit in bytes, unlimited if None.
+    :raises MemoryLimitError: If the estimated memory exceeds the limit.
+    """
+    if memory_limit is not None and estimate.memory > memory_limit:
+        name = ESTIMATE_NAMES.get(estimate.engine, f"The {estimate.engine} engine")
+        raise MemoryLimitError(f"{name} needs about {format_bytes(estimate.memory)} of memory "
+                               f"for {estimate.cells} cells, more than the memory limit of "
+                               f"{format_bytes(memory_limit)}")
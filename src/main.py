@@ -1,15 +1,50 @@
 import argparse
 import json
-from typing import List
+from typing import List, TextIO, Tuple
 
-from fasta_parser.fasta_parser import parse
+import numpy as np
+
+from estimation import MemoryLimitError, check_memory_limit, describe, estimate_center_star, estimate_msa, \
+    estimate_progressive, estimate_psa, estimate_score, estimate_top_alignments, select_msa_solver, select_psa_engine, \
+    supports_engine
+from fasta_parser.fasta_parser import parse, parse_generator
+from msa.center_star import CenterStarMSASolver
+from msa.msa_solver import MSASolver
 from msa.needleman_wunsch import NeedlemanWunschMSASolver
+from msa.progressive import ProgressiveMSASolver
 from msa.smith_waterman import SmithWatermanMSASolver
+from psa.all_pairs import align_all_pairs
+from psa.enums import Engine
 from psa.needleman_wunsch import NeedlemanWunschPSASolver
+from psa.search import search
+from psa.seed_extend import KmerIndex, seed_and_extend
 from psa.smith_waterman import SmithWatermanPSASolver
 from utils import check_and_create_dir
 
 
+def write_alignment(file: TextIO, alignment: Tuple[str, ...], alignment_ids: List[str]) -> None:
+    """
+    Write an alignment to a file, one aligned sequence per line.
+    :param file: File to write to.
+    :param alignment: Aligned sequences.
+    :param alignment_ids: Identifiers of the sequences, in the same order.
+    """
+    for alignment_id, aligned_sequence in zip(alignment_ids, alignment):
+        file.write(f"{alignment_id}: {aligned_sequence}\n")
+
+
+def positive_int(value: str) -> int:
+    """
+    Parse a command line argument as an integer of at least 1.
+    :param value: The argument.
+    :return: The integer.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'{value} is not at least 1')
+    return number
+
+
 def main(args: List[str] = None) -> int:
     """
     Main function of the program.
@@ -25,18 +60,67 @@ def main(args: List[str] = None) -> int:
                         default='./data/input/cs_assignment.fasta')
     parser.add_argument('-o', '--output', help='Path to output file', type=str, default='./data/output/output.txt')
     parser.add_argument('-v', '--verbose', help='Print output to stdout', action='store_true')
+    parser.add_argument('--count-alignments', help='Only count the optimal alignments, without building them',
+                        action='store_true')
+    parser.add_argument('--max-alignments', help='Maximum number of alignments to write, all of them if not given',
+                        type=positive_int, default=None)
+    parser.add_argument('--memmap-threshold', help='Scoring matrix size in MB above which it is memory-mapped to files '
+                                                   'instead of kept in memory', type=float, default=None)
+    parser.add_argument('--scratch-dir', help='Directory for the files of memory-mapped scoring matrices, the system '
+                                              'temporary directory if not given', type=str, default=None)
+    parser.add_argument('--memory-limit', help='Memory in MB an alignment may use, alignments estimated to need more '
+                                               'are refused before allocating anything', type=float, default=None)
 
     # Add subparsers for pairwise and multiple sequence alignment
     subparsers = parser.add_subparsers(dest='mode', help='Alignment mode', required=True)
     pairwise_parser = subparsers.add_parser('psa', help='Pairwise sequence alignment')
     msa_parser = subparsers.add_parser('msa', help='Multiple sequence alignment')
 
+    pairwise_parser.add_argument('--engine', help='Engine to fill the scoring matrix with, auto selects the fastest '
+                                                  'one that fits in the memory limit', type=str,
+                                 choices=[engine.value for engine in Engine] + ['auto'], default=Engine.PYTHON.value)
+    pairwise_parser.add_argument('--band', help='Initial band half-width for the banded engine', type=int, default=16)
+    pairwise_parser.add_argument('--score-only', help='Only calculate the alignment score, without alignments',
+                                 action='store_true')
+
     # Add subparsers for pairwise alignment
     pairwise_subparsers = pairwise_parser.add_subparsers(dest='pairwise_mode', help='Pairwise alignment mode',
                                                          required=True)
     needleman_wunsch_parser = pairwise_subparsers.add_parser('needleman_wunsch',
                                                              help='Needleman-Wunsch pairwise alignment')
     smith_waterman_parser = pairwise_subparsers.add_parser('smith_waterman', help='Smith-Waterman pairwise alignment')
+    smith_waterman_parser.add_argument('-k', '--top', help='Write the best local alignments that do not share aligned '
+                                                           'pairs, best first', type=positive_int,
+                                       default=None)
+    search_parser = pairwise_subparsers.add_parser('search', help='Search a database for the best hits of a query')
+    search_parser.add_argument('-q', '--query', help='Path to fasta file with the query as first sequence', type=str,
+                               required=True)
+    search_parser.add_argument('-d', '--database', help='Path to database fasta file, defaults to the input file',
+                               type=str, default=None)
+    search_parser.add_argument('-a', '--algorithm', help='Alignment algorithm to score with', type=str,
+                               choices=['smith_waterman', 'needleman_wunsch'], default='smith_waterman')
+    search_parser.add_argument('-k', '--top', help='Number of hits to report', type=positive_int, default=10)
+    search_parser.add_argument('-w', '--workers', help='Number of worker processes, defaults to all cores', type=int,
+                               default=None)
+    search_parser.add_argument('--chunk-size', help='Number of database sequences per task', type=int, default=64)
+    search_parser.add_argument('--seed-extend', help='Use the seed-and-extend heuristic instead of scoring every '
+                                                     'sequence, smith_waterman only', action='store_true')
+    search_parser.add_argument('--word-size', help='Length of the seed words', type=int, default=3)
+    search_parser.add_argument('--x-drop', help='Score drop that ends an ungapped extension', type=float, default=20)
+    search_parser.add_argument('--ungapped-threshold', help='Lowest ungapped extension score aligned with gaps',
+                               type=float, default=20)
+    all_pairs_parser = pairwise_subparsers.add_parser(
+        'all_pairs', help='Score every pair of input sequences, saved as a .npy matrix')
+    all_pairs_parser.add_argument('-a', '--algorithm', help='Alignment algorithm to score with', type=str,
+                                  choices=['needleman_wunsch', 'smith_waterman'], default='needleman_wunsch')
+    all_pairs_parser.add_argument('--distance', help='Save distances instead of scores', action='store_true')
+    all_pairs_parser.add_argument('-w', '--workers', help='Number of worker processes, defaults to all cores',
+                                  type=int, default=None)
+    all_pairs_parser.add_argument('--chunk-size', help='Number of sequence pairs per task', type=int, default=64)
+
+    msa_parser.add_argument('--engine', help='Engine to fill the scoring matrix with', type=str,
+                            choices=[engine.value for engine in MSASolver.supported_engines],
+                            default=Engine.PYTHON.value)
 
     # Add subparsers for multiple sequence alignment
     msa_subparsers = msa_parser.add_subparsers(dest='msa_mode', help='Multiple sequence alignment mode', required=True)
@@ -44,6 +128,17 @@ def main(args: List[str] = None) -> int:
                                                             help='Needleman-Wunsch multiple sequence alignment')
     smith_waterman_msa_parser = msa_subparsers.add_parser('smith_waterman',
                                                           help='Smith-Waterman multiple sequence alignment')
+    progressive_msa_parser = msa_subparsers.add_parser('progressive', help='Progressive multiple sequence alignment '
+                                                                           'along a guide tree, for many sequences')
+    progressive_msa_parser.add_argument('--guide-tree', help='Method to build the guide tree with', type=str,
+                                        choices=ProgressiveMSASolver.guide_tree_methods, default='upgma')
+    progressive_msa_parser.add_argument('-w', '--workers', help='Number of worker processes for the pairwise '
+                                                                'distances, defaults to all cores', type=int,
+                                        default=None)
+    center_star_msa_parser = msa_subparsers.add_parser('center_star', help='Center-star multiple sequence alignment, a '
+                                                                           'fast approximation for many sequences')
+    center_star_msa_parser.add_argument('-w', '--workers', help='Number of worker processes for the pairwise scores, '
+                                                                'defaults to all cores', type=int, default=None)
 
     # Parse arguments
     if args is None:
@@ -60,60 +155,218 @@ def main(args: List[str] = None) -> int:
 
     # Run program
     solver = None
+    memmap_threshold = None if args.memmap_threshold is None else int(args.memmap_threshold * 1024 ** 2)
+    memory_limit = None if args.memory_limit is None else int(args.memory_limit * 1024 ** 2)
+    storage = {'memmap_threshold': memmap_threshold, 'scratch_dir': args.scratch_dir}
 
     if args.mode in ['pairwise', 'psa']:
+        # The engine is selected once the sequences are known
+        engine = Engine.PYTHON.value if args.engine == 'auto' else args.engine
+        if args.pairwise_mode == 'smith_waterman' and Engine(engine) not in SmithWatermanPSASolver.supported_engines:
+            parser.error(f'the {engine} engine does not support smith_waterman alignment')
+        if args.count_alignments and Engine(engine) in (Engine.HIRSCHBERG, Engine.MYERS, Engine.WFA):
+            parser.error(f'the {engine} engine finds a single alignment, it cannot count the optimal alignments')
         if args.pairwise_mode == 'needleman_wunsch':
-            solver = NeedlemanWunschPSASolver(config)
+            try:
+                solver = NeedlemanWunschPSASolver(config, engine=engine, band=args.band, **storage)
+            except ValueError as error:
+                parser.error(str(error))
         elif args.pairwise_mode == 'smith_waterman':
+            solver = SmithWatermanPSASolver(config, engine=engine, **storage)
+        elif args.pairwise_mode in ['search', 'all_pairs'] and args.algorithm == 'smith_waterman':
             solver = SmithWatermanPSASolver(config)
+        elif args.pairwise_mode in ['search', 'all_pairs']:
+            solver = NeedlemanWunschPSASolver(config)
         else:
             raise ValueError('Invalid pairwise alignment mode')
 
     elif args.mode == 'msa':
         if args.msa_mode == 'needleman_wunsch':
-            solver = NeedlemanWunschMSASolver(config)
+            solver = NeedlemanWunschMSASolver(config, engine=args.engine, **storage)
         elif args.msa_mode == 'smith_waterman':
-            solver = SmithWatermanMSASolver(config)
+            solver = SmithWatermanMSASolver(config, engine=args.engine, **storage)
+        elif args.msa_mode in ['progressive', 'center_star'] and args.count_alignments:
+            parser.error(f'{args.msa_mode} alignment finds a single alignment, it cannot count the optimal alignments')
+        elif args.msa_mode == 'progressive':
+            solver = ProgressiveMSASolver(config, guide_tree=args.guide_tree, workers=args.workers)
+        elif args.msa_mode == 'center_star':
+            solver = CenterStarMSASolver(config, engine=args.engine, workers=args.workers)
         else:
             raise ValueError('Invalid multiple sequence alignment mode')
 
     else:
         raise ValueError('Invalid alignment mode')
 
+    if args.mode == 'psa' and args.pairwise_mode == 'search':
+        query = next(iter(parse(args.query).values()))
+        statistics = None
+        if args.seed_extend:
+            if args.algorithm != 'smith_waterman':
+                raise ValueError('Seed-and-extend only supports smith_waterman')
+            index = KmerIndex.from_fasta(args.database or args.input, args.word_size)
+            hits, statistics = seed_and_extend(solver, query, index, top=args.top, x_drop=args.x_drop,
+                                               ungapped_threshold=args.ungapped_threshold, band=args.band)
+        else:
+            hits = search(solver, query, parse_generator(args.database or args.input), top=args.top,
+                          workers=args.workers, chunk_size=args.chunk_size)
+        with open(args.output, 'w') as f:
+            for hit in hits:
+                start = f"{hit.start[0]} {hit.start[1]}" if hit.start is not None else "-"
+                f.write(f"{hit.sequence_id}: score {hit.score} start {start} end {hit.end[0]} {hit.end[1]}\n")
+            if statistics is not None:
+                for stage, kept, pruned in statistics.stages():
+                    f.write(f"# {stage}: {kept} kept, {pruned} pruned\n")
+
+        if args.verbose:
+            print('Found {} hits'.format(len(hits)))
+            print('Hits written to {}'.format(args.output))
+        return 0
+
+    if args.mode == 'psa' and args.pairwise_mode == 'all_pairs':
+        sequence_ids, sequences = zip(*parse_generator(args.input))
+        matrix = align_all_pairs(solver, sequences, distance=args.distance, workers=args.workers,
+                                 chunk_size=args.chunk_size)
+        with open(args.output, 'wb') as f:
+            np.save(f, matrix)
+
+        if args.verbose:
+            print('Aligned {} sequences: {}'.format(len(sequences), ', '.join(sequence_ids)))
+            print('Matrix written to {}'.format(args.output))
+        return 0
+
     sequence_info = parse(args.input)
     sequence_values = [sequence_info[key] for key in sequence_info.keys()]
 
+    if args.mode == 'psa' and args.pairwise_mode in ['needleman_wunsch', 'smith_waterman'] and args.engine != 'auto':
+        # Characters outside of the alphabet are added to the substitution table before checking its scores
+        solver.encode(sequence_values[0]), solver.encode(sequence_values[1])
+        if not supports_engine(solver, solver.engine):
+            parser.error(f'the {solver.engine.value} engine does not support the scoring of the config')
+
     score, alignments = None, []
 
+    # Estimate the resources before allocating anything, and refuse alignments that do not fit in the memory limit.
+    # Alignments that do not fit are rerouted where possible: psa with --engine auto to only calculating the score, and
+    # needleman_wunsch msa to the fastest heuristic solver.
+    score_only = args.mode == 'psa' and args.score_only
+    try:
+        if score_only:
+            estimate = estimate_score(solver, sequence_values[0], sequence_values[1])
+        elif args.mode == 'psa' and args.pairwise_mode == 'smith_waterman' and args.top is not None:
+            estimate = estimate_top_alignments(sequence_values[0], sequence_values[1])
+        elif args.mode == 'psa' and args.engine == 'auto':
+            estimate = select_psa_engine(solver, sequence_values[0], sequence_values[1], memory_limit,
+                                         all_alignments=args.count_alignments or args.max_alignments != 1,
+                                         single_alignment_fallback=not args.count_alignments,
+                                         score_only_fallback=not args.count_alignments)
+            if estimate.engine == 'score-only':
+                score_only = True
+            elif args.pairwise_mode == 'needleman_wunsch':
+                solver = NeedlemanWunschPSASolver(config, engine=estimate.engine, band=args.band, **storage)
+            else:
+                solver = SmithWatermanPSASolver(config, engine=estimate.engine, **storage)
+        elif args.mode == 'psa':
+            estimate = estimate_psa(solver, sequence_values[0], sequence_values[1])
+        elif args.msa_mode == 'progressive':
+            estimate = estimate_progressive(solver, sequence_values)
+        elif args.msa_mode == 'center_star':
+            estimate = estimate_center_star(solver, sequence_values)
+        else:
+            estimate = estimate_msa(solver, sequence_values)
+            if args.msa_mode == 'needleman_wunsch' and not args.count_alignments and memory_limit is not None and \
+                    estimate.memory > memory_limit:
+                progressive, center_star = ProgressiveMSASolver(config), CenterStarMSASolver(config, engine=args.engine)
+                candidates = [(progressive, estimate_progressive(progressive, sequence_values)),
+                              (center_star, estimate_center_star(center_star, sequence_values))]
+                try:
+                    solver, estimate = select_msa_solver(candidates, memory_limit)
+                except MemoryLimitError as error:
+                    raise MemoryLimitError(f'The msa scoring matrix of {estimate.cells} cells does not fit in the '
+                                           f'memory limit, and neither do the heuristic solvers: {error}')
+        check_memory_limit(estimate, memory_limit)
+    except MemoryLimitError as error:
+        parser.error(str(error))
+
+    if args.verbose:
+        print('Estimated {}'.format(describe(estimate)))
+
+    if score_only:
+        score, start, end = solver.score(sequence_values[0], sequence_values[1], locate_start=True)
+        with open(args.output, 'w') as f:
+            f.write(f"score: {score}\n")
+            if start is not None:
+                f.write(f"start: {start[0]} {start[1]}\n")
+            f.write(f"end: {end[0]} {end[1]}\n")
+
+        if args.verbose:
+            print('Alignment score: {}'.format(score))
+            print('Score written to {}'.format(args.output))
+        return 0
+
+    if args.mode == 'psa' and args.pairwise_mode == 'smith_waterman' and args.top is not None:
+        local_alignments = solver.top_alignments(sequence_values[0], sequence_values[1], args.top)
+        with open(args.output, 'w') as f:
+            for rank, local_alignment in enumerate(local_alignments, start=1):
+                start, end = local_alignment.start, local_alignment.end
+                f.write(f"# {rank}: score {local_alignment.score} start {start[0]} {start[1]} end {end[0]} {end[1]}\n")
+                write_alignment(f, local_alignment.alignment, list(sequence_info.keys()))
+                f.write('\n')
+
+        if args.verbose:
+            print('Found {} local alignments'.format(len(local_alignments)))
+            print('Alignments written to {}'.format(args.output))
+        return 0
+
+    if args.count_alignments:
+        if args.mode == 'psa':
+            score, count = solver.count_alignments(sequence_values[0], sequence_values[1])
+        else:
+            score, count = solver.count_alignments(sequence_values)
+        with open(args.output, 'w') as f:
+            f.write(f"score: {score}\n")
+            f.write(f"alignments: {count}\n")
+
+        if args.verbose:
+            print('Alignments score: {}'.format(score))
+            print('Number of optimal alignments: {}'.format(count))
+        return 0
+
     if args.mode == 'psa':
-        score, alignments = solver.solve(sequence_values[0], sequence_values[1])
+        score, alignments = solver.solve_iter(sequence_values[0], sequence_values[1],
+                                              max_alignments=args.max_alignments)
     else:
-        score, alignments = solver.solve(sequence_values)
+        score, alignments = solver.solve_iter(sequence_values, max_alignments=args.max_alignments)
 
     if args.verbose:
         print('Alignments score: {}'.format(score))
         print('Alignments written to {}'.format(args.output))
 
-    if len(alignments) == 0:
+    # Alignments are streamed to the file with all alignments, which is only created once there is a second one. The
+    # primary alignment is the lowest in sort order.
+    first_alignment, primary_alignment, all_file = None, None, None
+    try:
+        for alignment in alignments:
+            if first_alignment is None:
+                first_alignment = primary_alignment = alignment
+                continue
+            if all_file is None:
+                all_file = open(args.output.replace('.txt', '_all.txt'), 'w')
+                write_alignment(all_file, first_alignment, list(sequence_info.keys()))
+                all_file.write('\n')
+            write_alignment(all_file, alignment, list(sequence_info.keys()))
+            all_file.write('\n')
+            primary_alignment = min(primary_alignment, alignment)
+    finally:
+        if all_file is not None:
+            all_file.close()
+
+    if primary_alignment is None:
         if args.verbose:
             print('No alignments found')
         exit(0)
 
-    alignments = sorted(alignments)
-
-    primary_alignment = alignments[0]
     with open(args.output, 'w') as f:
-        for i in range(len(primary_alignment)):
-            alignment_id = list(sequence_info.keys())[i]
-            f.write(f"{alignment_id}: {primary_alignment[i]}\n")
-
-    if len(alignments) > 1:
-        with open(args.output.replace('.txt', '_all.txt'), 'w') as f:
-            for alignment in alignments:
-                for i in range(len(alignment)):
-                    alignment_id = list(sequence_info.keys())[i]
-                    f.write(f"{alignment_id}: {alignment[i]}\n")
-                f.write('\n')
+        write_alignment(f, primary_alignment, list(sequence_info.keys()))
 
     return 0
 
@@ -0,0 +1,121 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from msa.heuristic_solver import HeuristicMSASolver
+
+
+class CenterStarMSASolver(HeuristicMSASolver):
+    """
+    Center-star multiple sequence alignment solver, a fast approximation for many sequences.
+
+    The center is the sequence with the highest total global alignment score against all others. Every other sequence
+    is aligned to the center with the pairwise Needleman-Wunsch solver, and the pairwise alignments are merged with the
+    "once a gap, always a gap" rule: a gap inserted in the center by any pairwise alignment is inserted in every row.
+    This takes O(N^2 L^2) time instead of the O(L^N 2^N) of the exact solvers, and for scoring that corresponds to
+    a distance satisfying the triangle inequality, the sum-of-pairs cost is at most twice the optimal cost.
+    """
+
+    def __init__(self, config: dict, substitution_matrix: Optional[dict] = None, *args, **kwargs):
+        """
+        Initialise the center-star MSA solver.
+        :param config: Configuration for the MSA solver.
+        :param substitution_matrix: Substitution matrix to use. Defaults to the "substitution matrix" of the config (a
+        name or path, see get_substitution_matrix), or BLOSUM62.
+        """
+        super().__init__(config, substitution_matrix, *args, **kwargs)
+        self.center: int = None
+
+    def select_center(self, sequences: List[str]) -> int:
+        """
+        Select the center sequence, which has the highest sum of pairwise scores against the other sequences. Ties go
+        to the first sequence.
+        :param sequences: Sequences to align.
+        :return: Index of the center sequence.
+        """
+        if len(sequences) < 3:
+            return 0
+        scores = self.pairwise_scores(sequences)
+        return int(np.argmax(scores.sum(axis=1) - np.diag(scores)))
+
+    def align(self, sequences: List[str]) -> Tuple[str, ...]:
+        """
+        Align every sequence to the center and merge the pairwise alignments.
+        :param sequences: List of sequences to align.
+        :return: The aligned sequences, in the order of the input.
+        """
+        if not sequences:
+            return ()
+        self.center = self.select_center(sequences)
+        center = sequences[self.center]
+        pairwise_alignments = {}
+        for index, sequence in enumerate(sequences):
+            if index != self.center:
+                _, alignments = self.psa_solver.solve(center, sequence, max_alignments=1)
+                pairwise_alignments[index] = complete_alignment(center, sequence, alignments[0])
+        return merge_center_alignments(center, self.center, pairwise_alignments, len(sequences))
+
+
+def complete_alignment(sequence_1: str, sequence_2: str, alignment: Tuple[str, str]) -> Tuple[str, str]:
+    """
+    Complete a global pairwise alignment whose traceback stopped at the first edge of the scoring matrix, by aligning
+    the leading characters it left out with gaps, those of the first sequence first.
+    :param sequence_1: The first sequence.
+    :param sequence_2: The second sequence.
+    :param alignment: Pairwise alignment of both sequences, possibly without their first characters.
+    :return: The alignment of the whole sequences.
+    """
+    missing_1 = sequence_1[:len(sequence_1) - len(alignment[0].replace('-', ''))]
+    missing_2 = sequence_2[:len(sequence_2) - len(alignment[1].replace('-', ''))]
+    return (missing_1 + '-' * len(missing_2) + alignment[0], '-' * len(missing_1) + missing_2 + alignment[1])
+
+
+def split_center_alignment(aligned_center: str, aligned_sequence: str) -> List[str]:
+    """
+    Split the aligned sequence of a pairwise alignment with the center at the characters of the center.
+    :param aligned_center: The aligned center.
+    :param aligned_sequence: The aligned other sequence.
+    :return: For every position of the center and once more for the end, the characters of the other sequence aligned
+    to gaps in the center before it. The character aligned to a position of the center follows its insertion.
+    """
+    insertions, insertion = [], []
+    for center_char, char in zip(aligned_center, aligned_sequence):
+        insertion.append(char)
+        if center_char != '-':
+            insertions.append(''.join(insertion))
+            insertion = []
+    insertions.append(''.join(insertion))
+    return insertions
+
+
+def merge_center_alignments(center: str, center_index: int, pairwise_alignments: dict, count: int) -> Tuple[str, ...]:
+    """
+    Merge pairwise alignments with the center into one multiple alignment, once a gap, always a gap.
+
+    Before every position of the center (and at its end), the merged alignment has as many columns as the longest
+    insertion of any pairwise alignment at that position. Shorter insertions are padded with gaps after their
+    characters, and the center has gaps in all of them.
+    :param center: The center sequence.
+    :param center_index: Index of the center sequence.
+    :param pairwise_alignments: Pairwise alignment (aligned center, aligned sequence) of every other sequence, by index.
+    :param count: Number of sequences.
+    :return: The aligned sequences, in the order of their indices.
+    """
+    # Every insertion of a split alignment but the last ends with the character aligned to a center position
+    split_alignments = {index: split_center_alignment(*alignment) for index, alignment in pairwise_alignments.items()}
+    widths = [0] * (len(center) + 1)
+    for insertions in split_alignments.values():
+        for position, insertion in enumerate(insertions):
+            widths[position] = max(widths[position], len(insertion) - (position < len(center)))
+
+    alignment = [''] * count
+    alignment[center_index] = ''.join('-' * width + char for width, char in zip(widths, center)) + '-' * widths[-1]
+    for index, insertions in split_alignments.items():
+        rows = []
+        for position, insertion in enumerate(insertions):
+            if position < len(center):
+                rows.append(insertion[:-1].ljust(widths[position], '-') + insertion[-1])
+            else:
+                rows.append(insertion.ljust(widths[position], '-'))
+        alignment[index] = ''.join(rows)
+    return tuple(alignment)
@@ -0,0 +1,130 @@
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from encoding import Encoder
+from psa.all_pairs import align_all_pairs
+from psa.enums import Engine
+from psa.needleman_wunsch import NeedlemanWunschPSASolver
+from substitution_matrix import SubstitutionMatrix, get_substitution_matrix
+
+
+class HeuristicMSASolver(ABC):
+    """
+    Abstract class for multiple sequence alignment solvers that build a single alignment from pairwise alignments,
+    for more sequences than the exact solvers can handle.
+
+    These solvers do not fill a scoring matrix over all sequences, so they do not inherit from MSASolver, but offer the
+    same solve and solve_iter methods. The returned score is the sum-of-pairs score of the alignment.
+    """
+
+    def __init__(self, config: dict, substitution_matrix: Optional[dict] = None,
+                 engine: Union[Engine, str] = Engine.PYTHON, workers: Optional[int] = None, chunk_size: int = 64):
+        """
+        Initialise the MSA solver.
+        :param config: Configuration for the MSA solver.
+        :param substitution_matrix: Substitution matrix to use. Defaults to the "substitution matrix" of the config (a
+        name or path, see get_substitution_matrix), or BLOSUM62.
+        :param engine: Engine of the pairwise Needleman-Wunsch solver, for the solvers that build pairwise alignments.
+        :param workers: Number of worker processes for the pairwise scores, all cores if None.
+        :param chunk_size: Maximum number of sequence pairs per task of the pairwise scores.
+        """
+        self.config = config
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+        if substitution_matrix is None:
+            self.substitution_matrix = get_substitution_matrix(config.get("substitution matrix", "BLOSUM62"),
+                                                               config.get("match"), config.get("mismatch"))
+        else:
+            self.substitution_matrix = SubstitutionMatrix.from_dict(substitution_matrix)
+        self.psa_solver = NeedlemanWunschPSASolver(config, substitution_matrix, engine=engine)
+
+        self.encoder = Encoder(self.substitution_matrix)
+
+    def encode(self, sequence: str) -> np.ndarray:
+        """
+        Encode a sequence as codes into the substitution table.
+        :param sequence: Sequence to encode.
+        :return: Array of codes.
+        """
+        return self.encoder.encode(sequence)
+
+    def pairwise_scores(self, sequences: List[str], distance: bool = False) -> np.ndarray:
+        """
+        Calculate the global alignment score of every pair of sequences, in parallel, see align_all_pairs.
+        :param sequences: Sequences to align.
+        :param distance: Whether to return distances instead of scores.
+        :return: Symmetric score (or distance) matrix.
+        """
+        return align_all_pairs(self.psa_solver, sequences, distance=distance, workers=self.workers,
+                               chunk_size=self.chunk_size)
+
+    def gap_table(self, sequence_count: int) -> np.ndarray:
+        """
+        Substitution table extended with a gap character, whose code is the size of the substitution table. A character
+        and a gap score the indel score, and two gaps the two gaps score.
+        :param sequence_count: Number of sequences, the two gaps score is only needed for 3 or more.
+        :return: The extended table.
+        """
+        table = self.encoder.table
+        two_gaps = self.config["two gaps"] if sequence_count > 2 else 0
+        dtype = np.result_type(table.dtype, np.min_scalar_type(self.config["indel"]), np.min_scalar_type(two_gaps),
+                               np.int64)
+        gap_table = np.empty((len(table) + 1, len(table) + 1), dtype=dtype)
+        gap_table[:-1, :-1] = table
+        gap_table[-1, :] = gap_table[:, -1] = self.config["indel"]
+        gap_table[-1, -1] = two_gaps
+        return gap_table
+
+    @abstractmethod
+    def align(self, sequences: List[str]) -> Tuple[str, ...]:
+        """
+        Align the sequences.
+        :param sequences: List of sequences to align.
+        :return: The aligned sequences, in the order of the input.
+        """
+        pass
+
+    def solve(self, sequences: List[str], max_alignments: Optional[int] = None) -> Tuple[
+        Union[int, float], List[Tuple[str, ...]]]:
+        """
+        Solve the multiple sequence alignment problem.
+        :param sequences: List of sequences to align.
+        :param max_alignments: Maximum number of alignments to return, there is only a single one.
+        :return: Tuple of the sum-of-pairs score of the alignment and a list with the aligned sequences.
+        """
+        score, alignments = self.solve_iter(sequences, max_alignments)
+        return score, list(alignments)
+
+    def solve_iter(self, sequences: List[str], max_alignments: Optional[int] = None) -> Tuple[
+        Union[int, float], Iterator[Tuple[str, ...]]]:
+        """
+        Solve the multiple sequence alignment problem, with the same interface as MSASolver.solve_iter.
+        :param sequences: List of sequences to align.
+        :param max_alignments: Maximum number of alignments to produce, there is only a single one.
+        :return: Tuple of the sum-of-pairs score of the alignment and an iterator over the aligned sequences.
+        """
+        if max_alignments is not None and max_alignments < 0:
+            raise ValueError(f"Maximum number of alignments must not be negative, got {max_alignments}")
+        alignment = self.align(sequences)
+        return self.sum_of_pairs(alignment), islice(iter([alignment]), max_alignments)
+
+    def sum_of_pairs(self, alignment: Tuple[str, ...]) -> Union[int, float]:
+        """
+        Calculate the sum-of-pairs score of an alignment, the sum of the scores of every pair of aligned sequences,
+        scored column by column.
+        :param alignment: The aligned sequences.
+        :return: The sum-of-pairs score.
+        """
+        residue_codes = [self.encode(row.replace('-', '')) for row in alignment]
+        gap_table = self.gap_table(len(alignment))
+        codes = np.full((len(alignment), len(alignment[0]) if alignment else 0), len(gap_table) - 1, dtype=np.int64)
+        for row_codes, row, residues in zip(codes, alignment, residue_codes):
+            row_codes[[position for position, char in enumerate(row) if char != '-']] = residues
+        score = gap_table.dtype.type(0)
+        for p in range(len(codes) - 1):
+            score += gap_table[codes[p][None, :], codes[p + 1:]].sum()
+        return score.item()
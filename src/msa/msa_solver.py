@@ -1,39 +1,128 @@
 from abc import ABC, abstractmethod
-from itertools import combinations
-from typing import List, Tuple, Optional, Union
+from itertools import combinations, islice
+from typing import Dict, List, Tuple, Optional, Union, Iterator
 
-from blosum import BLOSUM
+import numpy as np
 
+from encoding import Encoder
+from msa.scoring_matrix.memmap_scoring_matrix import MemmapScoringMatrix
 from msa.scoring_matrix.scoring_matrix import ScoringMatrix
+from msa.wavefront import fill_hyperplanes
+from psa.enums import Engine
+from scratch import memmap_size
+from substitution_matrix import SubstitutionMatrix, get_substitution_matrix
 
 
 class MSASolver(ABC):
     """
     Abstract class for multiple sequence alignment solvers.
     """
+    supported_engines: Tuple[Engine, ...] = (Engine.PYTHON, Engine.WAVEFRONT)
 
-    def __init__(self, config: dict, substitution_matrix: Optional[dict] = None, *args, **kwargs):
+    def __init__(self, config: dict, substitution_matrix: Optional[dict] = None, *args,
+                 engine: Union[Engine, str] = Engine.PYTHON, memmap_threshold: Optional[int] = None,
+                 scratch_dir: Optional[str] = None, **kwargs):
         """
         Initialise the PSA solver.
         :param config: Configuration for the PSA solver.
-        :param substitution_matrix: Substitution matrix to use for the PSA solver. Defaults to BLOSUM62.
+        :param substitution_matrix: Substitution matrix to use for the PSA solver. Defaults to the "substitution matrix"
+        of the config (a name or path, see get_substitution_matrix), or BLOSUM62.
+        :param engine: Engine to fill the scoring matrix with, python (one entry at a time) or wavefront (one hyperplane
+        of equal index sums at a time).
+        :param memmap_threshold: Size in bytes above which scoring matrices are memory-mapped to files instead of kept
+        in memory, never if None.
+        :param scratch_dir: Directory for the files of memory-mapped scoring matrices, the system temporary directory if
+        None.
         """
         super().__init__(*args, **kwargs)
+        self.engine = Engine(engine)
+        if self.engine not in self.supported_engines:
+            raise ValueError(f"Engine {self.engine.value} is not supported by {type(self).__name__}")
+        self.memmap_threshold = memmap_threshold
+        self.scratch_dir = scratch_dir
         self.config = config
-        self.substitution_matrix = substitution_matrix or BLOSUM(62)
         self.scoring_matrix: ScoringMatrix = None
+        self.pair_scores: Dict[Tuple[int, int], np.ndarray] = None
+        self.pair_score_lists: Dict[Tuple[int, int], List[List[Union[int, float]]]] = None
+        self.move_scores: Dict[Tuple[int, ...], Tuple[Union[int, float], List[Tuple[int, int]]]] = None
 
-        if config.get("match") is not None and substitution_matrix is None:
-            for key in self.substitution_matrix.keys():
-                for other_key in self.substitution_matrix[key].keys():
-                    if key == other_key:
-                        self.substitution_matrix[key][other_key] = config["match"]
+        # The match and mismatch scores only replace those of the default substitution matrix
+        if substitution_matrix is None:
+            self.substitution_matrix = get_substitution_matrix(config.get("substitution matrix", "BLOSUM62"),
+                                                               config.get("match"), config.get("mismatch"))
+        else:
+            self.substitution_matrix = SubstitutionMatrix.from_dict(substitution_matrix)
 
-        if config.get("mismatch") is not None and substitution_matrix is None:
-            for key in self.substitution_matrix.keys():
-                for other_key in self.substitution_matrix[key].keys():
-                    if key != other_key:
-                        self.substitution_matrix[key][other_key] = config["mismatch"]
+        self.encoder = Encoder(self.substitution_matrix)
+
+    def encode(self, sequence: str) -> np.ndarray:
+        """
+        Encode a sequence as codes into the substitution table.
+        :param sequence: Sequence to encode.
+        :return: Array of codes.
+        """
+        return self.encoder.encode(sequence)
+
+    @property
+    def substitution_table(self) -> np.ndarray:
+        """
+        Dense substitution table, indexed by the codes of two characters. Characters are added to it as they are first
+        encoded, so it is read after encoding the sequences.
+        """
+        return self.encoder.table
+
+    @property
+    def score_dtype(self) -> type:
+        """
+        Numpy type that can hold every score, floating point if any of the penalties or substitutions is. Characters
+        are added to the substitution table as they are first encoded, so it is read after encoding the sequences.
+        """
+        if np.issubdtype(self.substitution_table.dtype, np.floating) or \
+                any(isinstance(self.config.get(key), float) for key in ["indel", "two gaps"]):
+            return np.float64
+        return np.int64
+
+    def use_memmap(self, sequences: List[str]) -> bool:
+        """
+        Check if the scoring matrix of the sequences should be memory-mapped to files, because it is larger than the
+        memmap threshold.
+        :param sequences: List of sequences to align.
+        :return: Whether to memory-map the scoring matrix.
+        """
+        if self.memmap_threshold is None:
+            return False
+        size = memmap_size(tuple(len(sequence) + 1 for sequence in sequences),
+                           MemmapScoringMatrix.bytes_per_entry(len(sequences), self.score_dtype))
+        return size > self.memmap_threshold
+
+    def encode_sequences(self) -> None:
+        """
+        Encode the sequences of the scoring matrix, and precompute the sum-of-pairs scores of every move.
+
+        The substitution scores of every pair of sequences are looked up once for all pairs of their positions. A move,
+        a relative offset in (0, -1) ** N, advances some of the sequences: the pairs of sequences it advances both of
+        are scored from these tables, and its pairs of a character and a gap or of two gaps add up to a constant. The
+        python engine reads the tables as nested lists, which is faster per entry.
+        """
+        codes = [self.encode(sequence) for sequence in self.scoring_matrix.sequences]
+        pairs = list(combinations(range(len(codes)), 2))
+        self.pair_scores = {(p, q): self.substitution_table[codes[p][:, None], codes[q][None, :]] for p, q in pairs}
+        if self.engine == Engine.PYTHON:
+            self.pair_score_lists = {pair: scores.tolist() for pair, scores in self.pair_scores.items()}
+
+        self.move_scores = {}
+        for offset in self.scoring_matrix.offsets:
+            if not any(offset):
+                continue
+            constant, advanced_pairs = 0, []
+            for p, q in pairs:
+                if offset[p] and offset[q]:
+                    advanced_pairs.append((p, q))
+                elif offset[p] or offset[q]:
+                    constant += self.config["indel"]
+                else:
+                    constant += self.config["two gaps"]
+            self.move_scores[offset] = (constant, advanced_pairs)
 
     def get_alignment_chars(self, *args, comparison_indices: Tuple[int, ...]) -> Tuple[str, ...]:
         """
@@ -61,17 +150,9 @@ class MSASolver(ABC):
         if len(indices) != len(self.scoring_matrix.shape):
             raise IndexError("Incorrect number of indices given.")
 
-        sequence_chars = self.get_alignment_chars(*args, comparison_indices=comparison_indices)
-
-        score = 0
-        char_combinations = combinations(sequence_chars, 2)
-        for char_combination in char_combinations:
-            if char_combination == ('-', '-'):
-                score += self.config["two gaps"]
-            elif '-' in char_combination:
-                score += self.config["indel"]
-            else:
-                score += self.substitution_matrix[char_combination[0]][char_combination[1]]
+        score, advanced_pairs = self.move_scores[tuple(j - i for i, j in zip(args, comparison_indices))]
+        for p, q in advanced_pairs:
+            score += self.pair_score_lists[p, q][args[p] - 1][args[q] - 1]
 
         return self.scoring_matrix.get_score(*comparison_indices) + score
 
@@ -79,9 +160,19 @@ class MSASolver(ABC):
         """
         Fill the scoring matrix.
         """
+        self.encode_sequences()
+        if self.engine == Engine.WAVEFRONT:
+            return self.fill_scoring_matrix_wavefront()
         for index in self.scoring_matrix.iter_non_zero_indices():
             self.update_matrix_position(*index)
 
+    def fill_scoring_matrix_wavefront(self) -> None:
+        """
+        Fill the scoring matrix one hyperplane of equal index sums at a time, see fill_hyperplanes.
+        """
+        fill_hyperplanes(self.scoring_matrix, self.pair_scores, self.move_scores, self.config["indel"],
+                         local=self.add_zero_score)
+
     @abstractmethod
     def update_matrix_position(self, *args) -> None:
         """
@@ -108,26 +199,66 @@ class MSASolver(ABC):
         """
         pass
 
-    def traceback(self, *args) -> List[Tuple[str, ...]]:
+    def traceback(self, *args) -> Iterator[Tuple[str, ...]]:
         """
-        Perform the traceback.
+        Perform the traceback, producing one alignment at a time in the order of the traceback directions.
+
+        The traceback is walked depth first with an explicit stack, so the length of the sequences is not limited by
+        the recursion limit. The aligned characters are collected back to front in a buffer per sequence, which is cut
+        back to the length at a branching index before following its next branch, and reversed once per alignment.
         :param args: Coordinates to start the traceback from.
-        :return: List of tuples of aligned sequences.
+        :return: Iterator over tuples of aligned sequences.
         """
-        if self.reached_stopping_condition(*args):
-            return [('',) * len(self.scoring_matrix.sequences)]
+        aligned = [[] for _ in self.scoring_matrix.sequences]
+        stack = [(args, 0, None)]
+        while stack:
+            index, length, chars = stack.pop()
+            for buffer in aligned:
+                del buffer[length:]
+            if chars is not None:
+                for buffer, char in zip(aligned, chars):
+                    buffer.append(char)
+
+            if self.reached_stopping_condition(*index):
+                yield tuple(''.join(reversed(buffer)) for buffer in aligned)
+                continue
 
-        new_alignments = []
-        for traceback_direction in self.scoring_matrix.get_traceback(*args):
-            traceback_alignments = self.traceback(*traceback_direction)
-            alignment_chars = self.get_alignment_chars(*args, comparison_indices=traceback_direction)
-            for alignment in traceback_alignments:
-                new_alignment = []
-                for i in range(len(alignment)):
-                    new_alignment.append(alignment[i] + alignment_chars[i])
-                new_alignments.append(tuple(new_alignment))
+            # Pushed in reverse, so the first traceback direction is followed first
+            for traceback_direction in reversed(self.scoring_matrix.get_traceback(*index)):
+                stack.append((traceback_direction, len(aligned[0]),
+                              self.get_alignment_chars(*index, comparison_indices=traceback_direction)))
 
-        return new_alignments
+    def count_paths(self, *args) -> int:
+        """
+        Count the traceback paths from a starting index with dynamic programming over the traceback graph.
+
+        Only the indices reachable from the starting index are visited, and the number of paths from an index is the
+        sum over the indices in its traceback.
+        :param args: Coordinates to start the traceback from.
+        :return: The number of paths, as an exact integer.
+        """
+        start = tuple(int(index) for index in args)
+        following_indices = {}
+        stack = [start]
+        while stack:
+            index = stack.pop()
+            if index not in following_indices:
+                if self.reached_stopping_condition(*index):
+                    following_indices[index] = None
+                else:
+                    following_indices[index] = [tuple(int(i) for i in traceback_direction) for traceback_direction in
+                                                self.scoring_matrix.get_traceback(*index)]
+                stack.extend(following_indices[index] or [])
+
+        # Every index only leads to indices closer to the origin
+        path_counts = {}
+        for index in sorted(following_indices, key=sum):
+            if following_indices[index] is None:
+                path_counts[index] = 1
+            else:
+                path_counts[index] = sum(path_counts[following_index] for following_index in following_indices[index])
+
+        return path_counts[start]
 
     def pre_solve(self):
         """
@@ -160,13 +291,39 @@ class MSASolver(ABC):
         """
         pass
 
-    def solve(self, sequences: List[str]) -> Tuple[Union[int, float], List[Tuple[str, ...]]]:
+    def solve(self, sequences: List[str], max_alignments: Optional[int] = None) -> Tuple[
+        Union[int, float], List[Tuple[str, ...]]]:
         """
         Solve the multiple sequence alignment problem.
         :param sequences: List of sequences to align.
+        :param max_alignments: Maximum number of alignments to return, all of them if None.
         :return: Tuple of the aligned sequences and the alignment score.
         """
+        score, alignments = self.solve_iter(sequences, max_alignments)
+        return self.post_solve(score, list(alignments))
+
+    def solve_iter(self, sequences: List[str], max_alignments: Optional[int] = None) -> Tuple[
+        Union[int, float], Iterator[Tuple[str, ...]]]:
+        """
+        Solve the multiple sequence alignment problem, finding the alignments lazily.
+        :param sequences: List of sequences to align.
+        :param max_alignments: Maximum number of alignments to produce, all of them if None.
+        :return: Tuple of the alignment score and an iterator over the aligned sequences.
+        """
+        if max_alignments is not None and max_alignments < 0:
+            raise ValueError(f"Maximum number of alignments must not be negative, got {max_alignments}")
+        self.scoring_matrix = self.initialise_scoring_matrix(sequences)
+        self.fill_scoring_matrix()
+        self.pre_solve()
+        return self.get_alignment_score(), islice(self.traceback(*self.get_start_indices()), max_alignments)
+
+    def count_alignments(self, sequences: List[str]) -> Tuple[Union[int, float], int]:
+        """
+        Count the optimal alignments without building any of them.
+        :param sequences: List of sequences to align.
+        :return: Tuple of the alignment score and the number of optimal alignments.
+        """
         self.scoring_matrix = self.initialise_scoring_matrix(sequences)
         self.fill_scoring_matrix()
         self.pre_solve()
-        return self.post_solve(self.get_alignment_score(), self.traceback(*self.get_start_indices()))
+        return self.get_alignment_score(), self.count_paths(*self.get_start_indices())
@@ -3,6 +3,7 @@ from typing import Tuple
 import numpy as np
 
 from msa.smith_waterman import SmithWatermanMSASolver
+from psa.enums import Engine
 
 
 class NeedlemanWunschMSASolver(SmithWatermanMSASolver):
@@ -38,8 +39,11 @@ class NeedlemanWunschMSASolver(SmithWatermanMSASolver):
 
     def fill_scoring_matrix(self):
         """
-        Fill the scoring matrix.
+        Fill the scoring matrix. The wavefront engine initialises the zero planes itself.
         """
+        if self.engine == Engine.WAVEFRONT:
+            return super().fill_scoring_matrix()
+
         for index in self.scoring_matrix.iter_zero_indices():
             distance_from_origin = np.sum(index)
             self.scoring_matrix.set_score(*index, score=self.config["indel"] * distance_from_origin)
@@ -0,0 +1,226 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from msa.heuristic_solver import HeuristicMSASolver
+
+# Traceback directions of the profile-profile alignment, in the order ties are broken
+DIAGONAL, UP, LEFT = 0, 1, 2
+
+
+class ProgressiveMSASolver(HeuristicMSASolver):
+    """
+    Progressive multiple sequence alignment solver, for more sequences than the exact solvers can handle.
+
+    The distance of every pair of sequences is calculated with the pairwise Needleman-Wunsch score, a guide tree is
+    built from the distances with UPGMA or neighbour joining, and the sequences are merged bottom-up along the tree by
+    aligning the profiles of the two subtrees with dynamic programming. Profiles are scored with the same sum-of-pairs
+    config as the exact solvers, but once aligned, the columns of a profile are never changed, so the alignment is not
+    guaranteed to be optimal.
+    """
+    guide_tree_methods = ('upgma', 'nj')
+
+    def __init__(self, config: dict, substitution_matrix: Optional[dict] = None, guide_tree: str = 'upgma', *args,
+                 **kwargs):
+        """
+        Initialise the progressive MSA solver.
+        :param config: Configuration for the MSA solver.
+        :param substitution_matrix: Substitution matrix to use. Defaults to the "substitution matrix" of the config (a
+        name or path, see get_substitution_matrix), or BLOSUM62.
+        :param guide_tree: Method to build the guide tree with, upgma or nj (neighbour joining).
+        """
+        if guide_tree not in self.guide_tree_methods:
+            raise ValueError(f"Unknown guide tree method {guide_tree}, expected one of {self.guide_tree_methods}")
+        super().__init__(config, substitution_matrix, *args, **kwargs)
+        self.guide_tree = guide_tree
+        self.merges: List[Tuple[int, int]] = None
+
+    def build_guide_tree(self, distances: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Build the guide tree of the sequences with the method of the solver.
+        :param distances: Symmetric distance matrix of the sequences.
+        :return: The merges of the guide tree, see upgma.
+        """
+        if self.guide_tree == 'nj':
+            return neighbor_joining(distances)
+        return upgma(distances)
+
+    def align(self, sequences: List[str]) -> Tuple[str, ...]:
+        """
+        Align the sequences progressively along the guide tree.
+        :param sequences: List of sequences to align.
+        :return: The aligned sequences, in the order of the input.
+        """
+        # Every profile is an array of codes with a row per sequence, and the indices of its sequences
+        codes = [self.encode(sequence) for sequence in sequences]
+        gap_table = self.gap_table(len(sequences))
+        gap_code = len(gap_table) - 1
+        profiles = {index: (sequence_codes[None, :].astype(np.int16), [index])
+                    for index, sequence_codes in enumerate(codes)}
+
+        self.merges = self.build_guide_tree(self.pairwise_scores(sequences, distance=True)) if len(sequences) > 1 \
+            else []
+        for merge, (left, right) in enumerate(self.merges, start=len(sequences)):
+            left_codes, left_indices = profiles.pop(left)
+            right_codes, right_indices = profiles.pop(right)
+            profiles[merge] = (merge_profiles(left_codes, right_codes, gap_table), left_indices + right_indices)
+
+        if not profiles:
+            return ()
+        profile_codes, indices = profiles.popitem()[1]
+        characters = np.array(self.encoder.alphabet[:gap_code] + ['-'])
+        alignment = [''] * len(sequences)
+        for index, row in zip(indices, profile_codes):
+            alignment[index] = ''.join(characters[row])
+        return tuple(alignment)
+
+
+def upgma(distances: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Build a guide tree with UPGMA, which repeatedly joins the two closest clusters, and takes the distance of the joined
+    cluster to any other as the average distance of their sequences.
+    :param distances: Symmetric distance matrix of the sequences.
+    :return: The merges of the guide tree, bottom-up. The clusters of the sequences are numbered from 0 in their order,
+    and every merge creates the next cluster number, following the sequences.
+    """
+    count = len(distances)
+    distances = np.array(distances, dtype=np.float64)
+    np.fill_diagonal(distances, np.inf)
+    clusters = list(range(count))
+    sizes = np.ones(count)
+    merges = []
+    for merge in range(count, 2 * count - 1):
+        i, j = sorted(np.unravel_index(np.argmin(distances), distances.shape))
+        merges.append((clusters[i], clusters[j]))
+
+        # The joined cluster takes the place of i, and j is removed
+        joined = (distances[i] * sizes[i] + distances[j] * sizes[j]) / (sizes[i] + sizes[j])
+        distances[i, :] = distances[:, i] = joined
+        distances[i, i] = np.inf
+        sizes[i] += sizes[j]
+        clusters[i] = merge
+        distances = np.delete(np.delete(distances, j, axis=0), j, axis=1)
+        sizes = np.delete(sizes, j)
+        del clusters[j]
+    return merges
+
+
+def neighbor_joining(distances: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Build a guide tree with neighbour joining, which repeatedly joins the pair of clusters that minimises the total
+    branch length, corrected for how far each is from all others. The unrooted tree is rooted at the last join.
+    :param distances: Symmetric distance matrix of the sequences.
+    :return: The merges of the guide tree, bottom-up, numbered as by upgma.
+    """
+    count = len(distances)
+    distances = np.array(distances, dtype=np.float64)
+    clusters = list(range(count))
+    merges = []
+    for merge in range(count, 2 * count - 1):
+        size = len(clusters)
+        if size > 2:
+            totals = distances.sum(axis=1)
+            q = (size - 2) * distances - totals[:, None] - totals[None, :]
+            np.fill_diagonal(q, np.inf)
+            i, j = sorted(np.unravel_index(np.argmin(q), q.shape))
+        else:
+            i, j = 0, 1
+        merges.append((clusters[i], clusters[j]))
+
+        # The distance of the joined cluster to any other is the average of theirs, minus half the joined branches
+        joined = (distances[i] + distances[j] - distances[i, j]) / 2
+        distances[i, :] = distances[:, i] = joined
+        distances[i, i] = 0
+        clusters[i] = merge
+        distances = np.delete(np.delete(distances, j, axis=0), j, axis=1)
+        del clusters[j]
+    return merges
+
+
+def profile_counts(codes: np.ndarray, size: int) -> np.ndarray:
+    """
+    Count the characters of every column of a profile.
+    :param codes: Codes of the profile, with a row per sequence.
+    :param size: Number of codes, including the gap code.
+    :return: Counts indexed by [column, code].
+    """
+    counts = np.zeros((codes.shape[1], size), dtype=np.int64)
+    np.add.at(counts, (np.broadcast_to(np.arange(codes.shape[1]), codes.shape), codes), 1)
+    return counts
+
+
+def profile_scores(counts_1: np.ndarray, counts_2: np.ndarray, gap_table: np.ndarray) -> np.ndarray:
+    """
+    Calculate the sum-of-pairs score of every column of one profile against every column of the other, counting every
+    pair of characters once with the counts of both columns. Characters scored as minus infinity make the whole
+    column pair minus infinity.
+    :param counts_1: Counts of the first profile, indexed by [column, code].
+    :param counts_2: Counts of the second profile, indexed by [column, code].
+    :param gap_table: Substitution table extended with a gap code.
+    :return: Scores indexed by [column of the first profile, column of the second profile].
+    """
+    finite = np.isfinite(gap_table)
+    if finite.all():
+        return counts_1 @ gap_table @ counts_2.T
+    scores = counts_1 @ np.where(finite, gap_table, 0) @ counts_2.T
+    scores[((counts_1 > 0) @ ~finite @ (counts_2 > 0).T) > 0] = -np.inf
+    return scores
+
+
+def merge_profiles(codes_1: np.ndarray, codes_2: np.ndarray, gap_table: np.ndarray) -> np.ndarray:
+    """
+    Align two profiles with global dynamic programming over their columns, and merge them into one.
+
+    Aligning two columns scores every pair of characters between them, and a column against a gap scores each of its
+    characters against a gap in every sequence of the other profile. The rows are filled one at a time: the diagonal
+    and vertical moves only depend on the previous row, and the horizontal gaps within a row are a running maximum of
+    the candidates minus the cumulative gap scores. The traceback prefers diagonal, then vertical, then horizontal
+    moves.
+    :param codes_1: Codes of the first profile, with a row per sequence and the gap code for gaps.
+    :param codes_2: Codes of the second profile.
+    :param gap_table: Substitution table extended with a gap code.
+    :return: Codes of the merged profile, the rows of the first profile followed by those of the second.
+    """
+    gap_code = len(gap_table) - 1
+    (count_1, length_1), (count_2, length_2) = codes_1.shape, codes_2.shape
+    counts_1, counts_2 = profile_counts(codes_1, len(gap_table)), profile_counts(codes_2, len(gap_table))
+    column_scores = profile_scores(counts_1, counts_2, gap_table)
+
+    # Score of a column of one profile against a column of gaps in the other
+    gap_counts_1, gap_counts_2 = np.zeros((1, len(gap_table)), dtype=np.int64), np.zeros((1, len(gap_table)),
+                                                                                         dtype=np.int64)
+    gap_counts_1[0, gap_code], gap_counts_2[0, gap_code] = count_1, count_2
+    gap_scores_1 = profile_scores(counts_1, gap_counts_2, gap_table)[:, 0]
+    gap_scores_2 = profile_scores(gap_counts_1, counts_2, gap_table)[0]
+    cumulative_gaps_2 = np.concatenate(([0], np.cumsum(gap_scores_2)))
+
+    scores = np.empty((length_1 + 1, length_2 + 1), dtype=column_scores.dtype)
+    directions = np.empty((length_1 + 1, length_2 + 1), dtype=np.uint8)
+    scores[0] = cumulative_gaps_2
+    scores[1:, 0] = np.cumsum(gap_scores_1)
+    directions[0], directions[:, 0] = LEFT, UP
+    for x in range(1, length_1 + 1):
+        diagonal = scores[x - 1, :-1] + column_scores[x - 1]
+        up = scores[x - 1, 1:] + gap_scores_1[x - 1]
+        best = np.maximum(diagonal, up)
+
+        # Running maximum along the row, shifted by the cumulative gap scores
+        row = np.concatenate(([scores[x, 0]], best)) - cumulative_gaps_2
+        scores[x] = np.maximum.accumulate(row) + cumulative_gaps_2
+        left = scores[x, :-1] + gap_scores_2
+        directions[x, 1:] = np.argmax(np.stack((diagonal, up, left)), axis=0)
+
+    # Traceback from the bottom right corner, collecting the columns of both profiles back to front
+    columns_1, columns_2 = [], []
+    x, y = length_1, length_2
+    while x or y:
+        direction = directions[x, y]
+        columns_1.append(x - 1 if direction != LEFT else -1)
+        columns_2.append(y - 1 if direction != UP else -1)
+        x, y = x - (direction != LEFT), y - (direction != UP)
+    columns_1, columns_2 = np.array(columns_1[::-1], dtype=np.int64), np.array(columns_2[::-1], dtype=np.int64)
+
+    merged = np.full((count_1 + count_2, len(columns_1)), gap_code, dtype=codes_1.dtype)
+    merged[:count_1, columns_1 >= 0] = codes_1[:, columns_1[columns_1 >= 0]]
+    merged[count_1:, columns_2 >= 0] = codes_2[:, columns_2[columns_2 >= 0]]
+    return merged
@@ -0,0 +1,46 @@
+from typing import List, Optional
+
+import numpy as np
+
+from msa.scoring_matrix.scoring_matrix import ScoringMatrix
+from scratch import ScratchDirectory
+
+
+class MemmapScoringMatrix(ScoringMatrix):
+    """
+    N-dimensional scoring matrix for MSA algorithms, with its scores and tracebacks memory-mapped to files in a scratch
+    directory, for matrices larger than the available memory.
+
+    The tracebacks are bit flags in unsigned integers, so up to 6 sequences are supported. The files are removed when
+    the matrix is closed or garbage collected.
+    """
+    max_sequences = 6
+
+    def __init__(self, sequences: List[str], dtype: type = np.int64, scratch_dir: Optional[str] = None, *args,
+                 **kwargs):
+        """
+        Initialise the scoring matrix.
+        :param sequences: List of sequences.
+        :param dtype: Numpy type of the scores.
+        :param scratch_dir: Directory to create the scratch directory in, the system temporary directory if None.
+        """
+        if len(sequences) > self.max_sequences:
+            raise ValueError(f"Memory-mapped scoring matrices support at most {self.max_sequences} sequences")
+        self.scratch = ScratchDirectory(scratch_dir)
+        super().__init__(sequences, dtype, *args, **kwargs)
+
+    def allocate(self, name: str, dtype: np.dtype) -> np.memmap:
+        """
+        Allocate a zeroed array with the shape of the matrix in the scratch directory.
+        :param name: Name of the array.
+        :param dtype: Numpy type of the array.
+        :return: The array.
+        """
+        return self.scratch.array(name, self.shape, dtype)
+
+    def close(self) -> None:
+        """
+        Remove the files of the matrix. The matrix must not be used afterwards.
+        """
+        self.scores = self.tracebacks = None
+        self.scratch.close()
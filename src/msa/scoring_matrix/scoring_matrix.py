@@ -1,4 +1,5 @@
-from typing import Union, Tuple, List, Any, Iterable, Iterator
+from itertools import product
+from typing import Union, Tuple, List, Any, Iterable, Iterator, Dict, Optional
 
 import numpy as np
 
@@ -231,68 +232,147 @@ class ScoringMatrixEntry:
 class ScoringMatrix:
     """
     N-dimensional scoring matrix for MSA algorithms.
+
+    The scores are stored in a numeric array, and the tracebacks in an array of bit flags, one per relative offset in
+    (0, -1) ** N in the order of itertools.product, so an entry takes a few bytes. The flags are unsigned integers for
+    up to 6 sequences, and Python integers beyond that. Tracebacks to indices that are not such an offset away are kept
+    apart per entry. Entries are read as ScoringMatrixEntry copies, so changes to them are only stored through the
+    setters.
     """
 
-    def __init__(self, sequences: List[str], *args, **kwargs):
+    def __init__(self, sequences: List[str], dtype: type = np.int64, *args, **kwargs):
         """
         Initialise the scoring matrix.
         :param sequences: List of sequences.
+        :param dtype: Numpy type of the scores.
         """
         self.sequences = sequences
         self.shape = tuple(len(sequence) + 1 for sequence in sequences)
-        self.matrix = np.empty(self.shape, dtype=object)
+        self.dtype = np.dtype(dtype)
+        self.offsets = list(product((0, -1), repeat=len(sequences)))
+        self.offset_bits = {offset: 1 << bit for bit, offset in enumerate(self.offsets)}
+        self.other_tracebacks: Dict[Tuple[int, ...], List[Any]] = {}
+        self._decoded: Dict[int, List[Tuple[int, ...]]] = {}
+
+        self.scores = self.allocate("scores", self.dtype)
+        self.tracebacks = self.allocate("tracebacks", self.traceback_dtype(len(sequences)))
+
+    def allocate(self, name: str, dtype: np.dtype) -> np.ndarray:
+        """
+        Allocate a zeroed array with the shape of the matrix.
+        :param name: Name of the array.
+        :param dtype: Numpy type of the array.
+        :return: The array.
+        """
+        return np.zeros(self.shape, dtype=dtype)
+
+    @staticmethod
+    def traceback_dtype(sequence_count: int) -> np.dtype:
+        """
+        Get the smallest unsigned integer type with a bit for every relative offset, or the Python integer type if
+        there are more offsets than bits in the widest one.
+        :param sequence_count: Number of sequences.
+        :return: Numpy type of the tracebacks.
+        """
+        if sequence_count > 6:
+            return np.dtype(object)
+        return np.dtype(f"uint{max(8, 1 << sequence_count)}")
+
+    @classmethod
+    def bytes_per_entry(cls, sequence_count: int, dtype: type = np.int64) -> int:
+        """
+        Calculate the size of the score and traceback per matrix entry.
+        :param sequence_count: Number of sequences.
+        :param dtype: Numpy type of the scores.
+        :return: Size in bytes.
+        """
+        return np.dtype(dtype).itemsize + cls.traceback_dtype(sequence_count).itemsize
+
+    def encode_traceback(self, index: Tuple[int, ...], traceback: List[Tuple[int, ...]]) -> int:
+        """
+        Encode the indices of a traceback that are a relative offset away as bit flags.
+        :param index: Index of the matrix entry.
+        :param traceback: Indices the traceback points to.
+        :return: Bit flags of the traceback.
+        """
+        flags = 0
+        for traceback_index in traceback:
+            flags |= self.offset_bits[self.offset(index, traceback_index)]
+        return flags
 
-        np_from_py_wrapper = np.frompyfunc(ScoringMatrixEntry, 0, 1)
-        np_from_py_wrapper(self.matrix)
+    def decode_traceback(self, index: Tuple[int, ...], flags: int) -> List[Tuple[int, ...]]:
+        """
+        Decode the bit flags of a traceback into absolute indices.
+        :param index: Index of the matrix entry.
+        :param flags: Bit flags of the traceback.
+        :return: Indices the traceback points to.
+        """
+        if flags not in self._decoded:
+            self._decoded[flags] = [offset for offset in self.offsets if flags & self.offset_bits[offset]]
+        return [tuple(int(i) + j for i, j in zip(index, offset)) for offset in self._decoded[flags]]
 
-    def __getitem__(self, item: Union[int, Tuple[int, ...]]) -> ScoringMatrixEntry:
+    def offset(self, index: Tuple[int, ...], traceback_index: Any) -> Optional[Tuple[int, ...]]:
         """
-        Get an item from the matrix.
-        :param item: Index of the item.
-        :return: The item.
+        Get the relative offset of a traceback index.
+        :param index: Index of the matrix entry.
+        :param traceback_index: Index the traceback points to.
+        :return: The offset, or None if the traceback index is not one of the offsets away.
         """
-        return self.matrix[item]
+        if not isinstance(traceback_index, tuple) or len(traceback_index) != len(index):
+            return None
+        offset = tuple(int(i) - int(j) for i, j in zip(traceback_index, index))
+        return offset if offset in self.offset_bits else None
 
-    def __setitem__(self, key: Union[int, Tuple[int, ...]], value: ScoringMatrixEntry) -> None:
+    def __getitem__(self, item: Tuple[int, ...]) -> ScoringMatrixEntry:
         """
-        Set an item in the matrix.
-        :param key: Index of the item.
-        :param value: Value to set the item to.
+        Get a copy of an entry of the matrix.
+        :param item: Index of the entry.
+        :return: The entry.
+        """
+        return ScoringMatrixEntry(self.get_score(*item), self.get_traceback(*item))
+
+    def __setitem__(self, key: Tuple[int, ...], value: Union[int, float, list, tuple, ScoringMatrixEntry]) -> None:
+        """
+        Set an entry of the matrix, or only its score or traceback.
+        :param key: Index of the entry.
+        :param value: Score, traceback or entry to set.
         """
         if isinstance(value, (int, float)):
-            value = ScoringMatrixEntry(score=value, traceback=self.matrix[key].traceback)
+            self.set_score(*key, score=value)
         elif isinstance(value, (list, tuple)):
-            value = ScoringMatrixEntry(traceback=value, score=self.matrix[key].score)
-        elif not isinstance(value, ScoringMatrixEntry):
+            self.set_traceback(*key, traceback=list(value))
+        elif isinstance(value, ScoringMatrixEntry):
+            self.set_score(*key, score=value.score)
+            self.set_traceback(*key, traceback=value.traceback)
+        else:
             raise TypeError('Value must be an integer, float, list or ScoringMatrixEntry.')
-        self.matrix[key] = value
 
     def __iter__(self) -> Iterable:
         """
-        Iterate over the matrix.
-        :return: Iterator for the matrix.
+        Iterate over the scores of the matrix along its first axis.
+        :return: Iterator over the score planes.
         """
-        return iter(self.matrix)
+        return iter(self.scores)
 
     def __str__(self) -> str:
         """
-        Convert the matrix to a string.
-        :return: String representation of the matrix.
+        Convert the scores of the matrix to a string.
+        :return: String representation of the scores.
         """
-        return str(self.matrix)
+        return str(self.scores)
 
     def __repr__(self) -> str:
         """
-        Get the representation of the matrix.
-        :return: Representation of the matrix.
+        Get the representation of the scores of the matrix.
+        :return: Representation of the scores.
         """
-        return str(self.matrix)
+        return str(self.scores)
 
     def print(self):
         """
-        Print the matrix.
+        Print the scores of the matrix.
         """
-        print(self.matrix.round(0))
+        print(self.scores.round(0))
 
     def get_score(self, *args) -> Union[int, float]:
         """
@@ -300,15 +380,18 @@ class ScoringMatrix:
         :param args: Index of the matrix entry.
         :return: Score for the matrix entry.
         """
-        return self[args].score
+        return self.scores.item(args)
 
     def get_traceback(self, *args) -> List:
         """
         Get the traceback for a matrix entry.
         :param args: Index of the matrix entry.
-        :return: Traceback for the matrix entry.
+        :return: Traceback for the matrix entry, the offsets in their order followed by any other indices.
         """
-        return self[args].traceback
+        traceback = self.decode_traceback(args, int(self.tracebacks.item(args)))
+        if self.other_tracebacks:
+            traceback += self.other_tracebacks.get(tuple(int(i) for i in args), [])
+        return traceback
 
     def set_score(self, *args, score: Union[int, float]):
         """
@@ -316,7 +399,7 @@ class ScoringMatrix:
         :param args: Index of the matrix entry.
         :param score: Score for the matrix entry.
         """
-        self[args].score = score
+        self.scores[args] = score
 
     def set_traceback(self, *args, traceback: List):
         """
@@ -324,30 +407,41 @@ class ScoringMatrix:
         :param args: Index of the matrix entry.
         :param traceback: Traceback for the matrix entry.
         """
-        self[args].traceback = traceback
+        self.tracebacks[args] = 0
+        self.other_tracebacks.pop(tuple(int(i) for i in args), None)
+        for traceback_direction in traceback:
+            self.add_traceback(*args, traceback_direction=traceback_direction)
 
     def add_traceback(self, *args, traceback_direction: Tuple[int, ...]):
         """
         Add to the traceback for a matrix entry.
         :param args: Index of the matrix entry.
-        :param traceback_direction: Direction to add to the traceback, relative coordinates.
-        """
-        if traceback_direction not in self[args].traceback and traceback_direction is not None:
-            self[args].traceback.append(traceback_direction)
+        :param traceback_direction: Direction to add to the traceback, absolute coordinates.
+        """
+        if traceback_direction is None:
+            return
+        offset = self.offset(args, traceback_direction)
+        if offset is not None:
+            # Combined as Python integers, numpy cannot mix the highest bit of uint64 with them
+            self.tracebacks[args] = int(self.tracebacks.item(args)) | self.offset_bits[offset]
+            return
+        others = self.other_tracebacks.setdefault(tuple(int(i) for i in args), [])
+        if traceback_direction not in others:
+            others.append(traceback_direction)
 
     def get_max_index(self) -> Tuple[int, ...]:
         """
         Get the index of the maximum score in the matrix.
         :return: Index of the maximum score in the matrix.
         """
-        return np.unravel_index(np.argmax(self.matrix), self.shape)
+        return tuple(int(i) for i in np.unravel_index(np.argmax(self.scores), self.shape))
 
     def get_max_score(self) -> Union[int, float]:
         """
         Get the maximum score in the matrix.
         :return: Maximum score in the matrix.
         """
-        return np.max(self.matrix).score
+        return self.scores.max().item()
 
     def get_corner_index(self) -> Tuple[int, ...]:
         """
@@ -376,7 +470,7 @@ class ScoringMatrix:
         """
         Iterate over the indices of the scoring matrix that are part of zero planes.
         """
-        for index in np.ndindex(*self.matrix.shape):
+        for index in np.ndindex(*self.shape):
             if self.is_zero_index(*index):
                 yield index
 
@@ -384,7 +478,7 @@ class ScoringMatrix:
         """
         Iterate over the indices of the scoring matrix that are not part of zero planes.
         """
-        for index in np.ndindex(*self.matrix.shape):
+        for index in np.ndindex(*self.shape):
             if not self.is_zero_index(*index):
                 yield index
 
@@ -392,5 +486,5 @@ class ScoringMatrix:
         """
         Iterate over the indices of the scoring matrix.
         """
-        for index in np.ndindex(*self.matrix.shape):
+        for index in np.ndindex(*self.shape):
             yield index
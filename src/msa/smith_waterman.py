@@ -1,7 +1,7 @@
-import itertools
 from typing import List, Tuple, Union
 
 from msa.msa_solver import MSASolver
+from msa.scoring_matrix.memmap_scoring_matrix import MemmapScoringMatrix
 from msa.scoring_matrix.scoring_matrix import ScoringMatrix
 
 
@@ -15,9 +15,14 @@ class SmithWatermanMSASolver(MSASolver):
         """
         Initialise the scoring matrix.
         :param sequences: List of sequences to align.
-        :return: Initialised scoring matrix.
+        :return: Initialised scoring matrix, memory-mapped to files if it is larger than the memmap threshold.
         """
-        return ScoringMatrix(sequences)
+        # The substitution table only has its final type once every character was encoded
+        for sequence in sequences:
+            self.encode(sequence)
+        if self.use_memmap(sequences):
+            return MemmapScoringMatrix(sequences, self.score_dtype, self.scratch_dir)
+        return ScoringMatrix(sequences, self.score_dtype)
 
     def update_matrix_position(self, *args) -> None:
         """
@@ -27,10 +32,8 @@ class SmithWatermanMSASolver(MSASolver):
         possible_scores = []
         possible_tracebacks = []
 
-        indices_offset = list(itertools.product((0, -1), repeat=len(args)))
-        indices_offset.remove(tuple([0] * len(args)))
-
-        indices_to_check = [tuple([sum(x) for x in zip(args, offset)]) for offset in indices_offset]
+        # Every move in the order of itertools.product((0, -1)), see encode_sequences
+        indices_to_check = [tuple([i + o for i, o in zip(args, offset)]) for offset in self.move_scores]
 
         for indices in indices_to_check:
             possible_scores.append(self.scoring_function(*args, comparison_indices=indices))
@@ -0,0 +1,103 @@
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from msa.scoring_matrix.scoring_matrix import ScoringMatrix
+
+
+def fill_hyperplanes(matrix: ScoringMatrix, pair_scores: Dict[Tuple[int, int], np.ndarray],
+                     move_scores: Dict[Tuple[int, ...], Tuple[Union[int, float], List[Tuple[int, int]]]],
+                     indel: Union[int, float], local: bool) -> None:
+    """
+    Fill an initialised scoring matrix one hyperplane of equal index sums at a time.
+
+    An entry only depends on entries whose indices sum to less, so all entries of a hyperplane are calculated together
+    with array gathers, one batch per relative offset, instead of one Python call per entry and offset. Scores and
+    tracebacks are the same as those of SmithWatermanMSASolver.update_matrix_position, including the order in which the
+    sum-of-pairs terms are added.
+    :param matrix: Initialised scoring matrix to fill, with zero scores and empty tracebacks.
+    :param pair_scores: Substitution scores of every pair of sequences, indexed by their positions.
+    :param move_scores: Constant score and pairs of sequences advanced together of every nonzero relative offset, see
+    MSASolver.encode_sequences.
+    :param indel: Score of a pair of a character and a gap.
+    :param local: Whether to calculate a local (Smith-Waterman) or global (Needleman-Wunsch) alignment.
+    """
+    shape = matrix.shape
+    count = len(shape)
+    if not local:
+        initialise_zero_planes(matrix, indel)
+    if any(length == 1 for length in shape):
+        return
+
+    scores = matrix.scores.reshape(-1)
+    tracebacks = matrix.tracebacks.reshape(-1)
+    strides = [int(np.prod(shape[k + 1:], dtype=np.int64)) for k in range(count)]
+
+    # Every offset except the zero offset, with the flat distance to its entry and its traceback bit
+    moves = [(sum(o * stride for o, stride in zip(offset, strides)),
+              np.array(matrix.offset_bits[offset], dtype=tracebacks.dtype), constant, advanced_pairs)
+             for offset, (constant, advanced_pairs) in move_scores.items()]
+
+    # Entries outside the zero planes are found from a grid of all but the last index, sorted by the sum of its indices,
+    # so the last index of the entries of a hyperplane follows from the sum
+    prefix_shape = tuple(length - 1 for length in shape[:-1])
+    prefix = np.indices(prefix_shape).reshape(count - 1, int(np.prod(prefix_shape, dtype=np.int64))) + 1
+    prefix_sums = prefix.sum(axis=0)
+    order = np.argsort(prefix_sums, kind='stable')
+    prefix, prefix_sums = prefix[:, order], prefix_sums[order]
+    prefix_cells = np.dot(strides[:-1], prefix) if count > 1 else np.zeros(1, dtype=np.int64)
+
+    for index_sum in range(count, sum(shape) - count + 1):
+        first = np.searchsorted(prefix_sums, index_sum - (shape[-1] - 1), 'left')
+        last = np.searchsorted(prefix_sums, index_sum - 1, 'right')
+        if first == last:
+            continue
+        indices = [prefix[k, first:last] for k in range(count - 1)] + [index_sum - prefix_sums[first:last]]
+        cells = prefix_cells[first:last] + indices[-1]
+        substitutions = {(p, q): scores_of_pair[indices[p] - 1, indices[q] - 1]
+                         for (p, q), scores_of_pair in pair_scores.items()}
+
+        candidates = []
+        for distance, _, score, advanced_pairs in moves:
+            for pair in advanced_pairs:
+                score = score + substitutions[pair]
+            candidates.append(scores[cells + distance] + score)
+
+        best = candidates[0].copy()
+        for candidate in candidates[1:]:
+            np.maximum(best, candidate, out=best)
+        if local:
+            np.maximum(best, 0, out=best)
+
+        # Tie-aware traceback, every offset that reaches the best score gets its bit
+        flags = np.zeros(len(cells), dtype=tracebacks.dtype)
+        for (_, bit, _, _), candidate in zip(moves, candidates):
+            flags[candidate == best] |= bit
+        scores[cells] = best
+        tracebacks[cells] = flags
+
+
+def initialise_zero_planes(matrix: ScoringMatrix, indel: Union[int, float]) -> None:
+    """
+    Initialise the zero planes of a global alignment scoring matrix the way NeedlemanWunschMSASolver does: the indel
+    score times the sum of the indices, with a traceback to the entry one closer to the origin in every sequence.
+    :param matrix: Initialised scoring matrix.
+    :param indel: Score of a pair of a character and a gap.
+    """
+    count = len(matrix.shape)
+    object_flags = matrix.tracebacks.dtype == object
+    for k in range(count):
+        plane = (slice(None),) * k + (0,)
+        indices = np.ogrid[tuple(slice(0, length) for length in matrix.shape[:k] + matrix.shape[k + 1:])]
+        dimensions = [j for j in range(count) if j != k]
+        matrix.scores[plane] = indel * sum(indices, np.zeros((), dtype=np.int64))
+
+        # The bit of an offset is its position in itertools.product((0, -1), repeat=count)
+        bit_indices = sum(((index > 0).astype(np.int64) << (count - 1 - j) for j, index in zip(dimensions, indices)),
+                          np.zeros((), dtype=np.int64))
+        if object_flags:
+            matrix.tracebacks[plane] = np.left_shift(np.ones_like(bit_indices, dtype=object),
+                                                     bit_indices.astype(object))
+        else:
+            matrix.tracebacks[plane] = np.left_shift(np.ones((), dtype=matrix.tracebacks.dtype),
+                                                     bit_indices.astype(matrix.tracebacks.dtype))
@@ -0,0 +1,122 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait, Future
+from typing import Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from psa.psa_solver import PSASolver
+
+# Solver and sequences of a worker process, set once by the pool initialiser so they are not sent with every task
+_worker_solver: Optional[PSASolver] = None
+_worker_sequences: Optional[List[str]] = None
+
+
+def align_all_pairs(solver: PSASolver, sequences: Sequence[str], distance: bool = False,
+                    workers: Optional[int] = None, chunk_size: int = 64) -> np.ndarray:
+    """
+    Calculate the score of every pair of sequences, and store them in a symmetric matrix.
+
+    Every unordered pair is scored once, including every sequence against itself. Pairs are handed to a process pool
+    in tasks of up to chunk_size pairs sharing their first sequence, longest pairs first, so the slowest tasks do not
+    start last. Only a few tasks are in flight per worker, and their scores are written into the matrix as they
+    complete.
+
+    Distances are calculated from the scores as d(i, j) = (s(i, i) + s(j, j)) / 2 - s(i, j), which is zero for a
+    sequence and itself.
+    :param solver: Solver with a score method, e.g. a NeedlemanWunschPSASolver.
+    :param sequences: Sequences to align, in the order of the rows and columns of the matrix.
+    :param distance: Whether to return distances instead of scores.
+    :param workers: Number of worker processes, all cores if None. A single worker scores in this process.
+    :param chunk_size: Maximum number of pairs per task.
+    :return: Score (or distance) matrix of shape (len(sequences), len(sequences)).
+    """
+    sequences = list(sequences)
+    matrix = np.zeros((len(sequences), len(sequences)), dtype=np.float64)
+    workers = workers or os.cpu_count() or 1
+
+    # Sequence indices from longest to shortest, pairs are only formed with sequences later in this order
+    order = np.argsort([-len(sequence) for sequence in sequences], kind='stable')
+    sorted_sequences = [sequences[index] for index in order]
+    tasks = _tasks([len(sequence) for sequence in sorted_sequences], chunk_size)
+
+    if workers == 1:
+        _init_worker(solver, sorted_sequences)
+        for task in tasks:
+            _store_scores(matrix, order, *_score_task(*task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(solver, sorted_sequences)) as executor:
+            pending: Set[Future] = set()
+            for task in tasks:
+                pending.add(executor.submit(_score_task, *task))
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _store_scores(matrix, order, *future.result())
+            for future in pending:
+                _store_scores(matrix, order, *future.result())
+
+    if distance:
+        self_scores = np.diag(matrix)
+        matrix = (self_scores[:, None] + self_scores[None, :]) / 2 - matrix
+    return matrix
+
+
+def _tasks(lengths: List[int], chunk_size: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    Split the pairs of sequences into tasks, longest first.
+
+    With the sequences sorted from longest to shortest, row a holds the pairs (a, b) with b >= a, which get shorter
+    along the row. Each row is cut into tasks of chunk_size pairs, and the rows are merged with a heap on the product of
+    the lengths of the first pair of their next task.
+    :param lengths: Sequence lengths, from longest to shortest.
+    :param chunk_size: Maximum number of pairs per task.
+    :return: Iterator over (row, first column, end column) tuples, in sorted positions.
+    """
+    heap = [(-lengths[row] * lengths[row], row, row) for row in range(len(lengths))]
+    heapq.heapify(heap)
+    while heap:
+        _, row, column = heapq.heappop(heap)
+        end = min(column + chunk_size, len(lengths))
+        yield row, column, end
+        if end < len(lengths):
+            heapq.heappush(heap, (-lengths[row] * lengths[end], row, end))
+
+
+def _init_worker(solver: PSASolver, sequences: List[str]) -> None:
+    """
+    Set the solver and sequences of a worker process.
+    :param solver: Solver with a score method.
+    :param sequences: Sequences to align, from longest to shortest.
+    """
+    global _worker_solver, _worker_sequences
+    _worker_solver, _worker_sequences = solver, sequences
+
+
+def _score_task(row: int, column: int, end: int) -> Tuple[int, int, np.ndarray]:
+    """
+    Score the pairs of a task.
+    :param row: Sorted position of the first sequence of every pair.
+    :param column: Sorted position of the second sequence of the first pair.
+    :param end: Sorted position after the second sequence of the last pair.
+    :return: The row, the first column and the scores of the pairs.
+    """
+    sequence = _worker_sequences[row]
+    scores = np.array([_worker_solver.score(sequence, _worker_sequences[other])[0]
+                       for other in range(column, end)], dtype=np.float64)
+    return row, column, scores
+
+
+def _store_scores(matrix: np.ndarray, order: np.ndarray, row: int, column: int, scores: np.ndarray) -> None:
+    """
+    Store the scores of a task on both sides of the diagonal of the matrix.
+    :param matrix: Score matrix, in the original sequence order.
+    :param order: Sequence indices from longest to shortest.
+    :param row: Sorted position of the first sequence of every pair.
+    :param column: Sorted position of the second sequence of the first pair.
+    :param scores: Scores of the pairs.
+    """
+    others = order[column:column + len(scores)]
+    matrix[order[row], others] = scores
+    matrix[others, order[row]] = scores
@@ -0,0 +1,112 @@
+from typing import Union, Optional
+
+import numpy as np
+
+from psa.enums import Direction
+from psa.linear_space import horizontal_gap_scores
+from psa.scoring_matrix.banded_scoring_matrix import BandedScoringMatrix
+from psa.scoring_matrix.scoring_matrix import DIRECTION_BITS
+
+
+def fill_banded(matrix: BandedScoringMatrix, substitution_table: np.ndarray, top_codes: np.ndarray,
+                bottom_codes: np.ndarray, gap_open: Union[int, float], gap_extend: Union[int, float],
+                local: bool = False) -> None:
+    """
+    Fill the band of an initialised global (Needleman-Wunsch) or local (Smith-Waterman) scoring matrix one row at a
+    time.
+
+    In band coordinates the diagonal predecessor of an entry is at the same position in the previous row, and the
+    entry above it one position further. Horizontal gaps are resolved with a running maximum when opening a gap is at
+    least as expensive as extending one, and entry by entry otherwise.
+    :param matrix: Initialised banded scoring matrix to fill.
+    :param substitution_table: Dense substitution table.
+    :param top_codes: Encoded top sequence.
+    :param bottom_codes: Encoded bottom sequence.
+    :param gap_open: Penalty for the first position of a gap.
+    :param gap_extend: Penalty for every further position of a gap.
+    :param local: Whether to fill a local alignment matrix, where no score drops below zero and the edges stay zero.
+    """
+    scores = matrix.scores
+    up_scores = matrix.gap_scores[Direction.UP]
+    left_scores = matrix.gap_scores[Direction.LEFT]
+    tracebacks = matrix.tracebacks
+    minus_infinity = matrix.minus_infinity
+
+    # Edges, these only depend on the entry before them
+    for y in range(1, 0 if local else matrix.column_range(0)[1] + 1):
+        matrix.set_score(0, y, matrix.get_score(0, y - 1) + (gap_open if y == 1 else gap_extend))
+        matrix.set_gap_score(0, y, Direction.LEFT, max(matrix.get_score(0, y - 1) + gap_open,
+                                                       matrix.get_gap_score(0, y - 1, Direction.LEFT) + gap_extend))
+
+    for x in range(1, matrix.height()):
+        start, end = matrix.column_range(x)
+        if start == 0 and not local:
+            matrix.set_score(x, 0, matrix.get_score(x - 1, 0) + (gap_open if x == 1 else gap_extend))
+            matrix.set_gap_score(x, 0, Direction.UP, max(matrix.get_score(x - 1, 0) + gap_open,
+                                                         matrix.get_gap_score(x - 1, 0, Direction.UP) + gap_extend))
+        start = max(start, 1)
+        if start > end:
+            continue
+
+        columns = np.arange(start, end + 1)
+        first, last = matrix.band_index(x, start), matrix.band_index(x, end) + 1
+
+        diagonal_scores = scores[x - 1, first:last] + substitution_table[bottom_codes[x - 1], top_codes[columns - 1]]
+        up = np.maximum(scores[x - 1, first + 1:last + 1] + gap_open, up_scores[x - 1, first + 1:last + 1] + gap_extend)
+        best = np.maximum(diagonal_scores, up)
+
+        # A horizontal gap either continues from the entry left of the row segment, or opens after an entry in it
+        previous_score = scores[x, first - 1] if first > 0 else minus_infinity
+        previous_left = left_scores[x, first - 1] if first > 0 else minus_infinity
+        first_left = max(previous_score + gap_open, previous_left + gap_extend)
+        left = horizontal_gap_scores(best, first_left, gap_open, gap_extend)
+
+        row_scores = np.maximum(best, left)
+        if local:
+            np.maximum(row_scores, 0, out=row_scores)
+        scores[x, first:last] = row_scores
+        up_scores[x, first:last] = up
+        left_scores[x, first:last] = left
+        tracebacks[x, first:last] = (np.where(row_scores == diagonal_scores, DIRECTION_BITS[Direction.DIAGONAL], 0) |
+                                     np.where(row_scores == up, DIRECTION_BITS[Direction.UP], 0) |
+                                     np.where(row_scores == left, DIRECTION_BITS[Direction.LEFT], 0))
+
+
+def out_of_band_bound(matrix: BandedScoringMatrix, substitution_table: np.ndarray, top_codes: np.ndarray,
+                      bottom_codes: np.ndarray, gap_open: Union[int, float],
+                      gap_extend: Union[int, float]) -> Optional[Union[int, float]]:
+    """
+    Calculate an upper bound for the score of any global alignment that leaves the band.
+
+    To reach a diagonal outside of the band and still end in the bottom right corner, a path needs at least
+    |len(top) - len(bottom)| + 2 * (band + 1) gap positions, spread over at least one vertical and one horizontal gap.
+    The remaining positions are at best aligned to the characters that score highest against the other sequence.
+    :param matrix: Banded scoring matrix.
+    :param substitution_table: Dense substitution table.
+    :param top_codes: Encoded top sequence.
+    :param bottom_codes: Encoded bottom sequence.
+    :param gap_open: Penalty for the first position of a gap.
+    :param gap_extend: Penalty for every further position of a gap.
+    :return: The upper bound, infinity if gaps do not cost anything, or None if no path can leave the band.
+    """
+    gaps = abs(len(top_codes) - len(bottom_codes)) + 2 * (matrix.band + 1)
+    if matrix.covers_matrix() or gaps > len(top_codes) + len(bottom_codes):
+        return None
+    if gap_open > 0 or gap_extend > 0:
+        return np.inf
+
+    pairs = (len(top_codes) + len(bottom_codes) - gaps) // 2
+    if gap_open <= gap_extend:
+        gap_bound = 2 * gap_open + (gaps - 2) * gap_extend
+    else:
+        gap_bound = gaps * gap_open
+
+    # Every aligned pair scores at most the best substitution of its characters against the other sequence
+    pair_bounds = []
+    for codes, other_codes, table in ((bottom_codes, top_codes, substitution_table),
+                                      (top_codes, bottom_codes, substitution_table.T)):
+        best_substitutions = np.max(table[:, np.unique(other_codes)], axis=1)[codes]
+        best_substitutions = np.sort(np.maximum(best_substitutions, 0))[::-1]
+        pair_bounds.append(np.sum(best_substitutions[:pairs]).item())
+
+    return min(pair_bounds) + gap_bound
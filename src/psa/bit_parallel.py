@@ -0,0 +1,115 @@
+from typing import Dict, List, Tuple
+
+# int.bit_count is only available from Python 3.10
+_popcount = getattr(int, 'bit_count', lambda value: bin(value).count('1'))
+
+
+def _match_masks(pattern: str) -> Dict[str, int]:
+    """
+    Build the match mask of every character of a pattern, bit i is set where the pattern holds the character.
+    :param pattern: Pattern sequence.
+    :return: Dictionary of character to bit mask.
+    """
+    masks = {}
+    for position, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def _columns(pattern: str, text: str, keep_columns: bool) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Run Myers' bit-vector algorithm (in Hyyrö's formulation for global edit distance) over a text.
+
+    Each column of the edit distance matrix, with the pattern along the rows, is represented by two bit vectors: bit i
+    of the positive (negative) vector is set where the entry in row i + 1 is one more (less) than the entry above it.
+    A whole column is calculated from the previous one with a constant number of operations on Python integers, which
+    work on all bits of the pattern at once.
+    :param pattern: Pattern sequence, along the rows.
+    :param text: Text sequence, along the columns.
+    :param keep_columns: Whether to keep the bit vectors of every column, for a traceback.
+    :return: The edit distance and the (positive, negative) bit vectors of every column if kept.
+    """
+    mask = (1 << len(pattern)) - 1
+    high_bit = 1 << (len(pattern) - 1) if pattern else 0
+    match_masks = _match_masks(pattern)
+
+    positive, negative = mask, 0
+    distance = len(pattern)
+    columns = [(positive, negative)] if keep_columns else []
+    for char in text:
+        matches = match_masks.get(char, 0)
+        vertical = matches | negative
+        horizontal = (((matches & positive) + positive) ^ positive) | matches
+        horizontal_positive = negative | (~(horizontal | positive) & mask)
+        horizontal_negative = positive & horizontal
+
+        if horizontal_positive & high_bit:
+            distance += 1
+        elif horizontal_negative & high_bit:
+            distance -= 1
+
+        # The top row of a global alignment grows by one in every column
+        horizontal_positive = ((horizontal_positive << 1) | 1) & mask
+        horizontal_negative = (horizontal_negative << 1) & mask
+        positive = horizontal_negative | (~(vertical | horizontal_positive) & mask)
+        negative = horizontal_positive & vertical
+
+        if keep_columns:
+            columns.append((positive, negative))
+
+    return distance if pattern else len(text), columns
+
+
+def edit_distance(sequence_1: str, sequence_2: str) -> int:
+    """
+    Calculate the edit (Levenshtein) distance between two sequences with bit-parallel dynamic programming.
+    :param sequence_1: The first sequence.
+    :param sequence_2: The second sequence.
+    :return: The edit distance.
+    """
+    # The bit vectors run along the pattern, so the shorter sequence keeps them small
+    if len(sequence_1) > len(sequence_2):
+        sequence_1, sequence_2 = sequence_2, sequence_1
+    distance, _ = _columns(sequence_1, sequence_2, keep_columns=False)
+    return distance
+
+
+def edit_alignment(sequence_1: str, sequence_2: str) -> Tuple[int, Tuple[str, str]]:
+    """
+    Calculate the edit distance between two sequences and an alignment with that many edits.
+
+    The bit vectors of every column are kept, which takes len(sequence_1) * len(sequence_2) bits, and the distance of
+    an entry is recovered from them by counting bits. The traceback prefers substitutions (and matches) over a gap in
+    the second sequence over a gap in the first.
+    :param sequence_1: The first sequence, along the rows.
+    :param sequence_2: The second sequence, along the columns.
+    :return: The edit distance and the aligned first and second sequence.
+    """
+    distance, columns = _columns(sequence_1, sequence_2, keep_columns=True)
+
+    def entry(row: int, column: int) -> int:
+        positive, negative = columns[column]
+        below = (1 << row) - 1
+        return column + _popcount(positive & below) - _popcount(negative & below)
+
+    aligned_1, aligned_2 = [], []
+    row, column = len(sequence_1), len(sequence_2)
+    current = distance
+    while row > 0 or column > 0:
+        if row > 0 and column > 0:
+            diagonal = entry(row - 1, column - 1)
+            if diagonal + (sequence_1[row - 1] != sequence_2[column - 1]) == current:
+                aligned_1.append(sequence_1[row - 1])
+                aligned_2.append(sequence_2[column - 1])
+                row, column, current = row - 1, column - 1, diagonal
+                continue
+        if row > 0 and (column == 0 or entry(row - 1, column) + 1 == current):
+            aligned_1.append(sequence_1[row - 1])
+            aligned_2.append('-')
+            row, current = row - 1, current - 1
+        else:
+            aligned_1.append('-')
+            aligned_2.append(sequence_2[column - 1])
+            column, current = column - 1, current - 1
+
+    return distance, (''.join(reversed(aligned_1)), ''.join(reversed(aligned_2)))
@@ -11,3 +11,15 @@ class Direction(Enum):
     D = DIAGONAL
     U = UP
     L = LEFT
+
+
+class Engine(Enum):
+    """
+    Enum for the engines that can fill a pairwise scoring matrix.
+    """
+    PYTHON = "python"
+    WAVEFRONT = "wavefront"
+    HIRSCHBERG = "hirschberg"
+    BANDED = "banded"
+    MYERS = "myers"
+    WFA = "wfa"
@@ -0,0 +1,230 @@
+from typing import Union, Tuple, List, Iterator, Optional
+
+import numpy as np
+
+
+def horizontal_gap_scores(best: np.ndarray, first_left: Union[int, float], gap_open: Union[int, float],
+                          gap_extend: Union[int, float], offsets: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Calculate the scores of the paths ending in a horizontal gap along a row segment.
+
+    The gap into an entry either continues the gap into the entry before it, or opens after the best path ending there.
+    When opening a gap is at least as expensive as extending one, this is a running maximum over the row, otherwise the
+    entries are resolved one by one.
+    :param best: Best scores of the row segment for paths that do not end in a horizontal gap.
+    :param first_left: Score of the first entry of the segment for paths ending in a horizontal gap.
+    :param gap_open: Penalty for the first position of a gap.
+    :param gap_extend: Penalty for every further position of a gap.
+    :param offsets: Gap extend penalty times the index of every entry, calculated if None.
+    :return: Scores of the row segment for paths ending in a horizontal gap.
+    """
+    left = np.empty_like(best)
+    left[0] = first_left
+    if gap_open <= gap_extend:
+        if offsets is None:
+            offsets = np.arange(len(best)) * gap_extend
+        candidates = np.concatenate(([first_left], best[:-1] + gap_open)) - offsets[:len(best)]
+        return np.maximum.accumulate(candidates) + offsets[:len(best)]
+    for index in range(1, len(best)):
+        left[index] = max(max(best[index - 1], left[index - 1]) + gap_open, left[index - 1] + gap_extend)
+    return left
+
+
+def iter_rows(row_codes: np.ndarray, column_codes: np.ndarray, substitution_table: np.ndarray,
+              gap_open: Union[int, float], gap_extend: Union[int, float], start_gap_open: Union[int, float],
+              dtype: type, local: bool = False) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Iterate over the rows of a scoring matrix with affine gaps, keeping only one row at a time.
+
+    Every row is calculated with array operations. Horizontal gaps within a row are resolved with a running maximum,
+    which requires opening a gap to be at least as expensive as extending one.
+    :param row_codes: Encoded sequence along the rows.
+    :param column_codes: Encoded sequence along the columns.
+    :param substitution_table: Dense substitution table, indexed [row character, column character].
+    :param gap_open: Penalty for the first position of a gap.
+    :param gap_extend: Penalty for every further position of a gap.
+    :param start_gap_open: Penalty for the first position of a vertical gap starting in the top left corner, which
+    differs from gap_open when it continues a gap outside of the matrix. Unused for local alignments.
+    :param dtype: Numpy score type.
+    :param local: Whether to calculate a local (Smith-Waterman) or global (Needleman-Wunsch) scoring matrix.
+    :return: Iterator over the scores of every row, and the scores of every row for paths ending in a vertical gap,
+    starting with the first row.
+    """
+    if gap_open > gap_extend:
+        raise ValueError("Row by row alignment requires gap open to be at least as expensive as gap extend")
+
+    minus_infinity = -np.inf if np.issubdtype(dtype, np.floating) else np.iinfo(dtype).min // 4
+    columns = np.arange(len(column_codes) + 1)
+
+    if local:
+        scores = np.zeros(len(column_codes) + 1, dtype=dtype)
+    else:
+        scores = np.where(columns == 0, 0, gap_open + (columns - 1) * gap_extend).astype(dtype)
+    up_scores = np.full(len(column_codes) + 1, minus_infinity, dtype=dtype)
+    extend_offsets = (columns * gap_extend).astype(dtype)
+    yield scores, up_scores
+
+    for x, code in enumerate(row_codes, start=1):
+        up_scores = np.maximum(scores + gap_open, up_scores + gap_extend)
+        if not local:
+            up_scores[0] = start_gap_open + (x - 1) * gap_extend
+
+        best = up_scores.copy()
+        np.maximum(best[1:], scores[:-1] + substitution_table[code, column_codes], out=best[1:])
+        if local:
+            np.maximum(best, 0, out=best)
+            best[0] = 0
+
+        left_scores = horizontal_gap_scores(best, minus_infinity, gap_open, gap_extend, extend_offsets)
+        scores = np.maximum(best, left_scores)
+        yield scores, up_scores
+
+
+def last_row(row_codes: np.ndarray, column_codes: np.ndarray, substitution_table: np.ndarray,
+             gap_open: Union[int, float], gap_extend: Union[int, float], start_gap_open: Union[int, float],
+             dtype: type) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate the last row of a global (Needleman-Wunsch) scoring matrix with affine gaps, keeping only one row at a
+    time.
+    :param row_codes: Encoded sequence along the rows.
+    :param column_codes: Encoded sequence along the columns.
+    :param substitution_table: Dense substitution table, indexed [row character, column character].
+    :param gap_open: Penalty for the first position of a gap.
+    :param gap_extend: Penalty for every further position of a gap.
+    :param start_gap_open: Penalty for the first position of a vertical gap starting in the top left corner.
+    :param dtype: Numpy score type.
+    :return: The scores of the last row, and the scores of the last row for paths ending in a vertical gap.
+    """
+    for scores, up_scores in iter_rows(row_codes, column_codes, substitution_table, gap_open, gap_extend,
+                                       start_gap_open, dtype):
+        pass
+    return scores, up_scores
+
+
+def best_local_score(row_codes: np.ndarray, column_codes: np.ndarray, substitution_table: np.ndarray,
+                     gap_open: Union[int, float], gap_extend: Union[int, float],
+                     dtype: type) -> Tuple[Union[int, float], Tuple[int, int]]:
+    """
+    Calculate the best score of a local (Smith-Waterman) scoring matrix with affine gaps, keeping only one row at a
+    time.
+    :param row_codes: Encoded sequence along the rows.
+    :param column_codes: Encoded sequence along the columns.
+    :param substitution_table: Dense substitution table, indexed [row character, column character].
+    :param gap_open: Penalty for the first position of a gap.
+    :param gap_extend: Penalty for every further position of a gap.
+    :param dtype: Numpy score type.
+    :return: The best score, and the first entry (in row-major order) with that score.
+    """
+    best_score, best_index = 0, (0, 0)
+    for x, (scores, _) in enumerate(iter_rows(row_codes, column_codes, substitution_table, gap_open, gap_extend,
+                                              gap_open, dtype, local=True)):
+        y = int(np.argmax(scores))
+        if scores[y] > best_score:
+            best_score, best_index = scores[y].item(), (x, y)
+    return best_score, best_index
+
+
+def hirschberg(row_codes: np.ndarray, column_codes: np.ndarray, substitution_table: np.ndarray,
+               gap_open: Union[int, float], gap_extend: Union[int, float], dtype: type) -> List[Tuple[int, int]]:
+    """
+    Find an optimal global alignment in linear space with Hirschberg's divide and conquer, using the Myers-Miller
+    extension for affine gaps.
+
+    The rows are split in half, and the column where an optimal path crosses the middle is found by combining the last
+    row of the top half with the last row of the reversed bottom half. Either the path crosses through an entry, or in
+    the middle of a vertical gap, which is then only opened once. Both halves are then solved recursively.
+    :param row_codes: Encoded sequence along the rows.
+    :param column_codes: Encoded sequence along the columns.
+    :param substitution_table: Dense substitution table, indexed [row character, column character].
+    :param gap_open: Penalty for the first position of a gap.
+    :param gap_extend: Penalty for every further position of a gap.
+    :param dtype: Numpy score type.
+    :return: The alignment as a list of (row index, column index) pairs, with -1 for a gap.
+    """
+    if gap_open > gap_extend:
+        raise ValueError("Linear space alignment requires gap open to be at least as expensive as gap extend")
+
+    alignment = []
+    _hirschberg(row_codes, column_codes, 0, len(row_codes), 0, len(column_codes), gap_open, gap_open,
+                substitution_table, gap_open, gap_extend, dtype, alignment)
+    return alignment
+
+
+def _hirschberg(row_codes: np.ndarray, column_codes: np.ndarray, row_start: int, row_end: int, column_start: int,
+                column_end: int, start_gap_open: Union[int, float], end_gap_open: Union[int, float],
+                substitution_table: np.ndarray, gap_open: Union[int, float], gap_extend: Union[int, float],
+                dtype: type, alignment: List[Tuple[int, int]]) -> None:
+    """
+    Recursively align a block of the scoring matrix, appending its columns to the alignment.
+    :param start_gap_open: Penalty for the first position of a vertical gap at the start of the block.
+    :param end_gap_open: Penalty for the first position of a vertical gap at the end of the block.
+    """
+    rows, columns = row_end - row_start, column_end - column_start
+
+    if columns == 0:
+        alignment += [(x, -1) for x in range(row_start, row_end)]
+        return
+    if rows == 0:
+        alignment += [(-1, y) for y in range(column_start, column_end)]
+        return
+    if rows == 1:
+        _align_single_row(row_codes[row_start], row_start, column_codes, column_start, column_end, start_gap_open,
+                          end_gap_open, substitution_table, gap_open, gap_extend, alignment)
+        return
+
+    middle = row_start + rows // 2
+    top_scores, top_up_scores = last_row(row_codes[row_start:middle], column_codes[column_start:column_end],
+                                         substitution_table, gap_open, gap_extend, start_gap_open, dtype)
+    bottom_scores, bottom_up_scores = last_row(row_codes[middle:row_end][::-1],
+                                               column_codes[column_start:column_end][::-1], substitution_table,
+                                               gap_open, gap_extend, end_gap_open, dtype)
+
+    through_entry = top_scores + bottom_scores[::-1]
+    through_gap = top_up_scores + bottom_up_scores[::-1] - (gap_open - gap_extend)
+
+    if through_entry.max() >= through_gap.max():
+        split = column_start + int(np.argmax(through_entry))
+        _hirschberg(row_codes, column_codes, row_start, middle, column_start, split, start_gap_open, gap_open,
+                    substitution_table, gap_open, gap_extend, dtype, alignment)
+        _hirschberg(row_codes, column_codes, middle, row_end, split, column_end, gap_open, end_gap_open,
+                    substitution_table, gap_open, gap_extend, dtype, alignment)
+    else:
+        # The vertical gap through the middle continues into both halves, so neither half opens it again
+        split = column_start + int(np.argmax(through_gap))
+        _hirschberg(row_codes, column_codes, row_start, middle - 1, column_start, split, start_gap_open, gap_extend,
+                    substitution_table, gap_open, gap_extend, dtype, alignment)
+        alignment += [(middle - 1, -1), (middle, -1)]
+        _hirschberg(row_codes, column_codes, middle + 1, row_end, split, column_end, gap_extend, end_gap_open,
+                    substitution_table, gap_open, gap_extend, dtype, alignment)
+
+
+def _align_single_row(row_code: int, row: int, column_codes: np.ndarray, column_start: int, column_end: int,
+                      start_gap_open: Union[int, float], end_gap_open: Union[int, float],
+                      substitution_table: np.ndarray, gap_open: Union[int, float], gap_extend: Union[int, float],
+                      alignment: List[Tuple[int, int]]) -> None:
+    """
+    Align a single row character against a range of columns, appending the columns to the alignment.
+    """
+    columns = column_end - column_start
+
+    def gap(length: int) -> Union[int, float]:
+        return gap_open + (length - 1) * gap_extend if length > 0 else 0
+
+    # Either the row character is aligned to one of the columns, with horizontal gaps around it
+    substitutions = substitution_table[row_code, column_codes[column_start:column_end]]
+    match_scores = [gap(y) + substitutions[y] + gap(columns - y - 1) for y in range(columns)]
+    best_match = int(np.argmax(match_scores))
+
+    # Or it is a vertical gap, next to whichever end can continue a gap the cheapest
+    gap_score = max(start_gap_open, end_gap_open) + gap(columns)
+
+    if match_scores[best_match] >= gap_score:
+        alignment += [(-1, y) for y in range(column_start, column_start + best_match)]
+        alignment.append((row, column_start + best_match))
+        alignment += [(-1, y) for y in range(column_start + best_match + 1, column_end)]
+    elif start_gap_open >= end_gap_open:
+        alignment.append((row, -1))
+        alignment += [(-1, y) for y in range(column_start, column_end)]
+    else:
+        alignment += [(-1, y) for y in range(column_start, column_end)]
+        alignment.append((row, -1))
@@ -1,21 +1,91 @@
-from typing import Union, Optional, Callable
+from itertools import islice
+from typing import Union, Optional, Callable, Tuple, List, Iterator
 
+import numpy as np
+
+from psa.banded import fill_banded, out_of_band_bound
+from psa.bit_parallel import edit_alignment, edit_distance
+from psa.enums import Direction, Engine
+from psa.linear_space import hirschberg
+from psa.scoring_matrix.banded_scoring_matrix import BandedScoringMatrix
+from psa.scoring_matrix.memmap_scoring_matrix import MemmapScoringMatrix
+from psa.scoring_matrix.numpy_scoring_matrix import NumpyScoringMatrix
 from psa.scoring_matrix.scoring_matrix import ScoringMatrix
 from psa.smith_waterman import SmithWatermanPSASolver
+from psa.wfa import wfa_align
 
 
 class NeedlemanWunschPSASolver(SmithWatermanPSASolver):
     """
     Needleman-Wunsch solver for the PSA problem.
     """
+    add_zero_score = False
+    supported_engines = (Engine.PYTHON, Engine.WAVEFRONT, Engine.HIRSCHBERG, Engine.BANDED, Engine.MYERS,
+                         Engine.WFA)
 
-    def __init__(self, config: dict, substitution_matrix: Optional[dict] = None, *args, **kwargs):
+    def __init__(self, config: dict, substitution_matrix: Optional[dict] = None, *args, band: int = 16, **kwargs):
         """
         Initialise the solver.
         :param config: Configuration dictionary.
         :param substitution_matrix: Substitution matrix.
+        :param band: Initial band half-width for the banded engine.
         """
         super().__init__(config, substitution_matrix, *args, **kwargs)
+        if band < 0:
+            raise ValueError("Band half-width cannot be negative")
+        self.band = band
+        if self.engine == Engine.MYERS and self.edit_cost() is None:
+            raise ValueError("Engine myers needs scoring that reduces to edit distance, e.g. match 0 and mismatch and "
+                             "indel -1")
+        if self.engine == Engine.WFA and self.wfa_penalties() is None:
+            raise ValueError("Engine wfa needs a single match and mismatch score and gap penalties below half the "
+                             "match score")
+
+    def edit_cost(self) -> Optional[Tuple[Union[int, float], Union[int, float]]]:
+        """
+        Check if global alignment scores reduce to edit distance.
+
+        With linear gaps and a single match score m, mismatch score x and gap score g, the score of a global alignment
+        of sequences of lengths n1 and n2 with X mismatches and G gap positions is m * (n1 + n2) / 2 + (x - m) * X
+        + (g - m / 2) * G. When x - m = g - m / 2 = -c < 0, this is m * (n1 + n2) / 2 - c * (edit distance).
+        :return: Half the match score and the cost c of an edit, or None if the scores do not reduce to edit distance.
+        """
+        table = self.substitution_table
+        if self.affine or len(table) == 0:
+            return None
+        match = table[0, 0].item()
+        half_match = match // 2 if match % 2 == 0 else match / 2
+        cost = half_match - self.gap_open
+        mismatches = table[~np.eye(len(table), dtype=bool)]
+        if cost <= 0 or np.any(np.diag(table) != match) or np.any(mismatches != match - cost):
+            return None
+        return half_match, cost
+
+    def wfa_penalties(self) -> Optional[Tuple[int, int, int]]:
+        """
+        Check if global alignment scores can be calculated as wavefront alignment (WFA) penalties.
+
+        With a single match score m, mismatch score x, and gaps of length L scoring o + e * (L - 1), the score of a
+        global alignment of sequences of lengths n1 and n2 is m * (n1 + n2) / 2 - P / 2, with a penalty P of 2 * (m - x)
+        per mismatch and 2 * (e - o) + (m - 2 * e) * L per gap. The WFA needs positive mismatch and gap
+        extension penalties, a gap opening penalty that is not negative and, since it works one penalty at a time,
+        whole numbers.
+        :return: The mismatch, gap opening and gap extension penalties, or None if the scores cannot be converted.
+        """
+        table = self.substitution_table
+        if len(table) == 0:
+            return None
+        match = table[0, 0].item()
+        mismatches = table[~np.eye(len(table), dtype=bool)]
+        if np.any(np.diag(table) != match) or np.any(mismatches != (mismatches[0] if len(mismatches) else 0)):
+            return None
+
+        mismatch = mismatches[0].item() if len(mismatches) else match - 1
+        penalties = (2 * (match - mismatch), 2 * (self.gap_extend - self.gap_open), match - 2 * self.gap_extend)
+        if any(not float(penalty).is_integer() for penalty in penalties) or penalties[0] <= 0 or penalties[1] < 0 or \
+                penalties[2] <= 0:
+            return None
+        return tuple(int(penalty) for penalty in penalties)
 
     @property
     def scoring_matrix_cls(self) -> Callable:
@@ -23,8 +93,177 @@ class NeedlemanWunschPSASolver(SmithWatermanPSASolver):
         Return the scoring matrix class to use.
         :return: Scoring matrix class.
         """
+        if self.engine == Engine.BANDED:
+            return lambda top_sequence, bottom_sequence: BandedScoringMatrix.needleman_wunsch(
+                top_sequence, bottom_sequence, self.band, dtype=self.score_dtype)
+        if self.memmap_threshold is not None:
+            return lambda top_sequence, bottom_sequence: MemmapScoringMatrix.needleman_wunsch(
+                top_sequence, bottom_sequence, dtype=self.score_dtype, scratch_dir=self.scratch_dir) \
+                if self.use_memmap(top_sequence, bottom_sequence) else self.in_memory_matrix_cls(top_sequence,
+                                                                                                 bottom_sequence)
+        return self.in_memory_matrix_cls
+
+    @property
+    def in_memory_matrix_cls(self) -> Callable:
+        """
+        Return the scoring matrix class to use for matrices that are kept in memory.
+        :return: Scoring matrix class.
+        """
+        if self.engine == Engine.WAVEFRONT:
+            return lambda top_sequence, bottom_sequence: NumpyScoringMatrix.needleman_wunsch(
+                top_sequence, bottom_sequence, dtype=self.score_dtype)
         return ScoringMatrix.needleman_wunsch
 
+    def solve(self, sequence_1: str, sequence_2: str, scoring_matrix: ScoringMatrix = None,
+              max_alignments: Optional[int] = None,
+              engine: Optional[Union[Engine, str]] = None) -> Tuple[Union[int, float], List[Tuple[str, str]]]:
+        """
+        Solve the pairwise sequence alignment problem.
+        :param sequence_1: The first sequence.
+        :param sequence_2: The second sequence.
+        :param scoring_matrix: Scoring matrix to use for the PSA solver.
+        :param max_alignments: Maximum number of alignments to return, all of them if None.
+        :param engine: Engine to use for this call instead of the engine of the solver, one that does not store a
+        scoring matrix (hirschberg, myers or wfa).
+        :return: The score and all valid alignments.
+        """
+        score, alignments = self.solve_iter(sequence_1, sequence_2, scoring_matrix, max_alignments, engine)
+        return self.post_solve((score, list(alignments)))
+
+    def solve_iter(self, sequence_1: str, sequence_2: str, scoring_matrix: ScoringMatrix = None,
+                   max_alignments: Optional[int] = None,
+                   engine: Optional[Union[Engine, str]] = None) -> Tuple[Union[int, float], Iterator[Tuple[str, str]]]:
+        """
+        Solve the pairwise sequence alignment problem, finding the alignments lazily.
+
+        The Hirschberg, Myers and WFA engines never store a scoring matrix, and only return a single optimal alignment.
+        :param sequence_1: The first sequence.
+        :param sequence_2: The second sequence.
+        :param scoring_matrix: Scoring matrix to use for the PSA solver.
+        :param max_alignments: Maximum number of alignments to produce, all of them if None.
+        :param engine: Engine to use for this call instead of the engine of the solver, one that does not store a
+        scoring matrix (hirschberg, myers or wfa).
+        :return: The score and an iterator over the valid alignments.
+        """
+        if max_alignments is not None and max_alignments < 0:
+            raise ValueError(f"Maximum number of alignments must not be negative, got {max_alignments}")
+        engine = self.engine if engine is None else Engine(engine)
+        single_alignment_engines = {Engine.HIRSCHBERG: self.solve_hirschberg, Engine.MYERS: self.solve_myers,
+                                    Engine.WFA: self.solve_wfa}
+        if engine not in single_alignment_engines:
+            if engine != self.engine:
+                raise ValueError(f"Engine {engine.value} can only be chosen when creating the solver")
+            return super().solve_iter(sequence_1, sequence_2, scoring_matrix, max_alignments)
+        # Characters outside of the alphabet are added to the substitution table before checking its scores
+        self.encode(sequence_1), self.encode(sequence_2)
+        if engine == Engine.MYERS and self.edit_cost() is None or engine == Engine.WFA and self.wfa_penalties() is None:
+            raise ValueError(f"Engine {engine.value} does not support the scoring of this solver")
+
+        self.sequence_1 = sequence_1
+        self.sequence_2 = sequence_2
+        self.scoring_matrix = None
+        self.pre_solve()
+        score, alignments = single_alignment_engines[engine]()
+        return score, islice(alignments, max_alignments)
+
+    def count_alignments(self, sequence_1: str, sequence_2: str, scoring_matrix: ScoringMatrix = None) -> Tuple[
+        Union[int, float], int]:
+        """
+        Count the optimal alignments without building any of them.
+        :param sequence_1: The first sequence.
+        :param sequence_2: The second sequence.
+        :param scoring_matrix: Scoring matrix to use for the PSA solver.
+        :return: The score and the number of optimal alignments.
+        """
+        if self.engine in (Engine.HIRSCHBERG, Engine.MYERS, Engine.WFA):
+            raise ValueError(f"Engine {self.engine.value} does not store the tracebacks needed to count alignments")
+        return super().count_alignments(sequence_1, sequence_2, scoring_matrix)
+
+    def solve_hirschberg(self) -> Tuple[Union[int, float], List[Tuple[str, str]]]:
+        """
+        Find an optimal alignment in linear space.
+        :return: The score and a single optimal alignment.
+        """
+        codes_1, codes_2 = self.encode(self.sequence_1), self.encode(self.sequence_2)
+        table = self.substitution_table
+
+        # The rows run along the longer sequence, so only rows as long as the shorter sequence are stored
+        if len(self.sequence_2) >= len(self.sequence_1):
+            pairs = hirschberg(codes_2, codes_1, table, self.gap_open, self.gap_extend, self.score_dtype)
+            pairs = [(index_1, index_2) for index_2, index_1 in pairs]
+        else:
+            pairs = hirschberg(codes_1, codes_2, table.T, self.gap_open, self.gap_extend, self.score_dtype)
+
+        alignment = (''.join(self.sequence_1[index_1] if index_1 >= 0 else '-' for index_1, _ in pairs),
+                     ''.join(self.sequence_2[index_2] if index_2 >= 0 else '-' for _, index_2 in pairs))
+        return self.alignment_score(alignment), [alignment]
+
+    def solve_myers(self) -> Tuple[Union[int, float], List[Tuple[str, str]]]:
+        """
+        Find an optimal alignment with bit-parallel edit distance, for scoring that reduces to it.
+        :return: The score and a single optimal alignment.
+        """
+        half_match, cost = self.edit_cost()
+        distance, alignment = edit_alignment(self.sequence_1, self.sequence_2)
+        return half_match * (len(self.sequence_1) + len(self.sequence_2)) - cost * distance, [alignment]
+
+    def solve_wfa(self) -> Tuple[Union[int, float], List[Tuple[str, str]]]:
+        """
+        Find an optimal alignment with the wavefront alignment algorithm, for scoring that converts to its penalties.
+        :return: The score and a single optimal alignment.
+        """
+        match = self.substitution_table[0, 0].item()
+        penalty, alignment = wfa_align(self.sequence_1, self.sequence_2, *self.wfa_penalties())
+        score = match * (len(self.sequence_1) + len(self.sequence_2)) - penalty
+        return score // 2 if score % 2 == 0 else score / 2, [alignment]
+
+    def score(self, sequence_1: str, sequence_2: str, locate_start: bool = False) -> Tuple[
+        Union[int, float], Optional[Tuple[int, int]], Tuple[int, int]]:
+        """
+        Calculate the best alignment score without storing a scoring matrix or tracebacks.
+
+        Scoring that reduces to edit distance is calculated with bit-parallel edit distance, whatever the engine.
+        :param sequence_1: The first sequence.
+        :param sequence_2: The second sequence.
+        :param locate_start: Unused, global alignments always start in the top left corner.
+        :return: The score, None as the start cell and the bottom right corner as the end cell.
+        """
+        edit_cost = self.edit_cost()
+        if edit_cost is None:
+            return super().score(sequence_1, sequence_2, locate_start)
+
+        half_match, cost = edit_cost
+        score = half_match * (len(sequence_1) + len(sequence_2)) - cost * edit_distance(sequence_1, sequence_2)
+        return score, None, (len(sequence_2), len(sequence_1))
+
+    def calculate_scoring_matrix(self) -> None:
+        """
+        Calculate the scoring matrix.
+        """
+        if self.engine == Engine.BANDED:
+            return self.calculate_scoring_matrix_banded()
+        super().calculate_scoring_matrix()
+
+    def calculate_scoring_matrix_banded(self) -> None:
+        """
+        Calculate the scoring matrix inside of a band around the diagonal, doubling the band until no alignment leaving
+        the band can score as high as the best alignment inside of it.
+
+        Because the bound is strict, every optimal alignment lies inside of the final band.
+        """
+        top_sequence, bottom_sequence = self.scoring_matrix.top_sequence, self.scoring_matrix.bottom_sequence
+        top_codes, bottom_codes = self.encode(top_sequence), self.encode(bottom_sequence)
+        table = self.substitution_table
+
+        while True:
+            fill_banded(self.scoring_matrix, table, top_codes, bottom_codes, self.gap_open, self.gap_extend)
+            bound = out_of_band_bound(self.scoring_matrix, table, top_codes, bottom_codes, self.gap_open,
+                                      self.gap_extend)
+            if bound is None or self.scoring_matrix.get_score(*self.scoring_matrix.corner_index()) > bound:
+                return
+            self.scoring_matrix = BandedScoringMatrix.needleman_wunsch(
+                top_sequence, bottom_sequence, max(2 * self.scoring_matrix.band, 1), dtype=self.score_dtype)
+
     def get_starting_points(self) -> list[tuple[int, int]]:
         """
         Get the starting points for the PSA problem.
@@ -46,8 +285,7 @@ class NeedlemanWunschPSASolver(SmithWatermanPSASolver):
         elif y == 0:
             return [self.gap_penalty(x)]
         return [
-            self.scoring_matrix.get_score(x - 1, y - 1) + self.scoring_function(self.scoring_matrix.bottom_char(x),
-                                                                                self.scoring_matrix.top_char(y)),
-            max([self.scoring_matrix.get_score(x - i, y) + self.gap_penalty(i) for i in range(1, x + 1)]),
-            max([self.scoring_matrix.get_score(x, y - j) + self.gap_penalty(j) for j in range(1, y + 1)])
+            self.scoring_matrix.get_score(x - 1, y - 1) + self.substitutions[x - 1][y - 1],
+            self.scoring_matrix.get_gap_score(x, y, Direction.UP),
+            self.scoring_matrix.get_gap_score(x, y, Direction.LEFT)
         ]
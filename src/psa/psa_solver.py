@@ -1,36 +1,59 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Union, Optional, Callable
+from itertools import islice
+from typing import List, Tuple, Union, Optional, Callable, Iterable, Iterator
 
-from blosum import BLOSUM
+import numpy as np
 
+from encoding import Encoder
+from psa.enums import Engine
+from psa.scoring_matrix.memmap_scoring_matrix import MemmapScoringMatrix
 from psa.scoring_matrix.scoring_matrix import ScoringMatrix
+from scratch import memmap_size
+from substitution_matrix import SubstitutionMatrix, get_substitution_matrix
 
 
 class PSASolver(ABC):
     """
     Abstract class for pairwise sequence alignment solvers.
     """
+    supported_engines: Tuple[Engine, ...] = (Engine.PYTHON,)
 
-    def __init__(self, config: dict, substitution_matrix: Optional[dict] = None, *args, **kwargs):
+    def __init__(self, config: dict, substitution_matrix: Optional[dict] = None,
+                 engine: Union[Engine, str] = Engine.PYTHON, *args, memmap_threshold: Optional[int] = None,
+                 scratch_dir: Optional[str] = None, **kwargs):
         """
         Initialise the PSA solver.
         :param config: Configuration for the PSA solver.
-        :param substitution_matrix: Substitution matrix to use for the PSA solver. Defaults to BLOSUM62.
+        :param substitution_matrix: Substitution matrix to use for the PSA solver. Defaults to the "substitution matrix"
+        of the config (a name or path, see get_substitution_matrix), or BLOSUM62.
+        :param engine: Engine to fill the scoring matrix with.
+        :param memmap_threshold: Size in bytes above which scoring matrices are memory-mapped to files instead of kept
+        in memory, never if None.
+        :param scratch_dir: Directory for the files of memory-mapped scoring matrices, the system temporary directory if
+        None.
         """
         super().__init__(*args, **kwargs)
+        self.memmap_threshold = memmap_threshold
+        self.scratch_dir = scratch_dir
+        self.engine = Engine(engine)
+        if self.engine not in self.supported_engines:
+            raise ValueError(f"Engine {self.engine.value} is not supported by {type(self).__name__}")
         self.config = config
-        self.substitution_matrix = substitution_matrix or BLOSUM(62)
         self.scoring_matrix: ScoringMatrix = None
         self.sequence_1: str = None
         self.sequence_2: str = None
+        self.substitutions: List[List[Union[int, float]]] = None
 
+        match, mismatch = None, None
         if None not in [config.get("match"), config.get("mismatch")]:
-            for key in self.substitution_matrix.keys():
-                for other_key in self.substitution_matrix[key].keys():
-                    if key == other_key:
-                        self.substitution_matrix[key][other_key] = config["match"]
-                    else:
-                        self.substitution_matrix[key][other_key] = config["mismatch"]
+            match, mismatch = config["match"], config["mismatch"]
+        if substitution_matrix is None:
+            self.substitution_matrix = get_substitution_matrix(config.get("substitution matrix", "BLOSUM62"), match,
+                                                               mismatch)
+        else:
+            self.substitution_matrix = SubstitutionMatrix.from_dict(substitution_matrix).with_overrides(match, mismatch)
+
+        self.encoder = Encoder(self.substitution_matrix)
 
     @property
     @abstractmethod
@@ -49,30 +72,161 @@ class PSASolver(ABC):
         """
         return self.substitution_matrix[item_1][item_2]
 
+    def encode(self, sequence: str) -> np.ndarray:
+        """
+        Encode a sequence as codes into the substitution table.
+        :param sequence: Sequence to encode.
+        :return: Array of codes.
+        """
+        return self.encoder.encode(sequence)
+
+    @property
+    def substitution_table(self) -> np.ndarray:
+        """
+        Dense substitution table, indexed by the codes of two characters. Characters are added to it as they are first
+        encoded, so it is read after encoding the sequences.
+        """
+        return self.encoder.table
+
+    def substitution_scores(self, top_sequence: str, bottom_sequence: str) -> np.ndarray:
+        """
+        Look up the substitution score of every pair of characters of two sequences at once.
+        :param top_sequence: Top sequence, along the columns.
+        :param bottom_sequence: Bottom sequence, along the rows.
+        :return: Substitution scores indexed by [bottom position, top position].
+        """
+        top_codes, bottom_codes = self.encode(top_sequence), self.encode(bottom_sequence)
+        return self.substitution_table[bottom_codes[:, None], top_codes[None, :]]
+
+    @property
+    def gap_open(self) -> Union[int, float]:
+        """
+        Penalty for the first position of a gap. Defaults to the indel penalty.
+        """
+        return self.config.get("gap open", self.config.get("indel"))
+
+    @property
+    def gap_extend(self) -> Union[int, float]:
+        """
+        Penalty for every further position of a gap. Defaults to the indel penalty.
+        """
+        return self.config.get("gap extend", self.config.get("indel"))
+
+    @property
+    def affine(self) -> bool:
+        """
+        Whether the gap penalties are affine, i.e. opening a gap costs something else than extending it.
+        """
+        return self.gap_open != self.gap_extend
+
+    @property
+    def score_dtype(self) -> type:
+        """
+        Numpy type that can hold every score, floating point if any of the penalties or substitutions is.
+        """
+        if np.issubdtype(self.substitution_table.dtype, np.floating) or \
+                any(isinstance(value, float) for value in [self.gap_open, self.gap_extend]):
+            return np.float64
+        return np.int64
+
+    def use_memmap(self, top_sequence: str, bottom_sequence: str) -> bool:
+        """
+        Check if the scoring matrix of two sequences should be memory-mapped to files, because it is larger than the
+        memmap threshold.
+        :param top_sequence: Top sequence.
+        :param bottom_sequence: Bottom sequence.
+        :return: Whether to memory-map the scoring matrix.
+        """
+        if self.memmap_threshold is None:
+            return False
+        size = memmap_size((len(bottom_sequence) + 1, len(top_sequence) + 1),
+                           MemmapScoringMatrix.bytes_per_entry(self.score_dtype))
+        return size > self.memmap_threshold
+
     def gap_penalty(self, length: int = 1) -> Union[int, float]:
         """
         Calculate the gap penalty for a given length.
         :param length: Length of the gap.
         :return: Gap penalty.
         """
-        return self.config['indel'] * length
+        if length <= 0:
+            return 0
+        return self.gap_open + self.gap_extend * (length - 1)
+
+    def alignment_score(self, alignment: Tuple[str, str]) -> Union[int, float]:
+        """
+        Calculate the score of an alignment, every run of gaps in one of the sequences is scored as a single gap.
+        :param alignment: The aligned first and second sequence.
+        :return: The score of the alignment.
+        """
+        score = 0
+        gap_lengths = [0, 0]
+        for char_1, char_2 in zip(*alignment):
+            for index, char in enumerate((char_1, char_2)):
+                if char == '-':
+                    gap_lengths[index] += 1
+                else:
+                    score += self.gap_penalty(gap_lengths[index])
+                    gap_lengths[index] = 0
+            if '-' not in (char_1, char_2):
+                score += self.scoring_function(char_2, char_1)
+        return score + self.gap_penalty(gap_lengths[0]) + self.gap_penalty(gap_lengths[1])
 
-    def solve(self, sequence_1: str, sequence_2: str, scoring_matrix: ScoringMatrix = None) -> Tuple[
-        Union[int, float], List[Tuple[str, str]]]:
+    def solve(self, sequence_1: str, sequence_2: str, scoring_matrix: ScoringMatrix = None,
+              max_alignments: Optional[int] = None) -> Tuple[Union[int, float], List[Tuple[str, str]]]:
         """
         Solve the pairwise sequence alignment problem.
         :param sequence_1: The first sequence.
         :param sequence_2: The second sequence.
         :param scoring_matrix: Scoring matrix to use for the PSA solver.
+        :param max_alignments: Maximum number of alignments to return, all of them if None.
         :return: The score and all valid alignments.
         """
+        score, alignments = self.solve_iter(sequence_1, sequence_2, scoring_matrix, max_alignments)
+        return self.post_solve((score, list(alignments)))
+
+    def solve_iter(self, sequence_1: str, sequence_2: str, scoring_matrix: ScoringMatrix = None,
+                   max_alignments: Optional[int] = None) -> Tuple[Union[int, float], Iterator[Tuple[str, str]]]:
+        """
+        Solve the pairwise sequence alignment problem, finding the alignments lazily.
+
+        The alignments are produced one at a time in a deterministic order, so only as many as needed are ever built.
+        :param sequence_1: The first sequence.
+        :param sequence_2: The second sequence.
+        :param scoring_matrix: Scoring matrix to use for the PSA solver.
+        :param max_alignments: Maximum number of alignments to produce, all of them if None.
+        :return: The score and an iterator over the valid alignments.
+        """
+        if max_alignments is not None and max_alignments < 0:
+            raise ValueError(f"Maximum number of alignments must not be negative, got {max_alignments}")
+        self.init_solve(sequence_1, sequence_2, scoring_matrix)
+        score, alignments = self._solve()
+        return score, islice(alignments, max_alignments)
+
+    def count_alignments(self, sequence_1: str, sequence_2: str, scoring_matrix: ScoringMatrix = None) -> Tuple[
+        Union[int, float], int]:
+        """
+        Count the optimal alignments without building any of them.
+        :param sequence_1: The first sequence.
+        :param sequence_2: The second sequence.
+        :param scoring_matrix: Scoring matrix to use for the PSA solver.
+        :return: The score and the number of optimal alignments.
+        """
+        self.init_solve(sequence_1, sequence_2, scoring_matrix)
+        return self._count_alignments()
+
+    def init_solve(self, sequence_1: str, sequence_2: str, scoring_matrix: ScoringMatrix = None) -> None:
+        """
+        Set up the sequences and scoring matrix before solving.
+        :param sequence_1: The first sequence.
+        :param sequence_2: The second sequence.
+        :param scoring_matrix: Scoring matrix to use for the PSA solver.
+        """
         self.sequence_1 = sequence_1
         self.sequence_2 = sequence_2
         self.scoring_matrix = self.scoring_matrix_cls(sequence_1,
                                                       sequence_2) if scoring_matrix is None else scoring_matrix
         self.pre_solve()
-        results = self._solve()
-        return self.post_solve(results)
 
     def pre_solve(self):
         """
@@ -88,9 +242,17 @@ class PSASolver(ABC):
         return results
 
     @abstractmethod
-    def _solve(self) -> Tuple[int, List[Tuple[str, str]]]:
+    def _solve(self) -> Tuple[int, Iterable[Tuple[str, str]]]:
         """
         Solve the pairwise sequence alignment problem.
-        :return: The score and all valid alignments.
+        :return: The score and all valid alignments, possibly as a lazy iterable.
+        """
+        pass
+
+    @abstractmethod
+    def _count_alignments(self) -> Tuple[Union[int, float], int]:
+        """
+        Count the optimal alignments of the pairwise sequence alignment problem.
+        :return: The score and the number of optimal alignments.
         """
         pass
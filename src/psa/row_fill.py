@@ -0,0 +1,65 @@
+from typing import Union
+
+import numpy as np
+
+from psa.enums import Direction
+from psa.linear_space import horizontal_gap_scores
+from psa.scoring_matrix.numpy_scoring_matrix import NumpyScoringMatrix
+from psa.scoring_matrix.scoring_matrix import DIRECTION_BITS
+
+
+def fill_rows(matrix: NumpyScoringMatrix, substitution_table: np.ndarray, top_codes: np.ndarray,
+              bottom_codes: np.ndarray, gap_open: Union[int, float], gap_extend: Union[int, float],
+              local: bool) -> None:
+    """
+    Fill an initialised scoring matrix one row at a time.
+
+    Every row only reads the row above it, and the planes are stored row by row, so the matrix is read and written
+    sequentially and no other memory than a few rows is needed. This suits memory-mapped matrices, where the wavefront
+    fill would jump between pages. Horizontal gaps are resolved with a running maximum when opening a gap is at least as
+    expensive as extending one, and entry by entry otherwise.
+    :param matrix: Initialised scoring matrix to fill.
+    :param substitution_table: Dense substitution table.
+    :param top_codes: Encoded top sequence.
+    :param bottom_codes: Encoded bottom sequence.
+    :param gap_open: Penalty for the first position of a gap.
+    :param gap_extend: Penalty for every further position of a gap.
+    :param local: Whether to calculate a local (Smith-Waterman) or global (Needleman-Wunsch) alignment.
+    """
+    scores = matrix.scores
+    up_scores = matrix.gap_scores[Direction.UP]
+    left_scores = matrix.gap_scores[Direction.LEFT]
+    tracebacks = matrix.tracebacks
+    height, width = scores.shape
+
+    # The top row only depends on the entry before it
+    if not local:
+        scores[0, 1:] = gap_open + gap_extend * np.arange(width - 1)
+    for y in range(1, width):
+        left_scores[0, y] = max(scores[0, y - 1] + gap_open, left_scores[0, y - 1] + gap_extend)
+
+    offsets = np.arange(width - 1) * gap_extend
+    for x in range(1, height):
+        if not local:
+            scores[x, 0] = gap_open + gap_extend * (x - 1)
+        up_scores[x, 0] = max(scores[x - 1, 0] + gap_open, up_scores[x - 1, 0] + gap_extend)
+        if width == 1:
+            continue
+
+        diagonal_scores = scores[x - 1, :-1] + substitution_table[bottom_codes[x - 1], top_codes]
+        up = np.maximum(scores[x - 1, 1:] + gap_open, up_scores[x - 1, 1:] + gap_extend)
+        best = np.maximum(diagonal_scores, up)
+        if local:
+            np.maximum(best, 0, out=best)
+
+        # A horizontal gap either continues from the first column, or opens after an entry in the row
+        first_left = max(scores[x, 0] + gap_open, left_scores[x, 0] + gap_extend)
+        left = horizontal_gap_scores(best, first_left, gap_open, gap_extend, offsets)
+
+        row_scores = np.maximum(best, left)
+        scores[x, 1:] = row_scores
+        up_scores[x, 1:] = up
+        left_scores[x, 1:] = left
+        tracebacks[x, 1:] = (np.where(row_scores == diagonal_scores, DIRECTION_BITS[Direction.DIAGONAL], 0) |
+                             np.where(row_scores == up, DIRECTION_BITS[Direction.UP], 0) |
+                             np.where(row_scores == left, DIRECTION_BITS[Direction.LEFT], 0))
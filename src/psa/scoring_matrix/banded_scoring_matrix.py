@@ -0,0 +1,237 @@
+from typing import Union, Tuple, Type
+
+import numpy as np
+
+from psa.enums import Direction
+from psa.scoring_matrix.numpy_scoring_matrix import NumpyScoringMatrix
+from psa.scoring_matrix.scoring_matrix import DIRECTION_BITS, TRACEBACKS
+
+
+class BandedScoringMatrix(NumpyScoringMatrix):
+    """
+    Scoring matrix which only stores the entries in a band around the diagonal from the top left to the bottom right
+    corner.
+
+    Entry (x, y) lies on diagonal y - x. The band holds every diagonal between the main diagonal and the diagonal of the
+    bottom right corner, widened by the band half-width on both sides. Each row of the numpy planes holds the band of
+    one matrix row, entries outside of the band act as paths that do not exist.
+    """
+
+    def __init__(self, top_sequence: str, bottom_sequence: str, band: int = 16, dtype: Type[np.number] = np.int64,
+                 *args, **kwargs):
+        """
+        Initialise the scoring matrix.
+        :param top_sequence: Top sequence string.
+        :param bottom_sequence: Bottom sequence string.
+        :param band: Band half-width, the number of diagonals kept on either side of the corner diagonals.
+        :param dtype: Numpy type of the scores.
+        """
+        super().__init__(top_sequence, bottom_sequence, dtype, *args, **kwargs)
+        self.band = band
+        difference = len(top_sequence) - len(bottom_sequence)
+        self.lowest_diagonal = min(0, difference) - band
+        self.highest_diagonal = max(0, difference) + band
+
+    def band_width(self) -> int:
+        return self.highest_diagonal - self.lowest_diagonal + 1
+
+    def covers_matrix(self) -> bool:
+        """
+        Check if the band holds every entry of the matrix.
+        :return: True if no entry lies outside of the band.
+        """
+        return self.lowest_diagonal <= -(self.height() - 1) and self.highest_diagonal >= self.width() - 1
+
+    def in_band(self, x: int, y: int) -> bool:
+        """
+        Check if a matrix entry lies inside of the band.
+        :param x: Row index.
+        :param y: Column index.
+        :return: True if the entry is stored.
+        """
+        return 0 <= x < self.height() and 0 <= y < self.width() and \
+            self.lowest_diagonal <= y - x <= self.highest_diagonal
+
+    def column_range(self, x: int) -> Tuple[int, int]:
+        """
+        Get the columns of a row that lie inside of the band.
+        :param x: Row index.
+        :return: First and last column index inside of the band.
+        """
+        return max(0, x + self.lowest_diagonal), min(self.width() - 1, x + self.highest_diagonal)
+
+    def band_index(self, x: int, y: int) -> int:
+        """
+        Get the position of a matrix entry within its row of the band.
+        :param x: Row index.
+        :param y: Column index.
+        :return: Column index into the numpy planes.
+        """
+        return y - x - self.lowest_diagonal
+
+    def get_score(self, x: int, y: int) -> Union[int, float]:
+        """
+        Get the score for a matrix entry, entries outside of the band cannot be reached.
+        :param x: Row index.
+        :param y: Column index.
+        :return: Score for the matrix entry.
+        """
+        if not self.in_band(x, y):
+            return self.minus_infinity
+        return self.scores[x, self.band_index(x, y)].item()
+
+    def get_traceback(self, x: int, y: int) -> list[Direction]:
+        """
+        Get the traceback for a matrix entry, decoded from its bit flags.
+        :param x: Row index.
+        :param y: Column index.
+        :return: Traceback for the matrix entry.
+        """
+        if not self.in_band(x, y):
+            return []
+        return list(TRACEBACKS[self.tracebacks[x, self.band_index(x, y)]])
+
+    def set_score(self, x: int, y: int, score: Union[int, float]):
+        """
+        Set the score for a matrix entry.
+        :param x: Row index.
+        :param y: Column index.
+        :param score: Score for the matrix entry.
+        """
+        self.scores[x, self.band_index(x, y)] = score
+
+    def set_traceback(self, x: int, y: int, traceback: list[Direction]):
+        """
+        Set the traceback for a matrix entry.
+        :param x: Row index.
+        :param y: Column index.
+        :param traceback: Traceback for the matrix entry.
+        """
+        self.tracebacks[x, self.band_index(x, y)] = sum(DIRECTION_BITS[direction] for direction in set(traceback))
+
+    def add_traceback(self, x: int, y: int, traceback: Direction):
+        """
+        Add a traceback to the traceback flags for a matrix entry.
+        :param x: Row index.
+        :param y: Column index.
+        :param traceback: Traceback to be added.
+        """
+        self.tracebacks[x, self.band_index(x, y)] |= DIRECTION_BITS[traceback]
+
+    def get_gap_score(self, x: int, y: int, direction: Direction) -> Union[int, float]:
+        """
+        Get the score of the best path ending in a gap for a matrix entry.
+        :param x: Row index.
+        :param y: Column index.
+        :param direction: Direction of the gap, UP or LEFT.
+        :return: Score of the best path ending in a gap in the given direction.
+        """
+        if not self.in_band(x, y):
+            return self.minus_infinity
+        return self.gap_scores[direction][x, self.band_index(x, y)].item()
+
+    def set_gap_score(self, x: int, y: int, direction: Direction, score: Union[int, float]):
+        """
+        Set the score of the best path ending in a gap for a matrix entry.
+        :param x: Row index.
+        :param y: Column index.
+        :param direction: Direction of the gap, UP or LEFT.
+        :param score: Score of the best path ending in a gap in the given direction.
+        """
+        self.gap_scores[direction][x, self.band_index(x, y)] = score
+
+    def init_gap_scores(self) -> None:
+        """
+        Initialise the gap states, no path ends in a gap before it is calculated.
+
+        The planes have one extra column which is never written, so the entry above the last diagonal of the band can
+        be read without bounds checks.
+        """
+        self.gap_scores = {direction: np.full((self.height(), self.band_width() + 1), self.minus_infinity,
+                                              dtype=self.dtype)
+                           for direction in (Direction.UP, Direction.LEFT)}
+
+    def max_score_index(self) -> Tuple[int, int]:
+        """
+        Find the highest scoring matrix entry.
+        :return: Indices of the highest scoring matrix entry.
+        """
+        max_score_index = (0, 0)
+        max_score = 0
+        for x, y in self.max_score_index_multiple():
+            if self.get_score(x, y) > max_score:
+                max_score_index, max_score = (x, y), self.get_score(x, y)
+        return max_score_index
+
+    def max_score_index_multiple(self) -> list[Tuple[int, int]]:
+        """
+        Find the indices of the highest scoring matrix entries.
+        :return: Indices of the highest scoring matrix entries.
+        """
+        indices = np.argwhere(self.scores == np.max(self.scores))
+        return sorted((int(x), int(index + x + self.lowest_diagonal)) for x, index in indices)
+
+    def __str__(self) -> str:
+        """
+        String representation of the scoring matrix, entries outside of the band are left empty.
+        :return: String representation of the scoring matrix.
+        """
+        matrix_string = ""
+        matrix_string += '\t' * 2 + '\t'.join([f"{char}" for char in self.top_sequence]) + '\n'
+
+        for i in range(self.height()):
+            if i == 0:
+                matrix_string += '\t'
+            else:
+                matrix_string += f"{self.bottom_sequence[i - 1]}\t"
+            matrix_string += '\t'.join([f"{int(self.get_score(i, j))}" if self.in_band(i, j) else ''
+                                        for j in range(self.width())]) + '\n'
+
+        return matrix_string
+
+    def init_smith_waterman(self) -> None:
+        """
+        Initialise the scoring matrix for the Smith-Waterman algorithm.
+        """
+        self.scores = np.full((self.height(), self.band_width() + 1), self.minus_infinity, dtype=self.dtype)
+        self.tracebacks = np.zeros((self.height(), self.band_width() + 1), dtype=np.uint8)
+        self.init_gap_scores()
+
+        for x in range(self.height()):
+            start, end = self.column_range(x)
+            self.scores[x, self.band_index(x, start):self.band_index(x, end) + 1] = 0
+
+    @classmethod
+    def smith_waterman(cls, top_sequence: str, bottom_sequence: str, band: int = 16,
+                       dtype: Type[np.number] = np.int64) -> 'BandedScoringMatrix':
+        """
+        Initialise the scoring matrix for the Smith-Waterman algorithm.
+        :return: Scoring matrix for the Smith-Waterman algorithm.
+        """
+        matrix = cls(top_sequence, bottom_sequence, band, dtype)
+        matrix.init_smith_waterman()
+        return matrix
+
+    def init_needleman_wunsch(self, gap_penalty: int = -1) -> None:
+        """
+        Initialise the scoring matrix for the Needleman-Wunsch algorithm.
+        """
+        self.init_smith_waterman()
+
+        for x in range(1, min(self.height(), 1 - self.lowest_diagonal)):
+            self.set_score(x, 0, x * gap_penalty)
+            self.set_traceback(x, 0, [Direction.UP])
+        for y in range(1, min(self.width(), self.highest_diagonal + 1)):
+            self.set_score(0, y, y * gap_penalty)
+            self.set_traceback(0, y, [Direction.LEFT])
+
+    @classmethod
+    def needleman_wunsch(cls, top_sequence: str, bottom_sequence: str, band: int = 16, gap_penalty: int = -1,
+                         dtype: Type[np.number] = np.int64) -> 'BandedScoringMatrix':
+        """
+        Initialise the scoring matrix for the Needleman-Wunsch algorithm.
+        :return: Scoring matrix for the Needleman-Wunsch algorithm.
+        """
+        matrix = cls(top_sequence, bottom_sequence, band, dtype)
+        matrix.init_needleman_wunsch(gap_penalty)
+        return matrix
@@ -0,0 +1,88 @@
+from typing import Optional, Type
+
+import numpy as np
+
+from psa.enums import Direction
+from psa.scoring_matrix.numpy_scoring_matrix import NumpyScoringMatrix
+from scratch import ScratchDirectory
+
+
+class MemmapScoringMatrix(NumpyScoringMatrix):
+    """
+    Scoring matrix with its planes memory-mapped to files in a scratch directory, for matrices larger than the available
+    memory.
+
+    The planes are stored row by row, so filling the matrix one row at a time reads and writes the files sequentially.
+    The files are removed when the matrix is closed or garbage collected.
+    """
+    # Bytes per entry for the traceback flags, on top of a score and two gap scores
+    traceback_bytes = 1
+
+    def __init__(self, top_sequence: str, bottom_sequence: str, dtype: Type[np.number] = np.int64,
+                 scratch_dir: Optional[str] = None, *args, **kwargs):
+        """
+        Initialise the scoring matrix.
+        :param top_sequence: Top sequence string.
+        :param bottom_sequence: Bottom sequence string.
+        :param dtype: Numpy type of the scores.
+        :param scratch_dir: Directory to create the scratch directory in, the system temporary directory if None.
+        """
+        super().__init__(top_sequence, bottom_sequence, dtype, *args, **kwargs)
+        self.scratch = ScratchDirectory(scratch_dir)
+
+    @classmethod
+    def bytes_per_entry(cls, dtype: Type[np.number] = np.int64) -> int:
+        """
+        Calculate the size of the planes per matrix entry.
+        :param dtype: Numpy type of the scores.
+        :return: Size in bytes.
+        """
+        return 3 * np.dtype(dtype).itemsize + cls.traceback_bytes
+
+    def init_gap_scores(self) -> None:
+        """
+        Initialise the gap states, no path ends in a gap before it is calculated.
+        """
+        self.gap_scores = {direction: self.scratch.array(f"{direction.name.lower()}_scores",
+                                                         (self.height(), self.width()), self.dtype,
+                                                         self.minus_infinity)
+                           for direction in (Direction.UP, Direction.LEFT)}
+
+    def init_smith_waterman(self) -> None:
+        """
+        Initialise the scoring matrix for the Smith-Waterman algorithm.
+        """
+        self.scores = self.scratch.array("scores", (self.height(), self.width()), self.dtype)
+        self.tracebacks = self.scratch.array("tracebacks", (self.height(), self.width()), np.uint8)
+        self.init_gap_scores()
+
+    @classmethod
+    def smith_waterman(cls, top_sequence: str, bottom_sequence: str, dtype: Type[np.number] = np.int64,
+                       scratch_dir: Optional[str] = None) -> 'MemmapScoringMatrix':
+        """
+        Initialise the scoring matrix for the Smith-Waterman algorithm.
+        :return: Scoring matrix for the Smith-Waterman algorithm.
+        """
+        matrix = cls(top_sequence, bottom_sequence, dtype, scratch_dir)
+        matrix.init_smith_waterman()
+        return matrix
+
+    @classmethod
+    def needleman_wunsch(cls, top_sequence: str, bottom_sequence: str, gap_penalty: int = -1,
+                         dtype: Type[np.number] = np.int64,
+                         scratch_dir: Optional[str] = None) -> 'MemmapScoringMatrix':
+        """
+        Initialise the scoring matrix for the Needleman-Wunsch algorithm.
+        :return: Scoring matrix for the Needleman-Wunsch algorithm.
+        """
+        matrix = cls(top_sequence, bottom_sequence, dtype, scratch_dir)
+        matrix.init_needleman_wunsch(gap_penalty)
+        return matrix
+
+    def close(self) -> None:
+        """
+        Remove the files of the planes. The matrix must not be used afterwards.
+        """
+        self.scores = self.tracebacks = None
+        self.gap_scores = {}
+        self.scratch.close()
@@ -0,0 +1,155 @@
+from typing import Union, Tuple, Type
+
+import numpy as np
+
+from psa.enums import Direction
+from psa.scoring_matrix.scoring_matrix import ScoringMatrix, DIRECTION_BITS
+
+
+class NumpyScoringMatrix(ScoringMatrix):
+    """
+    Scoring matrix backed by 2-D numpy arrays, so that whole regions can be filled with array operations.
+
+    Scores and gap scores are stored in numeric planes, tracebacks as bit flags in a uint8 plane.
+    """
+
+    def __init__(self, top_sequence: str, bottom_sequence: str, dtype: Type[np.number] = np.int64, *args, **kwargs):
+        """
+        Initialise the scoring matrix.
+        :param top_sequence: Top sequence string.
+        :param bottom_sequence: Bottom sequence string.
+        :param dtype: Numpy type of the scores.
+        """
+        super().__init__(top_sequence, bottom_sequence, *args, **kwargs)
+        self.dtype = np.dtype(dtype)
+        self.scores: np.ndarray = None
+
+    @property
+    def minus_infinity(self) -> Union[int, float]:
+        """
+        Score used for paths that do not exist. Integer planes use a very low value which cannot overflow.
+        """
+        if np.issubdtype(self.dtype, np.floating):
+            return -np.inf
+        return np.iinfo(self.dtype).min // 4
+
+    def get_score(self, x: int, y: int) -> Union[int, float]:
+        """
+        Get the score for a matrix entry.
+        :param x: Row index.
+        :param y: Column index.
+        :return: Score for the matrix entry.
+        """
+        return self.scores[x, y].item()
+
+    def set_score(self, x: int, y: int, score: Union[int, float]):
+        """
+        Set the score for a matrix entry.
+        :param x: Row index.
+        :param y: Column index.
+        :param score: Score for the matrix entry.
+        """
+        self.scores[x, y] = score
+
+    def get_gap_score(self, x: int, y: int, direction: Direction) -> Union[int, float]:
+        """
+        Get the score of the best path ending in a gap for a matrix entry.
+        :param x: Row index.
+        :param y: Column index.
+        :param direction: Direction of the gap, UP or LEFT.
+        :return: Score of the best path ending in a gap in the given direction.
+        """
+        return self.gap_scores[direction][x, y].item()
+
+    def set_gap_score(self, x: int, y: int, direction: Direction, score: Union[int, float]):
+        """
+        Set the score of the best path ending in a gap for a matrix entry.
+        :param x: Row index.
+        :param y: Column index.
+        :param direction: Direction of the gap, UP or LEFT.
+        :param score: Score of the best path ending in a gap in the given direction.
+        """
+        self.gap_scores[direction][x, y] = score
+
+    def init_gap_scores(self) -> None:
+        """
+        Initialise the gap states, no path ends in a gap before it is calculated.
+        """
+        self.gap_scores = {direction: np.full((self.height(), self.width()), self.minus_infinity, dtype=self.dtype)
+                           for direction in (Direction.UP, Direction.LEFT)}
+
+    def max_score_index(self) -> Tuple[int, int]:
+        """
+        Find the highest scoring matrix entry.
+        :return: Indices of the highest scoring matrix entry.
+        """
+        index = np.unravel_index(np.argmax(self.scores), self.scores.shape)
+        if self.scores[index] <= 0:
+            return 0, 0
+        return int(index[0]), int(index[1])
+
+    def max_score_index_multiple(self) -> list[Tuple[int, int]]:
+        """
+        Find the indices of the highest scoring matrix entries.
+        :return: Indices of the highest scoring matrix entries.
+        """
+        return [(int(x), int(y)) for x, y in np.argwhere(self.scores == self.max_score())]
+
+    def __str__(self) -> str:
+        """
+        String representation of the scoring matrix.
+        :return: String representation of the scoring matrix.
+        """
+        matrix_string = ""
+        matrix_string += '\t' * 2 + '\t'.join([f"{char}" for char in self.top_sequence]) + '\n'
+
+        for i in range(self.height()):
+            if i == 0:
+                matrix_string += '\t'
+            else:
+                matrix_string += f"{self.bottom_sequence[i - 1]}\t"
+            matrix_string += '\t'.join([f"{int(score)}" for score in self.scores[i]]) + '\n'
+
+        return matrix_string
+
+    def init_smith_waterman(self) -> None:
+        """
+        Initialise the scoring matrix for the Smith-Waterman algorithm.
+        """
+        self.scores = np.zeros((self.height(), self.width()), dtype=self.dtype)
+        self.tracebacks = np.zeros((self.height(), self.width()), dtype=np.uint8)
+        self.init_gap_scores()
+
+    @classmethod
+    def smith_waterman(cls, top_sequence: str, bottom_sequence: str,
+                       dtype: Type[np.number] = np.int64) -> 'NumpyScoringMatrix':
+        """
+        Initialise the scoring matrix for the Smith-Waterman algorithm.
+        :return: Scoring matrix for the Smith-Waterman algorithm.
+        """
+        matrix = cls(top_sequence, bottom_sequence, dtype)
+        matrix.init_smith_waterman()
+        return matrix
+
+    def init_needleman_wunsch(self, gap_penalty: int = -1) -> None:
+        """
+        Initialise the scoring matrix for the Needleman-Wunsch algorithm.
+        """
+        self.init_smith_waterman()
+
+        self.scores[:, 0] = np.arange(self.height()) * gap_penalty
+        self.scores[0, :] = np.arange(self.width()) * gap_penalty
+        self.tracebacks[:, 0] = DIRECTION_BITS[Direction.UP]
+        self.tracebacks[0, :] = DIRECTION_BITS[Direction.LEFT]
+        self.tracebacks[0, 0] = 0
+
+    @classmethod
+    def needleman_wunsch(cls, top_sequence: str, bottom_sequence: str, gap_penalty: int = -1,
+                         dtype: Type[np.number] = np.int64) -> 'NumpyScoringMatrix':
+        """
+        Initialise the scoring matrix for the Needleman-Wunsch algorithm.
+        :return: Scoring matrix for the Needleman-Wunsch algorithm.
+        """
+        matrix = cls(top_sequence, bottom_sequence, dtype)
+        matrix.init_needleman_wunsch(gap_penalty)
+        return matrix
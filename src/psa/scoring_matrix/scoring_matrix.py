@@ -1,11 +1,24 @@
 from typing import Union, Tuple
 
+import numpy as np
+
 from psa.enums import Direction
 
+DIRECTION_BITS = {
+    Direction.DIAGONAL: 1,
+    Direction.UP: 2,
+    Direction.LEFT: 4,
+}
+
+# Decoded tracebacks for every combination of bit flags
+TRACEBACKS = [[direction for direction, bit in DIRECTION_BITS.items() if flags & bit] for flags in range(8)]
+
 
 class ScoringMatrix(list):
     """
     Class for the scoring matrix.
+
+    The scores are stored as a list of rows, the tracebacks as bit flags in a uint8 numpy plane.
     """
 
     def __init__(self, top_sequence: str, bottom_sequence: str, *args, **kwargs):
@@ -17,6 +30,8 @@ class ScoringMatrix(list):
         super().__init__(*args, **kwargs)
         self.top_sequence = top_sequence
         self.bottom_sequence = bottom_sequence
+        self.gap_scores: dict[Direction, list[list[Union[int, float]]]] = {}
+        self.tracebacks: np.ndarray = None
 
     def width(self) -> int:
         return len(self.top_sequence) + 1
@@ -47,16 +62,16 @@ class ScoringMatrix(list):
         :param y: Column index.
         :return: Score for the matrix entry.
         """
-        return self[x][y][0]
+        return self[x][y]
 
     def get_traceback(self, x: int, y: int) -> list[Direction]:
         """
-        Get the traceback for a matrix entry.
+        Get the traceback for a matrix entry, decoded from its bit flags.
         :param x: Row index.
         :param y: Column index.
         :return: Traceback for the matrix entry.
         """
-        return self[x][y][1]
+        return list(TRACEBACKS[self.tracebacks[x, y]])
 
     def set_score(self, x: int, y: int, score: Union[int, float]):
         """
@@ -65,7 +80,7 @@ class ScoringMatrix(list):
         :param y: Column index.
         :param score: Score for the matrix entry.
         """
-        self[x][y][0] = score
+        self[x][y] = score
 
     def set_traceback(self, x: int, y: int, traceback: list[Direction]):
         """
@@ -74,16 +89,43 @@ class ScoringMatrix(list):
         :param y: Column index.
         :param traceback: Traceback for the matrix entry.
         """
-        self[x][y][1] = traceback
+        self.tracebacks[x, y] = sum(DIRECTION_BITS[direction] for direction in set(traceback))
 
     def add_traceback(self, x: int, y: int, traceback: Direction):
         """
-        Add a traceback to the traceback list for a matrix entry.
+        Add a traceback to the traceback flags for a matrix entry.
         :param x: Row index.
         :param y: Column index.
         :param traceback: Traceback to be added.
         """
-        self[x][y][1].append(traceback)
+        self.tracebacks[x, y] |= DIRECTION_BITS[traceback]
+
+    def get_gap_score(self, x: int, y: int, direction: Direction) -> Union[int, float]:
+        """
+        Get the score of the best path ending in a gap for a matrix entry (the insert/delete states of Gotoh).
+        :param x: Row index.
+        :param y: Column index.
+        :param direction: Direction of the gap, UP or LEFT.
+        :return: Score of the best path ending in a gap in the given direction.
+        """
+        return self.gap_scores[direction][x][y]
+
+    def set_gap_score(self, x: int, y: int, direction: Direction, score: Union[int, float]):
+        """
+        Set the score of the best path ending in a gap for a matrix entry.
+        :param x: Row index.
+        :param y: Column index.
+        :param direction: Direction of the gap, UP or LEFT.
+        :param score: Score of the best path ending in a gap in the given direction.
+        """
+        self.gap_scores[direction][x][y] = score
+
+    def init_gap_scores(self) -> None:
+        """
+        Initialise the gap states, no path ends in a gap before it is calculated.
+        """
+        self.gap_scores = {direction: [[float('-inf')] * self.width() for _ in range(self.height())]
+                           for direction in (Direction.UP, Direction.LEFT)}
 
     def max_score_index(self) -> Tuple[int, int]:
         """
@@ -145,7 +187,7 @@ class ScoringMatrix(list):
                 matrix_string += '\t'
             else:
                 matrix_string += f"{self.bottom_sequence[i - 1]}\t"
-            matrix_string += '\t'.join([f"{int(entry[0])}" for entry in self[i]]) + '\n'
+            matrix_string += '\t'.join([f"{int(score)}" for score in self[i]]) + '\n'
 
         return matrix_string
 
@@ -155,9 +197,9 @@ class ScoringMatrix(list):
         """
         self.clear()
         for i in range(self.height()):
-            self.append([])
-            for j in range(self.width()):
-                self[i].append([0, []])
+            self.append([0] * self.width())
+        self.tracebacks = np.zeros((self.height(), self.width()), dtype=np.uint8)
+        self.init_gap_scores()
 
     @classmethod
     def smith_waterman(cls, top_sequence: str, bottom_sequence: str) -> 'ScoringMatrix':
@@ -175,9 +217,9 @@ class ScoringMatrix(list):
         """
         self.clear()
         for i in range(self.height()):
-            self.append([])
-            for j in range(self.width()):
-                self[i].append([0, []])
+            self.append([0] * self.width())
+        self.tracebacks = np.zeros((self.height(), self.width()), dtype=np.uint8)
+        self.init_gap_scores()
 
         for i in range(self.height()):
             self.set_score(i, 0, i * gap_penalty)
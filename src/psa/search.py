@@ -0,0 +1,131 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait, Future
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union, Set
+
+from psa.psa_solver import PSASolver
+
+# Solver and query of a worker process, set once by the pool initialiser so they are not sent with every chunk
+_worker_solver: Optional[PSASolver] = None
+_worker_query: Optional[str] = None
+
+
+class SearchHit(NamedTuple):
+    """
+    Database entry aligned against the query.
+    """
+    sequence_id: str
+    score: Union[int, float]
+    start: Optional[Tuple[int, int]]
+    end: Tuple[int, int]
+
+
+def search(solver: PSASolver, query: str, database: Iterable[Tuple[str, str]], top: int = 10,
+           workers: Optional[int] = None, chunk_size: int = 64) -> List[SearchHit]:
+    """
+    Score a query against every entry of a database, and keep the best scoring entries.
+
+    The database is read lazily and submitted in chunks to a process pool, with only a few chunks in flight per
+    worker. Hits are merged into a bounded heap as chunks complete, so neither the database nor all of its scores are
+    ever held in memory. Ties are ranked in database order. Entries are only scored forward, and the start positions
+    are located for the best hits once they are known.
+    :param solver: Solver with a score method, e.g. a SmithWatermanPSASolver.
+    :param query: Query sequence, passed as the first sequence to the solver.
+    :param database: Iterable of (sequence id, sequence) tuples, e.g. from parse_generator.
+    :param top: Number of hits to keep.
+    :param workers: Number of worker processes, all cores if None. A single worker scores in this process.
+    :param chunk_size: Number of database entries per task.
+    :return: The best hits, best first.
+    """
+    if top < 1:
+        raise ValueError(f"Number of hits to keep must be at least 1, got {top}")
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(enumerate(database), chunk_size)
+    best_hits = []
+
+    if workers == 1:
+        _init_worker(solver, query)
+        for chunk in chunks:
+            _merge_hits(best_hits, _score_chunk(chunk), top)
+        return _ranked(solver, query, best_hits)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(solver, query)) as executor:
+        pending: Set[Future] = set()
+        for chunk in chunks:
+            pending.add(executor.submit(_score_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _merge_hits(best_hits, future.result(), top)
+        for future in pending:
+            _merge_hits(best_hits, future.result(), top)
+
+    return _ranked(solver, query, best_hits)
+
+
+def _chunks(entries: Iterable[Tuple[int, Tuple[str, str]]], chunk_size: int) -> Iterator[
+        List[Tuple[int, Tuple[str, str]]]]:
+    """
+    Split numbered database entries into chunks.
+    :param entries: Iterable of (position, (sequence id, sequence)) tuples.
+    :param chunk_size: Number of entries per chunk.
+    :return: Iterator over lists of entries.
+    """
+    entries = iter(entries)
+    while chunk := list(islice(entries, chunk_size)):
+        yield chunk
+
+
+def _init_worker(solver: PSASolver, query: str) -> None:
+    """
+    Set the solver and query of a worker process.
+    :param solver: Solver with a score method.
+    :param query: Query sequence.
+    """
+    global _worker_solver, _worker_query
+    _worker_solver, _worker_query = solver, query
+
+
+def _score_chunk(chunk: List[Tuple[int, Tuple[str, str]]]) -> List[Tuple[int, SearchHit, str]]:
+    """
+    Score the query against a chunk of database entries, without locating the starts of the alignments.
+    :param chunk: List of (position, (sequence id, sequence)) tuples.
+    :return: List of (position, hit, sequence) tuples.
+    """
+    hits = []
+    for position, (sequence_id, sequence) in chunk:
+        score, start, end = _worker_solver.score(_worker_query, sequence)
+        hits.append((position, SearchHit(sequence_id, score, start, end), sequence))
+    return hits
+
+
+def _merge_hits(best_hits: List[Tuple[Union[int, float], int, SearchHit, str]],
+                hits: List[Tuple[int, SearchHit, str]], top: int) -> None:
+    """
+    Merge hits into a heap of the best hits, which has the worst of them first.
+    :param best_hits: Heap of (score, negated position, hit, sequence) tuples.
+    :param hits: List of (position, hit, sequence) tuples.
+    :param top: Number of hits to keep.
+    """
+    for position, hit, sequence in hits:
+        if len(best_hits) < top:
+            heapq.heappush(best_hits, (hit.score, -position, hit, sequence))
+        elif (hit.score, -position) > best_hits[0][:2]:
+            heapq.heapreplace(best_hits, (hit.score, -position, hit, sequence))
+
+
+def _ranked(solver: PSASolver, query: str, best_hits: List[Tuple[Union[int, float], int, SearchHit, str]]) -> List[
+        SearchHit]:
+    """
+    Rank the best hits, and locate the starts of their alignments.
+    :param solver: Solver with a score method.
+    :param query: Query sequence.
+    :param best_hits: Heap of (score, negated position, hit, sequence) tuples.
+    :return: The hits, best first.
+    """
+    ranked = []
+    for _, _, hit, sequence in sorted(best_hits, key=lambda entry: entry[:2], reverse=True):
+        _, start, end = solver.score(query, sequence, locate_start=True)
+        ranked.append(hit._replace(start=start, end=end))
+    return ranked
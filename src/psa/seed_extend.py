@@ -0,0 +1,247 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from fasta_parser.fasta_parser import parse_generator
+from psa.banded import fill_banded
+from psa.scoring_matrix.banded_scoring_matrix import BandedScoringMatrix
+from psa.search import SearchHit
+from psa.smith_waterman import SmithWatermanPSASolver
+
+
+class KmerIndex:
+    """
+    Index of every k-mer (word of k characters) of a sequence database, with the positions it occurs at.
+    """
+
+    def __init__(self, database: Iterable[Tuple[str, str]], word_size: int = 3):
+        """
+        Build the index.
+        :param database: Iterable of (sequence id, sequence) tuples, e.g. from parse_generator.
+        :param word_size: Number of characters per word.
+        """
+        if word_size < 1:
+            raise ValueError("Word size must be at least 1")
+        self.word_size = word_size
+        self.sequence_ids: List[str] = []
+        self.sequences: List[str] = []
+
+        positions = defaultdict(list)
+        for sequence_index, (sequence_id, sequence) in enumerate(database):
+            self.sequence_ids.append(sequence_id)
+            self.sequences.append(sequence)
+            for position in range(len(sequence) - word_size + 1):
+                positions[sequence[position:position + word_size]].append((sequence_index, position))
+
+        # Stored as (sequence index, position) arrays, which take far less memory than lists of tuples
+        self.positions: Dict[str, np.ndarray] = {word: np.array(occurrences, dtype=np.int64)
+                                                 for word, occurrences in positions.items()}
+
+    @classmethod
+    def from_fasta(cls, fasta_file: str, word_size: int = 3) -> 'KmerIndex':
+        """
+        Build the index over a fasta file, which is read one sequence at a time.
+        :param fasta_file: Path to the fasta file.
+        :param word_size: Number of characters per word.
+        :return: The index.
+        """
+        return cls(parse_generator(fasta_file), word_size)
+
+    def __len__(self) -> int:
+        return len(self.sequences)
+
+    def lookup(self, word: str) -> np.ndarray:
+        """
+        Find where a word occurs in the database.
+        :param word: Word to look up.
+        :return: Array of (sequence index, position) rows.
+        """
+        return self.positions.get(word, np.empty((0, 2), dtype=np.int64))
+
+
+class SeedExtendStatistics(NamedTuple):
+    """
+    Number of candidates left after every stage of a seed-and-extend search.
+    """
+    sequences: int
+    seeded_sequences: int
+    seeds: int
+    extended_seeds: int
+    ungapped_hits: int
+    gapped_alignments: int
+    hits: int
+
+    def stages(self) -> List[Tuple[str, int, int]]:
+        """
+        Describe the stages of the search.
+        :return: List of (stage, candidates kept, candidates pruned) tuples.
+        """
+        return [
+            ("sequences with a seed", self.seeded_sequences, self.sequences - self.seeded_sequences),
+            ("seeds off extended diagonals", self.extended_seeds, self.seeds - self.extended_seeds),
+            ("ungapped extensions above the threshold", self.ungapped_hits, self.extended_seeds - self.ungapped_hits),
+            ("gapped alignments", self.gapped_alignments, self.ungapped_hits - self.gapped_alignments),
+            ("hits reported", self.hits, self.gapped_alignments - self.hits),
+        ]
+
+
+def seed_and_extend(solver: SmithWatermanPSASolver, query: str, index: KmerIndex, top: int = 10,
+                    x_drop: Union[int, float] = 20, ungapped_threshold: Union[int, float] = 20,
+                    band: int = 16) -> Tuple[List[SearchHit], SeedExtendStatistics]:
+    """
+    Search a database for the best local alignments of a query with the seed-and-extend heuristic.
+
+    Every word of the query that occurs in the database is a seed. A seed is extended along its diagonal in both
+    directions without gaps, until the score drops more than x_drop below the best score so far. Seeds on a part of a
+    diagonal that was already extended are skipped. For every sequence with an ungapped extension of at least
+    ungapped_threshold, the best one is aligned with gaps by banded Smith-Waterman, within band diagonals of its own
+    diagonal. Scores use the substitution matrix and gap penalties of the solver, but are not guaranteed to be optimal.
+    :param solver: Solver to take the scoring from.
+    :param query: Query sequence, the first sequence of the alignments.
+    :param index: K-mer index of the database.
+    :param top: Number of hits to keep.
+    :param x_drop: How far the score of an ungapped extension may drop below its best score.
+    :param ungapped_threshold: Lowest score of an ungapped extension that is aligned with gaps.
+    :param band: Band half-width of the gapped alignments.
+    :return: The best hits, best first and in database order for ties, and the candidates left after every stage.
+    """
+    word_size = index.word_size
+    query_codes = solver.encode(query)
+
+    # Seeds per sequence, as (query position, sequence position) pairs in query order
+    seeds = defaultdict(list)
+    for query_position in range(len(query) - word_size + 1):
+        for sequence_index, position in index.lookup(query[query_position:query_position + word_size]):
+            seeds[int(sequence_index)].append((query_position, int(position)))
+
+    extended_seeds, ungapped_hits, alignments = 0, 0, []
+    for sequence_index, sequence_seeds in sorted(seeds.items()):
+        target_codes = solver.encode(index.sequences[sequence_index])
+        table = solver.substitution_table
+
+        # Query position up to which every diagonal was already extended
+        extended_until = {}
+        best_extension = None
+        for query_position, position in sequence_seeds:
+            diagonal = position - query_position
+            if extended_until.get(diagonal, -1) > query_position:
+                continue
+            extended_seeds += 1
+
+            score, query_start, query_end = _extend_ungapped(query_codes, target_codes, table, query_position,
+                                                             position, word_size, x_drop)
+            extended_until[diagonal] = query_end
+            if score >= ungapped_threshold:
+                ungapped_hits += 1
+                if best_extension is None or score > best_extension[0]:
+                    best_extension = (score, query_start, query_end, diagonal)
+
+        if best_extension is not None:
+            _, query_start, query_end, diagonal = best_extension
+            score, start, end = _align_banded(solver, query_codes, target_codes, query_start, query_end, diagonal,
+                                              band)
+            alignments.append(SearchHit(index.sequence_ids[sequence_index], score, start, end))
+
+    hits = sorted(alignments, key=lambda hit: hit.score, reverse=True)[:top]
+    statistics = SeedExtendStatistics(len(index), len(seeds), sum(len(value) for value in seeds.values()),
+                                      extended_seeds, ungapped_hits, len(alignments), len(hits))
+    return hits, statistics
+
+
+def _x_drop(scores: np.ndarray, x_drop: Union[int, float]) -> Tuple[Union[int, float], int]:
+    """
+    Find the best prefix of an ungapped extension, stopping where the score drops too far below the best score.
+    :param scores: Substitution scores along the diagonal, in the direction of the extension.
+    :param x_drop: How far the score may drop below the best score so far.
+    :return: The best score gain and the length of the prefix reaching it.
+    """
+    totals = np.concatenate(([0], np.cumsum(scores)))
+    dropped = np.flatnonzero(np.maximum.accumulate(totals) - totals > x_drop)
+    if len(dropped):
+        totals = totals[:dropped[0]]
+    length = int(np.argmax(totals))
+    return totals[length].item(), length
+
+
+def _extend_ungapped(query_codes: np.ndarray, target_codes: np.ndarray, table: np.ndarray, query_position: int,
+                     position: int, word_size: int, x_drop: Union[int, float]) -> Tuple[Union[int, float], int, int]:
+    """
+    Extend a seed along its diagonal without gaps, in both directions.
+    :param query_codes: Encoded query.
+    :param target_codes: Encoded database sequence.
+    :param table: Dense substitution table.
+    :param query_position: Start of the seed in the query.
+    :param position: Start of the seed in the database sequence.
+    :param word_size: Length of the seed.
+    :param x_drop: How far the score may drop below the best score so far.
+    :return: The score, and the query start and end positions of the extension.
+    """
+    seed_score = table[query_codes[query_position:query_position + word_size],
+                       target_codes[position:position + word_size]].sum().item()
+
+    right = min(len(query_codes) - query_position, len(target_codes) - position) - word_size
+    right_scores = table[query_codes[query_position + word_size:query_position + word_size + right],
+                         target_codes[position + word_size:position + word_size + right]]
+    right_score, right_length = _x_drop(right_scores, x_drop)
+
+    left = min(query_position, position)
+    left_scores = table[query_codes[query_position - left:query_position][::-1],
+                        target_codes[position - left:position][::-1]]
+    left_score, left_length = _x_drop(left_scores, x_drop)
+
+    return seed_score + right_score + left_score, query_position - left_length, \
+        query_position + word_size + right_length
+
+
+def _banded_local_score(solver: SmithWatermanPSASolver, query_codes: np.ndarray,
+                        target_codes: np.ndarray, band: int) -> Tuple[Union[int, float], Tuple[int, int]]:
+    """
+    Calculate the best local alignment score of a query and database segment, within a band around the diagonal.
+    :param solver: Solver to take the scoring from.
+    :param query_codes: Encoded query segment, along the columns.
+    :param target_codes: Encoded database segment, along the rows.
+    :param band: Band half-width.
+    :return: The score and the first scoring matrix entry (in row-major order) with it.
+    """
+    # The banded scoring matrix only uses the sequences for their lengths
+    matrix = BandedScoringMatrix.smith_waterman(' ' * len(query_codes), ' ' * len(target_codes), band,
+                                                dtype=solver.score_dtype)
+    fill_banded(matrix, solver.substitution_table, query_codes, target_codes, solver.gap_open, solver.gap_extend,
+                local=True)
+    end = matrix.max_score_index()
+    return matrix.get_score(*end), end
+
+
+def _align_banded(solver: SmithWatermanPSASolver, query_codes: np.ndarray, target_codes: np.ndarray,
+                  query_start: int, query_end: int, diagonal: int,
+                  band: int) -> Tuple[Union[int, float], Optional[Tuple[int, int]], Tuple[int, int]]:
+    """
+    Align the query and a database sequence with gaps, within a band around the diagonal of an ungapped extension.
+
+    The segments run along the diagonal as far as both sequences allow, so the diagonal of the extension is the main
+    diagonal of their scoring matrix.
+    :param solver: Solver to take the scoring from.
+    :param query_codes: Encoded query.
+    :param target_codes: Encoded database sequence.
+    :param query_start: Query start position of the extension.
+    :param query_end: Query end position of the extension.
+    :param diagonal: Database position minus query position along the extension.
+    :param band: Band half-width.
+    :return: The score, and the start and end entries of the alignment as (database, query) indices of a scoring matrix
+    over the full sequences, as returned by SmithWatermanPSASolver.score.
+    """
+    before = min(query_start, query_start + diagonal)
+    after = min(len(query_codes) - query_end, len(target_codes) - query_end - diagonal)
+    query_offset, target_offset = query_start - before, query_start - before + diagonal
+    query_segment = query_codes[query_offset:query_end + after]
+    target_segment = target_codes[target_offset:query_end + after + diagonal]
+
+    score, (x, y) = _banded_local_score(solver, query_segment, target_segment, band)
+    end = (target_offset + x, query_offset + y)
+    if score <= 0:
+        return score, None, end
+
+    # The best alignment ending at the end entry, read backwards, starts where the original alignment started
+    _, (reverse_x, reverse_y) = _banded_local_score(solver, query_segment[:y][::-1], target_segment[:x][::-1], band)
+    return score, (end[0] - reverse_x + 1, end[1] - reverse_y + 1), end
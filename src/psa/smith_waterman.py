@@ -1,14 +1,22 @@
-from typing import Tuple, Union, Optional, List, Callable
+from typing import Tuple, Union, Optional, List, Callable, Iterator, FrozenSet
 
-from psa.enums import Direction
+from psa.enums import Direction, Engine
+from psa.linear_space import last_row, best_local_score
 from psa.psa_solver import PSASolver
+from psa.row_fill import fill_rows
+from psa.scoring_matrix.memmap_scoring_matrix import MemmapScoringMatrix
+from psa.scoring_matrix.numpy_scoring_matrix import NumpyScoringMatrix
 from psa.scoring_matrix.scoring_matrix import ScoringMatrix
+from psa.waterman_eggert import LocalAlignment, waterman_eggert
+from psa.wavefront import fill_wavefront
 
 
 class SmithWatermanPSASolver(PSASolver):
     """
     Smith-Waterman solver for the PSA problem.
     """
+    add_zero_score = True
+    supported_engines = (Engine.PYTHON, Engine.WAVEFRONT)
 
     def __init__(self, config: dict, substitution_matrix: Optional[dict] = None, *args, **kwargs):
         """
@@ -24,6 +32,22 @@ class SmithWatermanPSASolver(PSASolver):
         Return the scoring matrix class to use.
         :return: Scoring matrix class.
         """
+        if self.memmap_threshold is not None:
+            return lambda top_sequence, bottom_sequence: MemmapScoringMatrix.smith_waterman(
+                top_sequence, bottom_sequence, dtype=self.score_dtype, scratch_dir=self.scratch_dir) \
+                if self.use_memmap(top_sequence, bottom_sequence) else self.in_memory_matrix_cls(top_sequence,
+                                                                                                 bottom_sequence)
+        return self.in_memory_matrix_cls
+
+    @property
+    def in_memory_matrix_cls(self) -> Callable:
+        """
+        Return the scoring matrix class to use for matrices that are kept in memory.
+        :return: Scoring matrix class.
+        """
+        if self.engine == Engine.WAVEFRONT:
+            return lambda top_sequence, bottom_sequence: NumpyScoringMatrix.smith_waterman(
+                top_sequence, bottom_sequence, dtype=self.score_dtype)
         return ScoringMatrix.smith_waterman
 
     def get_starting_points(self) -> List[Tuple[int, int]]:
@@ -37,8 +61,19 @@ class SmithWatermanPSASolver(PSASolver):
         """
         Calculate the scoring matrix.
         """
+        if isinstance(self.scoring_matrix, MemmapScoringMatrix):
+            self.calculate_scoring_matrix_rows()
+            return
+        if self.engine == Engine.WAVEFRONT:
+            self.calculate_scoring_matrix_wavefront()
+            return
+
+        # Substitution scores are looked up once for the whole matrix, as nested lists for fast access per entry
+        self.substitutions = self.substitution_scores(self.scoring_matrix.top_sequence,
+                                                      self.scoring_matrix.bottom_sequence).tolist()
         for i in range(self.scoring_matrix.height()):
             for j in range(self.scoring_matrix.width()):
+                self.calc_gap_scores(i, j)
                 scores = self.calc_matrix_score(i, j)
                 max_score = max(scores)
                 self.scoring_matrix.set_score(i, j, max_score)
@@ -50,10 +85,83 @@ class SmithWatermanPSASolver(PSASolver):
                     if max_score == scores[2]:
                         self.scoring_matrix.add_traceback(i, j, Direction.LEFT)
 
-    def _solve(self) -> Tuple[int, List[Tuple[str, str]]]:
+    def calculate_scoring_matrix_wavefront(self) -> None:
+        """
+        Calculate the scoring matrix one anti-diagonal at a time with numpy.
+        """
+        top_codes = self.encode(self.scoring_matrix.top_sequence)
+        bottom_codes = self.encode(self.scoring_matrix.bottom_sequence)
+        fill_wavefront(self.scoring_matrix, self.substitution_table, top_codes, bottom_codes, self.gap_open,
+                       self.gap_extend, local=self.add_zero_score)
+
+    def calculate_scoring_matrix_rows(self) -> None:
+        """
+        Calculate the scoring matrix one row at a time with numpy, reading and writing its planes sequentially.
+        """
+        top_codes = self.encode(self.scoring_matrix.top_sequence)
+        bottom_codes = self.encode(self.scoring_matrix.bottom_sequence)
+        fill_rows(self.scoring_matrix, self.substitution_table, top_codes, bottom_codes, self.gap_open, self.gap_extend,
+                  local=self.add_zero_score)
+
+    def score(self, sequence_1: str, sequence_2: str, locate_start: bool = False) -> Tuple[
+        Union[int, float], Optional[Tuple[int, int]], Tuple[int, int]]:
+        """
+        Calculate the best alignment score without storing a scoring matrix or tracebacks, keeping only two rows.
+
+        Local alignments report the first entry (in row-major order) with the best score as the end cell. Global
+        alignments always end in the bottom right corner and never locate a start cell. Opening a gap has to be at least
+        as expensive as extending one.
+        :param sequence_1: The first sequence.
+        :param sequence_2: The second sequence.
+        :param locate_start: Whether to also find where a local alignment starts, with a second pass over the reversed
+        sequences.
+        :return: The score, the start cell (None if not located) and the end cell, as (row, column) indices of the
+        scoring matrix.
+        """
+        codes_1, codes_2 = self.encode(sequence_1), self.encode(sequence_2)
+        table = self.substitution_table
+
+        # Global scores only need the corner, so the rows run along the longer sequence and only rows as long as the
+        # shorter sequence are stored
+        if not self.add_zero_score:
+            if len(sequence_2) >= len(sequence_1):
+                scores, _ = last_row(codes_2, codes_1, table, self.gap_open, self.gap_extend, self.gap_open,
+                                     self.score_dtype)
+            else:
+                scores, _ = last_row(codes_1, codes_2, table.T, self.gap_open, self.gap_extend, self.gap_open,
+                                     self.score_dtype)
+            return scores[-1].item(), None, (len(sequence_2), len(sequence_1))
+
+        score, end = best_local_score(codes_2, codes_1, table, self.gap_open, self.gap_extend, self.score_dtype)
+
+        if not locate_start or score == 0:
+            return score, None, end
+
+        # The best alignment ending at the end cell, read backwards, starts where the original alignment started
+        _, _, reverse_end = self.score(sequence_1[:end[1]][::-1], sequence_2[:end[0]][::-1])
+        start = (end[0] - reverse_end[0] + 1, end[1] - reverse_end[1] + 1)
+        return score, start, end
+
+    def top_alignments(self, sequence_1: str, sequence_2: str, count: int) -> List[LocalAlignment]:
+        """
+        Find the best local alignments that do not align the same pair of characters, e.g. repeated domains, with
+        Waterman-Eggert declumping. Only the part of the scoring matrix that depends on an alignment is recalculated
+        after it is found.
+        :param sequence_1: The first sequence.
+        :param sequence_2: The second sequence.
+        :param count: Maximum number of alignments.
+        :return: The alignments, best first, with their start and end cells as (row, column) indices of the scoring
+        matrix.
+        """
+        if not self.add_zero_score:
+            raise ValueError("Only local alignments can be declumped")
+        return waterman_eggert(self.substitution_scores(sequence_1, sequence_2), sequence_1, sequence_2,
+                               self.gap_open, self.gap_extend, count, self.score_dtype)
+
+    def _solve(self) -> Tuple[int, Iterator[Tuple[str, str]]]:
         """
         Solve the PSA problem.
-        :return: Tuple containing the score and a list of valid alignments.
+        :return: Tuple containing the score and an iterator over the valid alignments.
         """
         # Calculate the scoring matrix
         self.calculate_scoring_matrix()
@@ -63,12 +171,129 @@ class SmithWatermanPSASolver(PSASolver):
 
         score = max([self.scoring_matrix.get_score(x, y) for x, y in potential_starting_points])
 
-        # Run traceback for each potential starting point
-        results = []
-        for starting_point in potential_starting_points:
-            results += self.traceback(starting_point[0], starting_point[1])
+        return score, self.iter_alignments(potential_starting_points)
 
-        return score, results
+    def iter_alignments(self, starting_points: List[Tuple[int, int]]) -> Iterator[Tuple[str, str]]:
+        """
+        Run the traceback for each starting point in turn, skipping alignments that were already found from an earlier
+        starting point.
+        :param starting_points: Starting points of the traceback.
+        :return: Iterator over the alignments.
+        """
+        found = set()
+        for starting_point in starting_points:
+            for alignment in self.traceback(starting_point[0], starting_point[1]):
+                if alignment not in found:
+                    found.add(alignment)
+                    yield alignment
+
+    def _count_alignments(self) -> Tuple[Union[int, float], int]:
+        """
+        Count the optimal alignments of the PSA problem.
+        :return: The score and the number of optimal alignments.
+        """
+        self.calculate_scoring_matrix()
+        potential_starting_points = self.get_starting_points()
+        score = max([self.scoring_matrix.get_score(x, y) for x, y in potential_starting_points])
+        return score, self.count_paths(potential_starting_points)
+
+    def count_paths(self, starting_points: List[Tuple[int, int]]) -> int:
+        """
+        Count the distinct alignments from the starting points with dynamic programming over the traceback graph.
+
+        A node is an entry, or an entry in one of the gap states. Different paths can spell the same alignment, from
+        different starting points of a local alignment or through a gap that can both open and extend, and the
+        traceback only produces such an alignment once. The graph is therefore made deterministic first: a state is the
+        set of nodes reached by the same aligned characters, and the number of alignments from a state is one if the
+        traceback can end in any of its nodes, plus the number from every state its next characters lead to. Only the
+        states reachable from the starting points are visited, and without such ties every state is a single entry.
+        :param starting_points: Starting points of the traceback.
+        :return: The number of distinct alignments, as an exact integer.
+        """
+        start = self.traceback_closure([(x, y, None) for x, y in starting_points])
+        transitions = {}
+        stack = [start]
+        while stack:
+            state = stack.pop()
+            if state in transitions:
+                continue
+            ends, following_nodes = False, {}
+            for node in state:
+                successors = self.traceback_successors(*node)
+                if successors is None:
+                    ends = True
+                    continue
+                for successor in successors:
+                    chars = self.traceback_chars(*node, successor[2])
+                    if chars is not None:
+                        following_nodes.setdefault(chars, []).append(successor)
+            transitions[state] = ends, [self.traceback_closure(nodes) for nodes in following_nodes.values()]
+            stack.extend(transitions[state][1])
+
+        # Every step of the traceback aligns at least one character, so it only leads to states earlier in the matrix
+        alignment_counts = {}
+        for state in sorted(transitions, key=lambda state: max(x + y for x, y, _ in state)):
+            ends, following_states = transitions[state]
+            alignment_counts[state] = int(ends) + sum(alignment_counts[following] for following in following_states)
+
+        return alignment_counts[start]
+
+    def traceback_closure(self, nodes: List[Tuple[int, int, Optional[Direction]]]) -> FrozenSet[
+            Tuple[int, int, Optional[Direction]]]:
+        """
+        Add the gap states that the entries among the nodes lead to without aligning any characters.
+        :param nodes: Traceback nodes.
+        :return: The nodes and the gap states they lead to.
+        """
+        closure = set(nodes)
+        for x, y, direction in nodes:
+            if direction is None:
+                closure.update(successor for successor in self.traceback_successors(x, y, None) or []
+                               if successor[2] is not None)
+        return frozenset(closure)
+
+    def traceback_successors(self, x: int, y: int, direction: Optional[Direction]) -> Optional[
+        List[Tuple[int, int, Optional[Direction]]]]:
+        """
+        Find the traceback nodes a node leads to.
+        :param x: Row index.
+        :param y: Column index.
+        :param direction: Gap state of the node, UP or LEFT, or None for the entry itself.
+        :return: The following nodes, or None if the traceback ends in this node.
+        """
+        if direction is None:
+            if self.reached_stopping_condition(x, y):
+                return None
+            return [(x - 1, y - 1, None) if traceback == Direction.DIAGONAL else (x, y, traceback)
+                    for traceback in self.scoring_matrix.get_traceback(x, y)]
+
+        previous_x, previous_y = x + direction.value[0], y + direction.value[1]
+        successors = []
+        if self.gap_opens(x, y, direction):
+            successors.append((previous_x, previous_y, None))
+        if self.gap_extends(x, y, direction):
+            successors.append((previous_x, previous_y, direction))
+        return successors
+
+    def calc_gap_scores(self, x: int, y: int) -> None:
+        """
+        Calculate the scores of the gap states for a matrix entry, following Gotoh.
+
+        A gap either opens from the best path of the previous entry, or extends the gap ending there, so every entry
+        only needs to look one step back instead of scanning its whole row and column.
+        :param x: Row index.
+        :param y: Column index.
+        """
+        if x > 0:
+            self.scoring_matrix.set_gap_score(x, y, Direction.UP, max(
+                self.scoring_matrix.get_score(x - 1, y) + self.gap_open,
+                self.scoring_matrix.get_gap_score(x - 1, y, Direction.UP) + self.gap_extend
+            ))
+        if y > 0:
+            self.scoring_matrix.set_gap_score(x, y, Direction.LEFT, max(
+                self.scoring_matrix.get_score(x, y - 1) + self.gap_open,
+                self.scoring_matrix.get_gap_score(x, y - 1, Direction.LEFT) + self.gap_extend
+            ))
 
     def calc_matrix_score(self, x: int, y: int) -> list[Union[int, float]]:
         """
@@ -80,43 +305,98 @@ class SmithWatermanPSASolver(PSASolver):
         if x == 0 or y == 0:
             return [0]
         return [
-            self.scoring_matrix.get_score(x - 1, y - 1) + self.scoring_function(self.scoring_matrix.bottom_char(x),
-                                                                                self.scoring_matrix.top_char(y)),
-            max([self.scoring_matrix.get_score(x - i, y) + self.gap_penalty(i) for i in range(1, x + 1)]),
-            max([self.scoring_matrix.get_score(x, y - j) + self.gap_penalty(j) for j in range(1, y + 1)]),
+            self.scoring_matrix.get_score(x - 1, y - 1) + self.substitutions[x - 1][y - 1],
+            self.scoring_matrix.get_gap_score(x, y, Direction.UP),
+            self.scoring_matrix.get_gap_score(x, y, Direction.LEFT),
             0
         ]
 
-    def traceback(self, x: int, y: int) -> list[tuple[str, str]]:
+    def reached_stopping_condition(self, x: int, y: int) -> bool:
         """
-        Recursively find all valid paths.
+        Check if the traceback has reached its end.
         :param x: Row index.
         :param y: Column index.
-        :return: A list of tuples with alignments.
+        :return: True if the stopping condition has been reached, False otherwise.
         """
         if x == 0 or y == 0:
-            return [('', '')]
-
-        if len(self.scoring_matrix.get_traceback(x, y)) == 0:
-            return [('', '')]
-
-        # Follow the traceback path
-        new_paths = []
-        for direction in self.scoring_matrix.get_traceback(x, y):
-            if direction == Direction.DIAGONAL:
-                paths = self.traceback(x - 1, y - 1)
-                for alignment in paths:
-                    new_paths.append((alignment[0] + self.scoring_matrix.top_char(y),
-                                      alignment[1] + self.scoring_matrix.bottom_char(x)))
-
-            elif direction == Direction.UP:
-                paths = self.traceback(x - 1, y)
-                for alignment in paths:
-                    new_paths.append((alignment[0] + '-', alignment[1] + self.scoring_matrix.bottom_char(x)))
-
-            elif direction == Direction.LEFT:
-                paths = self.traceback(x, y - 1)
-                for alignment in paths:
-                    new_paths.append((alignment[0] + self.scoring_matrix.top_char(y), alignment[1] + '-'))
-
-        return list(set(new_paths))
+            return True
+
+        return len(self.scoring_matrix.get_traceback(x, y)) == 0
+
+    def gap_opens(self, x: int, y: int, direction: Direction) -> bool:
+        """
+        Check if the gap ending in a matrix entry can have been opened from the previous entry.
+        :param x: Row index.
+        :param y: Column index.
+        :param direction: Direction of the gap, UP or LEFT.
+        :return: True if the gap can have been opened from the previous entry.
+        """
+        if not self.affine:
+            return True
+        previous_x, previous_y = x + direction.value[0], y + direction.value[1]
+        return self.scoring_matrix.get_score(previous_x, previous_y) + self.gap_open == \
+            self.scoring_matrix.get_gap_score(x, y, direction)
+
+    def gap_extends(self, x: int, y: int, direction: Direction) -> bool:
+        """
+        Check if the gap ending in a matrix entry can extend a gap ending in the previous entry.
+
+        With linear gap penalties, extending a gap is indistinguishable from opening a new one, so it is never
+        considered to avoid finding the same alignment twice.
+        :param x: Row index.
+        :param y: Column index.
+        :param direction: Direction of the gap, UP or LEFT.
+        :return: True if the gap can extend a gap ending in the previous entry.
+        """
+        if not self.affine:
+            return False
+        previous_x, previous_y = x + direction.value[0], y + direction.value[1]
+        return self.scoring_matrix.get_gap_score(previous_x, previous_y, direction) + self.gap_extend == \
+            self.scoring_matrix.get_gap_score(x, y, direction)
+
+    def traceback(self, x: int, y: int) -> Iterator[Tuple[str, str]]:
+        """
+        Find all valid paths from an entry, one at a time. Tied directions are followed in the order diagonal, up, left.
+
+        The traceback graph is walked depth first with an explicit stack, so the length of the sequences is not limited
+        by the recursion limit. The aligned characters are collected back to front in two buffers, which are cut back
+        to the length at a branching node before following its next branch, and reversed once per alignment.
+        :param x: Row index.
+        :param y: Column index.
+        :return: An iterator over tuples with alignments.
+        """
+        aligned_1, aligned_2 = [], []
+        stack = [(x, y, None, 0, None)]
+        while stack:
+            x, y, direction, length, chars = stack.pop()
+            del aligned_1[length:], aligned_2[length:]
+            if chars is not None:
+                aligned_1.append(chars[0])
+                aligned_2.append(chars[1])
+
+            successors = self.traceback_successors(x, y, direction)
+            if successors is None:
+                yield ''.join(reversed(aligned_1)), ''.join(reversed(aligned_2))
+                continue
+
+            # Pushed in reverse, so the first successor is followed first
+            for successor in reversed(successors):
+                stack.append((*successor, len(aligned_1), self.traceback_chars(x, y, direction, successor[2])))
+
+    def traceback_chars(self, x: int, y: int, direction: Optional[Direction],
+                        next_direction: Optional[Direction]) -> Optional[Tuple[str, str]]:
+        """
+        Get the aligned characters for a step of the traceback.
+        :param x: Row index.
+        :param y: Column index.
+        :param direction: Gap state of the node the step starts from, UP or LEFT, or None for the entry itself.
+        :param next_direction: Gap state of the node the step leads to.
+        :return: The aligned characters, or None if the step only enters a gap state of the same entry.
+        """
+        if direction == Direction.UP:
+            return '-', self.scoring_matrix.bottom_char(x)
+        if direction == Direction.LEFT:
+            return self.scoring_matrix.top_char(y), '-'
+        if next_direction is None:
+            return self.scoring_matrix.top_char(y), self.scoring_matrix.bottom_char(x)
+        return None
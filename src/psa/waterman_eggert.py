@@ -0,0 +1,196 @@
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from psa.enums import Direction
+from psa.linear_space import horizontal_gap_scores
+
+
+class LocalAlignment(NamedTuple):
+    """
+    Local alignment, with its start and end entries as (row, column) indices of the scoring matrix, where the rows run
+    along the second sequence and the columns along the first.
+    """
+    score: Union[int, float]
+    start: Tuple[int, int]
+    end: Tuple[int, int]
+    alignment: Tuple[str, str]
+
+
+class DeclumpingMatrix:
+    """
+    Local alignment scoring matrices for Waterman-Eggert declumping.
+
+    The best scores (H), and the best scores ending in a horizontal (E) and vertical (F) gap, are kept for every entry.
+    Entries whose characters were aligned by an earlier alignment are forbidden: they cannot be reached diagonally, so
+    no later alignment aligns the same pair of characters again.
+    """
+
+    def __init__(self, substitution_scores: np.ndarray, gap_open: Union[int, float], gap_extend: Union[int, float],
+                 dtype: type = np.int64):
+        """
+        Initialise and fill the matrices.
+        :param substitution_scores: Substitution scores, rows along the second and columns along the first sequence.
+        :param gap_open: Penalty for the first position of a gap.
+        :param gap_extend: Penalty for every further position of a gap.
+        :param dtype: Numpy type of the scores.
+        """
+        self.substitution_scores = substitution_scores
+        self.gap_open = gap_open
+        self.gap_extend = gap_extend
+        height, width = substitution_scores.shape[0] + 1, substitution_scores.shape[1] + 1
+        self.minus_infinity = -np.inf if np.issubdtype(dtype, np.floating) else np.iinfo(dtype).min // 2
+
+        self.scores = np.zeros((height, width), dtype=dtype)
+        self.left_scores = np.full((height, width), self.minus_infinity, dtype=dtype)
+        self.up_scores = np.full((height, width), self.minus_infinity, dtype=dtype)
+        self.forbidden = np.zeros((height, width), dtype=bool)
+        self.recomputed_entries = 0
+
+        for x in range(1, height):
+            self.fill_row(x, 1, width - 1)
+
+    def fill_row(self, x: int, start: int, end: int) -> Optional[Tuple[int, int]]:
+        """
+        Calculate a segment of a row of the matrices.
+        :param x: Row index.
+        :param start: First column to calculate.
+        :param end: Last column to calculate.
+        :return: The first and last column whose scores changed, or None if none did.
+        """
+        if end < start:
+            return None
+        gap_open, gap_extend = self.gap_open, self.gap_extend
+        columns = slice(start, end + 1)
+        up = np.maximum(self.scores[x - 1, columns] + gap_open, self.up_scores[x - 1, columns] + gap_extend)
+        diagonal_scores = self.scores[x - 1, start - 1:end] + self.substitution_scores[x - 1, start - 1:end]
+        diagonal_scores[self.forbidden[x, columns]] = self.minus_infinity
+        best = np.maximum(np.maximum(diagonal_scores, up), 0)
+
+        # A horizontal gap either continues from the entry left of the row segment, or opens after an entry in it
+        first_left = max(self.scores[x, start - 1] + gap_open, self.left_scores[x, start - 1] + gap_extend)
+        left = horizontal_gap_scores(best, first_left, gap_open, gap_extend)
+        row_scores = np.maximum(best, left)
+
+        changed = np.flatnonzero((row_scores != self.scores[x, columns]) | (up != self.up_scores[x, columns]) |
+                                 (left != self.left_scores[x, columns]))
+        self.scores[x, columns] = row_scores
+        self.up_scores[x, columns] = up
+        self.left_scores[x, columns] = left
+        self.recomputed_entries += len(row_scores)
+        return (start + int(changed[0]), start + int(changed[-1])) if len(changed) else None
+
+    def max_score_index(self) -> Tuple[int, int]:
+        """
+        Get the first entry, in row-major order, with the highest score.
+        :return: Row and column index of the entry.
+        """
+        return np.unravel_index(np.argmax(self.scores), self.scores.shape)
+
+    def traceback(self, x: int, y: int) -> List[Tuple[int, int, Direction]]:
+        """
+        Follow an optimal local alignment back from an entry until its score drops to zero, preferring diagonal steps
+        over horizontal and vertical gaps.
+        :param x: Row index of the end entry.
+        :param y: Column index of the end entry.
+        :return: The steps of the alignment from start to end, as the (row, column) index of the entry stepped into and
+        the direction of the step.
+        """
+        steps = []
+        state = None
+        while True:
+            if state is None:
+                score = self.scores[x, y]
+                if score <= 0:
+                    break
+                if not self.forbidden[x, y] and self.scores[x - 1, y - 1] + self.substitution_scores[x - 1, y - 1] == \
+                        score:
+                    steps.append((x, y, Direction.DIAGONAL))
+                    x, y = x - 1, y - 1
+                    continue
+                state = Direction.LEFT if score == self.left_scores[x, y] else Direction.UP
+
+            # Gaps are left for the best score as soon as they were opened from it
+            steps.append((x, y, state))
+            if state == Direction.LEFT:
+                opened = self.left_scores[x, y] == self.scores[x, y - 1] + self.gap_open
+                y -= 1
+            else:
+                opened = self.up_scores[x, y] == self.scores[x - 1, y] + self.gap_open
+                x -= 1
+            if opened:
+                state = None
+        return steps[::-1]
+
+    def forbid(self, entries: List[Tuple[int, int]]) -> None:
+        """
+        Forbid entries and recalculate the scores that depend on them.
+
+        Scores only change below and to the right of a changed entry. Every row is recalculated from the first to one
+        past the last column that changed in the row above it or holds a newly forbidden entry, and further to the right
+        for as long as its last column keeps changing. Rows below the last forbidden entry are only recalculated until
+        one does not change.
+        :param entries: (row, column) indices of the entries to forbid.
+        """
+        columns = {}
+        for x, y in entries:
+            self.forbidden[x, y] = True
+            first, last = columns.get(x, (y, y))
+            columns[x] = (min(first, y), max(last, y))
+        if not columns:
+            return
+
+        width = self.scores.shape[1]
+        last_row = max(columns)
+        changed = None
+        for x in range(min(columns), self.scores.shape[0]):
+            segments = [segment for segment in (columns.get(x),) if segment is not None]
+            if changed is not None:
+                segments.append((changed[0], min(changed[1] + 1, width - 1)))
+            if not segments:
+                if x > last_row:
+                    break
+                continue
+
+            start, end = min(segment[0] for segment in segments), max(segment[1] for segment in segments)
+            changed = self.fill_row(x, start, end)
+            while changed is not None and changed[1] == end < width - 1:
+                # Changes at the end of the segment may run on to the right through horizontal gaps
+                start, end = end + 1, min(2 * end - start + 2, width - 1)
+                extension = self.fill_row(x, start, end)
+                if extension is None:
+                    break
+                changed = (changed[0], extension[1])
+
+
+def waterman_eggert(substitution_scores: np.ndarray, sequence_1: str, sequence_2: str, gap_open: Union[int, float],
+                    gap_extend: Union[int, float], count: int, dtype: type = np.int64) -> List[LocalAlignment]:
+    """
+    Find the best local alignments that do not align the same pair of characters, best first.
+
+    After every alignment its aligned pairs are forbidden, and only the part of the matrices that depends on them is
+    recalculated before looking for the next one.
+    :param substitution_scores: Substitution scores, rows along the second and columns along the first sequence.
+    :param sequence_1: The first sequence.
+    :param sequence_2: The second sequence.
+    :param gap_open: Penalty for the first position of a gap.
+    :param gap_extend: Penalty for every further position of a gap.
+    :param count: Maximum number of alignments.
+    :param dtype: Numpy type of the scores.
+    :return: The alignments, fewer than count if no other alignment scores above zero.
+    """
+    matrix = DeclumpingMatrix(substitution_scores, gap_open, gap_extend, dtype)
+    alignments = []
+    while len(alignments) < count:
+        end = matrix.max_score_index()
+        score = matrix.scores[end].item()
+        if score <= 0:
+            break
+
+        steps = matrix.traceback(*end)
+        aligned_1 = ''.join(sequence_1[y - 1] if direction != Direction.UP else '-' for _, y, direction in steps)
+        aligned_2 = ''.join(sequence_2[x - 1] if direction != Direction.LEFT else '-' for x, _, direction in steps)
+        alignments.append(LocalAlignment(score, (int(steps[0][0]), int(steps[0][1])), (int(end[0]), int(end[1])),
+                                         (aligned_1, aligned_2)))
+        matrix.forbid([(x, y) for x, y, direction in steps if direction == Direction.DIAGONAL])
+    return alignments
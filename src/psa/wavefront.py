@@ -0,0 +1,91 @@
+from typing import Union
+
+import numpy as np
+
+from psa.enums import Direction
+from psa.scoring_matrix.numpy_scoring_matrix import NumpyScoringMatrix
+from psa.scoring_matrix.scoring_matrix import DIRECTION_BITS
+
+
+def fill_wavefront(matrix: NumpyScoringMatrix, substitution_table: np.ndarray, top_codes: np.ndarray,
+                   bottom_codes: np.ndarray, gap_open: Union[int, float], gap_extend: Union[int, float],
+                   local: bool) -> None:
+    """
+    Fill an initialised scoring matrix one anti-diagonal at a time.
+
+    All entries on an anti-diagonal only depend on the two previous anti-diagonals, so each anti-diagonal is
+    calculated with a handful of array operations instead of one Python call per entry.
+    :param matrix: Initialised scoring matrix to fill.
+    :param substitution_table: Dense substitution table.
+    :param top_codes: Encoded top sequence.
+    :param bottom_codes: Encoded bottom sequence.
+    :param gap_open: Penalty for the first position of a gap.
+    :param gap_extend: Penalty for every further position of a gap.
+    :param local: Whether to calculate a local (Smith-Waterman) or global (Needleman-Wunsch) alignment.
+    """
+    scores = matrix.scores
+    up_scores = matrix.gap_scores[Direction.UP]
+    left_scores = matrix.gap_scores[Direction.LEFT]
+    height, width = scores.shape
+
+    # Edges, these only depend on the entry before them
+    if not local:
+        scores[1:, 0] = gap_open + gap_extend * np.arange(height - 1)
+        scores[0, 1:] = gap_open + gap_extend * np.arange(width - 1)
+    for x in range(1, height):
+        up_scores[x, 0] = max(scores[x - 1, 0] + gap_open, up_scores[x - 1, 0] + gap_extend)
+    for y in range(1, width):
+        left_scores[0, y] = max(scores[0, y - 1] + gap_open, left_scores[0, y - 1] + gap_extend)
+
+    # Work on skewed copies of the planes, where every anti-diagonal is a contiguous row, indexed [x + y, x]
+    planes = (scores, up_scores, left_scores, matrix.tracebacks)
+    skewed_planes = []
+    for plane in planes:
+        skewed_plane = np.zeros((height + width - 1, height), dtype=plane.dtype)
+        _unskewed_view(skewed_plane, width)[:] = plane
+        skewed_planes.append(skewed_plane)
+    skewed_scores, skewed_up_scores, skewed_left_scores, skewed_tracebacks = skewed_planes
+
+    # Look up all substitution scores at once, in the same skewed layout
+    skewed_substitutions = np.zeros((height + width - 1, height), dtype=scores.dtype)
+    _unskewed_view(skewed_substitutions, width)[1:, 1:] = substitution_table[bottom_codes[:, None],
+                                                                             top_codes[None, :]]
+
+    for diagonal in range(2, height + width - 1):
+        first, last = max(1, diagonal - width + 1), min(height - 1, diagonal - 1)
+        current = slice(first, last + 1)
+        above = slice(first - 1, last)
+
+        diagonal_scores = skewed_scores[diagonal - 2, above] + skewed_substitutions[diagonal, current]
+        up = np.maximum(skewed_scores[diagonal - 1, above] + gap_open,
+                        skewed_up_scores[diagonal - 1, above] + gap_extend, out=skewed_up_scores[diagonal, current])
+        left = np.maximum(skewed_scores[diagonal - 1, current] + gap_open,
+                          skewed_left_scores[diagonal - 1, current] + gap_extend,
+                          out=skewed_left_scores[diagonal, current])
+
+        best = np.maximum(diagonal_scores, up, out=skewed_scores[diagonal, current])
+        np.maximum(best, left, out=best)
+        if local:
+            np.maximum(best, 0, out=best)
+
+        # Tie-aware traceback, every direction that reaches the best score gets its bit
+        tracebacks = skewed_tracebacks[diagonal, current]
+        np.equal(diagonal_scores, best, out=tracebacks.view(np.bool_))
+        tracebacks *= DIRECTION_BITS[Direction.DIAGONAL]
+        tracebacks |= np.equal(up, best).view(np.uint8) * DIRECTION_BITS[Direction.UP]
+        tracebacks |= np.equal(left, best).view(np.uint8) * DIRECTION_BITS[Direction.LEFT]
+
+    for plane, skewed_plane in zip(planes, skewed_planes):
+        plane[:] = _unskewed_view(skewed_plane, width)
+
+
+def _unskewed_view(skewed_plane: np.ndarray, width: int) -> np.ndarray:
+    """
+    View a skewed plane, indexed [x + y, x], as a regular plane indexed [x, y], without copying it.
+    :param skewed_plane: Skewed plane.
+    :param width: Width of the regular plane.
+    :return: Regular view on the skewed plane.
+    """
+    row_stride, column_stride = skewed_plane.strides
+    return np.lib.stride_tricks.as_strided(skewed_plane, shape=(skewed_plane.shape[1], width),
+                                           strides=(row_stride + column_stride, row_stride))
@@ -0,0 +1,251 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Offset of a diagonal that no path reaches at a score
+NONE = -(1 << 40)
+
+
+class Wavefront:
+    """
+    Furthest reaching offsets of the paths with one penalty, on a range of diagonals.
+
+    Diagonal k holds the entries (v, h) with h - v = k, where v indexes the first sequence and h the second. The offset
+    of a diagonal is the h of the furthest entry reached, separately for paths ending in a match or mismatch (matches),
+    a gap in the first sequence (insertions) and a gap in the second sequence (deletions).
+    """
+
+    def __init__(self, low: int, high: int, matches: np.ndarray, insertions: np.ndarray, deletions: np.ndarray):
+        """
+        Initialise the wavefront.
+        :param low: Lowest diagonal.
+        :param high: Highest diagonal.
+        :param matches: Offsets of paths ending in a match or mismatch.
+        :param insertions: Offsets of paths ending in a gap in the first sequence.
+        :param deletions: Offsets of paths ending in a gap in the second sequence.
+        """
+        self.low = low
+        self.high = high
+        self.matches = matches
+        self.insertions = insertions
+        self.deletions = deletions
+
+    def get(self, component: str, low: int, high: int) -> np.ndarray:
+        """
+        Get the offsets of a range of diagonals, NONE outside of the wavefront.
+        :param component: 'matches', 'insertions' or 'deletions'.
+        :param low: Lowest diagonal.
+        :param high: Highest diagonal.
+        :return: Offsets of the diagonals.
+        """
+        offsets = np.full(high - low + 1, NONE, dtype=np.int64)
+        start, end = max(low, self.low), min(high, self.high)
+        if start <= end:
+            offsets[start - low:end - low + 1] = getattr(self, component)[start - self.low:end - self.low + 1]
+        return offsets
+
+    def offset(self, component: str, diagonal: int) -> int:
+        """
+        Get the offset of a single diagonal, NONE outside of the wavefront.
+        :param component: 'matches', 'insertions' or 'deletions'.
+        :param diagonal: Diagonal.
+        :return: Offset of the diagonal.
+        """
+        if not self.low <= diagonal <= self.high:
+            return NONE
+        return int(getattr(self, component)[diagonal - self.low])
+
+
+def _match_length(sequence_1: str, v: int, sequence_2: str, h: int) -> int:
+    """
+    Count the matching characters of two sequences from two positions on, comparing slices of growing length.
+    :param sequence_1: The first sequence.
+    :param v: Position in the first sequence.
+    :param sequence_2: The second sequence.
+    :param h: Position in the second sequence.
+    :return: Number of matching characters.
+    """
+    length, step = 0, 8
+    while True:
+        step = min(step, len(sequence_1) - v - length, len(sequence_2) - h - length)
+        if step <= 0:
+            return length
+        if sequence_1[v + length:v + length + step] == sequence_2[h + length:h + length + step]:
+            length += step
+            step *= 2
+        elif step == 1:
+            return length
+        else:
+            step //= 2
+
+
+def wfa_align(sequence_1: str, sequence_2: str, mismatch: int, gap_open: int,
+              gap_extend: int) -> Tuple[int, Tuple[str, str]]:
+    """
+    Find an alignment with the lowest penalty with the gap-affine wavefront algorithm (WFA).
+
+    Matches cost nothing, a mismatch costs mismatch and a gap of length L costs gap_open + L * gap_extend. Wavefronts
+    are calculated for increasing penalties, so the work grows with the penalty of the alignment instead of the product
+    of the sequence lengths.
+    :param sequence_1: The first sequence.
+    :param sequence_2: The second sequence.
+    :param mismatch: Penalty of a mismatch, positive.
+    :param gap_open: Penalty of opening a gap, not negative.
+    :param gap_extend: Penalty of every position of a gap, positive.
+    :return: The penalty and the aligned first and second sequence.
+    """
+    if mismatch <= 0 or gap_extend <= 0 or gap_open < 0:
+        raise ValueError("Wavefront alignment needs positive mismatch and gap extension penalties")
+
+    length_1, length_2 = len(sequence_1), len(sequence_2)
+    final_diagonal = length_2 - length_1
+    wavefronts: List[Optional[Wavefront]] = []
+
+    # Characters as arrays, with a different sentinel at the end of each, to compare the next characters at once
+    sentinel = np.iinfo(np.uint32).max
+    characters_1 = np.append(np.frombuffer(sequence_1.encode('utf-32-le'), dtype=np.uint32), sentinel)
+    characters_2 = np.append(np.frombuffer(sequence_2.encode('utf-32-le'), dtype=np.uint32), sentinel - 1)
+
+    score = 0
+    while True:
+        wavefront = _next_wavefront(wavefronts, score, mismatch, gap_open, gap_extend, length_1, length_2)
+        if wavefront is not None:
+            _extend(wavefront, sequence_1, sequence_2, characters_1, characters_2)
+        wavefronts.append(wavefront)
+
+        if wavefront is not None and wavefront.offset('matches', final_diagonal) >= length_2:
+            return score, _backtrace(wavefronts, score, sequence_1, sequence_2, mismatch, gap_open, gap_extend)
+        score += 1
+
+
+def _extend(wavefront: Wavefront, sequence_1: str, sequence_2: str, characters_1: np.ndarray,
+            characters_2: np.ndarray) -> None:
+    """
+    Extend the offsets of the paths ending in a match or mismatch along their diagonals, for as long as the sequences
+    match.
+    :param wavefront: Wavefront to extend.
+    :param sequence_1: The first sequence.
+    :param sequence_2: The second sequence.
+    :param characters_1: Characters of the first sequence, followed by a sentinel.
+    :param characters_2: Characters of the second sequence, followed by another sentinel.
+    """
+    offsets = wavefront.matches
+    diagonals = np.arange(wavefront.low, wavefront.high + 1)
+    reached = offsets != NONE
+    h = np.where(reached, offsets, 0)
+    v = np.where(reached, offsets - diagonals, 0)
+
+    # Most diagonals stop at their next character, only the others are extended one by one
+    matching = reached & (characters_1[v] == characters_2[h])
+    for index in np.flatnonzero(matching).tolist():
+        offsets[index] += _match_length(sequence_1, int(v[index]), sequence_2, int(h[index]))
+
+
+def _next_wavefront(wavefronts: List[Optional[Wavefront]], score: int, mismatch: int, gap_open: int,
+                    gap_extend: int, length_1: int, length_2: int) -> Optional[Wavefront]:
+    """
+    Calculate the wavefront of a penalty from the earlier wavefronts, before extending its matches.
+    :param wavefronts: Wavefronts of every lower penalty.
+    :param score: Penalty of the wavefront.
+    :param mismatch: Penalty of a mismatch.
+    :param gap_open: Penalty of opening a gap.
+    :param gap_extend: Penalty of every position of a gap.
+    :param length_1: Length of the first sequence.
+    :param length_2: Length of the second sequence.
+    :return: The wavefront, or None if no path has this penalty.
+    """
+    if score == 0:
+        return Wavefront(0, 0, np.zeros(1, dtype=np.int64), np.full(1, NONE, dtype=np.int64),
+                         np.full(1, NONE, dtype=np.int64))
+
+    def earlier(offset: int) -> Optional[Wavefront]:
+        return wavefronts[score - offset] if score - offset >= 0 else None
+
+    mismatch_source, open_source, extend_source = earlier(mismatch), earlier(gap_open + gap_extend), \
+        earlier(gap_extend)
+    sources = [source for source in (mismatch_source, open_source, extend_source) if source is not None]
+    if not sources:
+        return None
+
+    low = max(min(source.low for source in sources) - 1, -length_1)
+    high = min(max(source.high for source in sources) + 1, length_2)
+    empty = np.full(high - low + 1, NONE, dtype=np.int64)
+
+    def get(source: Optional[Wavefront], component: str, shift: int) -> np.ndarray:
+        return empty if source is None else source.get(component, low + shift, high + shift)
+
+    insertions = np.maximum(get(open_source, 'matches', -1), get(extend_source, 'insertions', -1)) + 1
+    deletions = np.maximum(get(open_source, 'matches', 1), get(extend_source, 'deletions', 1))
+    matches = np.maximum(get(mismatch_source, 'matches', 0) + 1, np.maximum(insertions, deletions))
+
+    # Offsets past the end of either sequence do not exist
+    diagonals = np.arange(low, high + 1)
+    for offsets in (matches, insertions, deletions):
+        offsets[(offsets > length_2) | (offsets - diagonals > length_1) | (offsets < NONE // 2)] = NONE
+
+    if np.all(matches == NONE) and np.all(insertions == NONE) and np.all(deletions == NONE):
+        return None
+    return Wavefront(low, high, matches, insertions, deletions)
+
+
+def _backtrace(wavefronts: List[Optional[Wavefront]], score: int, sequence_1: str, sequence_2: str, mismatch: int,
+               gap_open: int, gap_extend: int) -> Tuple[str, str]:
+    """
+    Recover an alignment from the wavefronts, from the end of the final diagonal back to the start.
+    :param wavefronts: Wavefronts of every penalty up to the penalty of the alignment.
+    :param score: Penalty of the alignment.
+    :param sequence_1: The first sequence.
+    :param sequence_2: The second sequence.
+    :param mismatch: Penalty of a mismatch.
+    :param gap_open: Penalty of opening a gap.
+    :param gap_extend: Penalty of every position of a gap.
+    :return: The aligned first and second sequence.
+    """
+    def offset(penalty: int, component: str, diagonal: int) -> int:
+        if penalty < 0 or wavefronts[penalty] is None:
+            return NONE
+        return wavefronts[penalty].offset(component, diagonal)
+
+    aligned_1, aligned_2 = [], []
+    component, diagonal, h = 'matches', len(sequence_2) - len(sequence_1), len(sequence_2)
+    while True:
+        if component == 'matches':
+            # The offset before extending the matches, and where it came from
+            if score == 0:
+                origin = 0
+            else:
+                from_mismatch = offset(score - mismatch, 'matches', diagonal) + 1
+                origin = max(from_mismatch, offset(score, 'insertions', diagonal),
+                             offset(score, 'deletions', diagonal))
+            while h > origin:
+                aligned_1.append(sequence_1[h - diagonal - 1])
+                aligned_2.append(sequence_2[h - 1])
+                h -= 1
+            if score == 0:
+                break
+            if origin == from_mismatch:
+                aligned_1.append(sequence_1[h - diagonal - 1])
+                aligned_2.append(sequence_2[h - 1])
+                score, h = score - mismatch, h - 1
+            elif origin == offset(score, 'insertions', diagonal):
+                component = 'insertions'
+            else:
+                component = 'deletions'
+        elif component == 'insertions':
+            aligned_1.append('-')
+            aligned_2.append(sequence_2[h - 1])
+            if offset(score - gap_open - gap_extend, 'matches', diagonal - 1) == h - 1:
+                score, component = score - gap_open - gap_extend, 'matches'
+            else:
+                score = score - gap_extend
+            diagonal, h = diagonal - 1, h - 1
+        else:
+            aligned_1.append(sequence_1[h - diagonal - 1])
+            aligned_2.append('-')
+            if offset(score - gap_open - gap_extend, 'matches', diagonal + 1) == h:
+                score, component = score - gap_open - gap_extend, 'matches'
+            else:
+                score = score - gap_extend
+            diagonal = diagonal + 1
+
+    return ''.join(reversed(aligned_1)), ''.join(reversed(aligned_2))
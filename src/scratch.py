@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+
+class ScratchDirectory:
+    """
+    Temporary directory for memory-mapped arrays, which lets arrays larger than the available memory be paged to disk.
+
+    The directory and its files are removed when it is closed, when it is garbage collected, or at the latest when the
+    interpreter exits.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Create the scratch directory.
+        :param directory: Directory to create the scratch directory in, the system temporary directory if None.
+        """
+        self.path = tempfile.mkdtemp(prefix="scratch-", dir=directory)
+        # The finalizer must not refer to the scratch directory itself, or it would never be garbage collected
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.path, ignore_errors=True)
+
+    def array(self, name: str, shape: Tuple[int, ...], dtype: Union[type, np.dtype],
+              fill_value: Union[int, float] = 0) -> np.memmap:
+        """
+        Create a memory-mapped array in the scratch directory.
+        :param name: Name of the array, unique within the scratch directory.
+        :param shape: Shape of the array.
+        :param dtype: Numpy type of the array.
+        :param fill_value: Initial value of every element.
+        :return: The array.
+        """
+        if self.closed:
+            raise ValueError("Scratch directory is closed")
+        array = np.memmap(os.path.join(self.path, f"{name}.dat"), dtype=dtype, mode='w+', shape=shape)
+        # New files read as zeros without being written, so only other values are filled in
+        if fill_value != 0:
+            array.fill(fill_value)
+        return array
+
+    @property
+    def closed(self) -> bool:
+        """
+        Whether the scratch directory was removed.
+        """
+        return not self._finalizer.alive
+
+    def close(self) -> None:
+        """
+        Remove the scratch directory and its files. Arrays in it must not be used afterwards.
+        """
+        self._finalizer()
+
+    def __enter__(self) -> 'ScratchDirectory':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def memmap_size(shape: Tuple[int, ...], bytes_per_entry: int) -> int:
+    """
+    Calculate the size of the planes of a matrix.
+    :param shape: Shape of the matrix.
+    :param bytes_per_entry: Bytes per entry, summed over all planes.
+    :return: Size in bytes.
+    """
+    return int(np.prod(shape, dtype=object)) * bytes_per_entry
@@ -0,0 +1,206 @@
+from collections.abc import Mapping
+from threading import Lock
+from typing import Dict, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from blosum import BLOSUM
+
+
+class SubstitutionRow(Mapping):
+    """
+    Read-only row of a substitution matrix, the scores of one character against every other character.
+    """
+
+    def __init__(self, scores: Dict[str, Union[int, float]], default: Optional[float]):
+        """
+        Initialise the row.
+        :param scores: Scores against every character of the alphabet.
+        :param default: Score against characters outside of the alphabet, or None to raise a KeyError for them.
+        """
+        self._scores = scores
+        self._default = default
+
+    def __getitem__(self, char: str) -> Union[int, float]:
+        if char in self._scores:
+            return self._scores[char]
+        if self._default is None:
+            raise KeyError(char)
+        return self._default
+
+    def __contains__(self, char: object) -> bool:
+        return char in self._scores
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._scores)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class SubstitutionMatrix(Mapping):
+    """
+    Immutable substitution matrix, compiled into a dense numpy table.
+
+    It can be used like the dictionary of dictionaries of the blosum package, e.g. matrix['A']['C'], but cannot be
+    changed, so a single instance can be shared by every solver in a process. Characters outside of the alphabet score
+    the default score, or raise a KeyError if there is none.
+    """
+
+    def __init__(self, alphabet: Sequence[str], table: np.ndarray, default: Optional[float] = -np.inf):
+        """
+        Initialise the substitution matrix.
+        :param alphabet: Characters of the rows and columns of the table.
+        :param table: Substitution scores, indexed by the positions of two characters in the alphabet.
+        :param default: Score against characters outside of the alphabet, or None to raise a KeyError for them.
+        """
+        self.alphabet: Tuple[str, ...] = tuple(alphabet)
+        self.table = np.array(table).reshape(len(self.alphabet), len(self.alphabet))
+        self.table.setflags(write=False)
+        self.default = default
+        self._rows = {char: SubstitutionRow(dict(zip(self.alphabet, row)), default)
+                      for char, row in zip(self.alphabet, self.table.tolist())}
+        self._overridden: Dict[Tuple[Optional[float], Optional[float]], 'SubstitutionMatrix'] = {}
+
+    @classmethod
+    def from_dict(cls, substitution_matrix: Union[dict, 'SubstitutionMatrix']) -> 'SubstitutionMatrix':
+        """
+        Compile a substitution matrix from a dictionary of dictionaries. Dictionaries with a default factory, such as
+        the matrices of the blosum package, keep their default score.
+        :param substitution_matrix: Substitution matrix as a dictionary of dictionaries.
+        :return: Compiled substitution matrix.
+        """
+        if isinstance(substitution_matrix, SubstitutionMatrix):
+            return substitution_matrix
+
+        alphabet = sorted(substitution_matrix.keys())
+        table = np.array([[substitution_matrix[char][other_char] for other_char in alphabet] for char in alphabet])
+        default_factory = getattr(substitution_matrix, 'default_factory', None)
+        default = None
+        if default_factory is not None:
+            default = default_factory()
+            default = default.default_factory() if hasattr(default, 'default_factory') else default
+        return cls(alphabet, table, default)
+
+    def with_overrides(self, match: Optional[float] = None, mismatch: Optional[float] = None) -> 'SubstitutionMatrix':
+        """
+        Get a copy of the substitution matrix with every match and/or mismatch score replaced.
+        :param match: Score of two equal characters, unchanged if None.
+        :param mismatch: Score of two different characters, unchanged if None.
+        :return: The substitution matrix with the overrides applied, the same instance every time.
+        """
+        if match is None and mismatch is None:
+            return self
+        if (match, mismatch) not in self._overridden:
+            identity = np.eye(len(self.alphabet), dtype=bool)
+            table = np.where(identity, self.table if match is None else match,
+                             self.table if mismatch is None else mismatch)
+            self._overridden[(match, mismatch)] = SubstitutionMatrix(self.alphabet, table, self.default)
+        return self._overridden[(match, mismatch)]
+
+    def __getitem__(self, char: str) -> SubstitutionRow:
+        if char in self._rows:
+            return self._rows[char]
+        if self.default is None:
+            raise KeyError(char)
+        return SubstitutionRow({}, self.default)
+
+    def __contains__(self, char: object) -> bool:
+        return char in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.alphabet)
+
+    def __len__(self) -> int:
+        return len(self.alphabet)
+
+
+# Registered matrix sources and compiled matrices, shared by every solver in the process
+_sources: Dict[str, Union[str, dict, SubstitutionMatrix]] = {}
+_compiled: Dict[Tuple[str, Optional[float], Optional[float]], SubstitutionMatrix] = {}
+_lock = Lock()
+
+
+def register_substitution_matrix(name: str, source: Union[str, dict, SubstitutionMatrix]) -> None:
+    """
+    Register a substitution matrix under a name, replacing any matrix registered under that name before.
+    :param name: Name of the substitution matrix.
+    :param source: Path to a matrix file (see load_substitution_matrix), or the substitution matrix itself.
+    """
+    with _lock:
+        _sources[name] = source
+        for key in [key for key in _compiled if key[0] == name]:
+            del _compiled[key]
+
+
+def get_substitution_matrix(name: str = "BLOSUM62", match: Optional[float] = None,
+                            mismatch: Optional[float] = None) -> SubstitutionMatrix:
+    """
+    Get a compiled substitution matrix, which is only loaded and compiled the first time it is requested.
+
+    Names are looked up in the registered matrices first. Otherwise BLOSUM<n> names are loaded from the blosum package,
+    and any other name is read as a path to a matrix file.
+    :param name: Name of the substitution matrix.
+    :param match: Score of two equal characters, unchanged if None.
+    :param mismatch: Score of two different characters, unchanged if None.
+    :return: The compiled substitution matrix.
+    """
+    with _lock:
+        if (name, None, None) not in _compiled:
+            source = _sources.get(name)
+            if isinstance(source, str) or (source is None and not name.upper().startswith("BLOSUM")):
+                matrix = load_substitution_matrix(source or name)
+            elif source is not None:
+                matrix = SubstitutionMatrix.from_dict(source)
+            else:
+                matrix = SubstitutionMatrix.from_dict(BLOSUM(int(name[len("BLOSUM"):])))
+            _compiled[(name, None, None)] = matrix
+
+        if (name, match, mismatch) not in _compiled:
+            _compiled[(name, match, mismatch)] = _compiled[(name, None, None)].with_overrides(match, mismatch)
+        return _compiled[(name, match, mismatch)]
+
+
+def load_substitution_matrix(path: str) -> SubstitutionMatrix:
+    """
+    Load a substitution matrix from a file.
+
+    Files ending in .npy hold a compiled matrix saved with save_substitution_matrix. Other files are read in the NCBI
+    text format used for BLOSUM and PAM matrices: lines starting with # are comments, the first other line holds the
+    characters of the columns, and every following line a character and its scores against the columns.
+    :param path: Path to the matrix file.
+    :return: The compiled substitution matrix.
+    """
+    if path.endswith(".npy"):
+        records = np.load(path)
+        return SubstitutionMatrix([str(char) for char in records['character']], records['scores'])
+
+    with open(path, "r") as file:
+        lines = [line.split() for line in file if line.strip() and not line.startswith("#")]
+    if not lines:
+        raise ValueError(f"No substitution matrix found in {path}")
+
+    columns = lines[0]
+    rows = {}
+    for line in lines[1:]:
+        if len(line) != len(columns) + 1:
+            raise ValueError(f"Substitution matrix row for {line[0]} has {len(line) - 1} scores instead of "
+                             f"{len(columns)}")
+        rows[line[0]] = {char: float(score) if '.' in score else int(score) for char, score in zip(columns, line[1:])}
+
+    alphabet = sorted(rows)
+    return SubstitutionMatrix(alphabet, [[rows[char][other_char] for other_char in alphabet] for char in alphabet])
+
+
+def save_substitution_matrix(substitution_matrix: SubstitutionMatrix, path: str) -> None:
+    """
+    Save a compiled substitution matrix as a .npy file, which loads without parsing.
+    :param substitution_matrix: Substitution matrix to save.
+    :param path: Path to the .npy file.
+    """
+    table = substitution_matrix.table
+    records = np.empty(len(substitution_matrix.alphabet), dtype=[('character', 'U1'),
+                                                                  ('scores', table.dtype, (len(table),))])
+    records['character'] = substitution_matrix.alphabet
+    records['scores'] = table
+    with open(path, 'wb') as file:
+        np.save(file, records)
@@ -0,0 +1,63 @@
+import random
+import unittest
+
+from src.msa.center_star import CenterStarMSASolver, complete_alignment, merge_center_alignments, split_center_alignment
+from src.msa.needleman_wunsch import NeedlemanWunschMSASolver
+
+
+class TestCenterStarMSA(unittest.TestCase):
+    """
+    Tests for the center-star multiple sequence alignment solver.
+    """
+    config = {
+        "match": 5,
+        "mismatch": -2,
+        "indel": -4,
+        "two gaps": 0
+    }
+
+    def test_select_center(self) -> None:
+        """
+        Test that the sequence with the highest total score against the others is the center.
+        """
+        solver = CenterStarMSASolver(self.config, workers=1)
+        self.assertEqual(solver.select_center(["AGT", "ACGT", "ACGGT", "CGT"]), 1)
+        self.assertEqual(solver.select_center(["TTTT", "ACGT"]), 0)
+
+    def test_merge(self) -> None:
+        """
+        Test merging pairwise alignments with the center, once a gap, always a gap.
+        """
+        self.assertEqual(split_center_alignment("A-C-G", "ATCCG"), ["A", "TC", "CG", ""])
+        self.assertEqual(complete_alignment("ACGGT", "CGT", ("CGGT", "C-GT")), ("ACGGT", "-C-GT"))
+        self.assertEqual(complete_alignment("AC", "", ("", "")), ("AC", "--"))
+
+        alignment = merge_center_alignments("ACG", 1, {0: ("A-CG", "ATCG"), 2: ("ACG--", "A-GTT")}, 3)
+        self.assertEqual(alignment, ("ATCG--", "A-CG--", "A--GTT"))
+
+    def test_solve(self) -> None:
+        """
+        Test that random sequences are aligned without losing any residue, in columns of equal length without columns
+        of only gaps, and that two sequences get the score of the exact solver.
+        """
+        random.seed(25)
+        for count in (1, 2, 3, 6):
+            for _ in range(10):
+                sequences = [''.join(random.choice("ACGT") for _ in range(random.randint(0, 8))) for _ in range(count)]
+                score, alignments = CenterStarMSASolver(self.config, workers=1).solve(sequences)
+                alignment = alignments[0]
+                self.assertEqual([row.replace("-", "") for row in alignment], sequences)
+                self.assertEqual(len({len(row) for row in alignment}), 1)
+                self.assertNotIn("-" * count, [''.join(column) for column in zip(*alignment)])
+                if count == 2:
+                    self.assertEqual(score, NeedlemanWunschMSASolver(self.config).solve(sequences)[0])
+
+    def test_engines(self) -> None:
+        """
+        Test that the pairwise engine does not change the alignment.
+        """
+        sequences = ["GYSSASKIIFGSGTRLSIRP", "NTEAFFGQGTRLTVV", "NYGYTFGSGTRLTVV"]
+        python_result = CenterStarMSASolver(self.config, workers=1).solve(sequences)
+        wavefront_result = CenterStarMSASolver(self.config, engine="wavefront", workers=1).solve(sequences)
+        self.assertEqual(wavefront_result, python_result)
+        self.assertEqual(CenterStarMSASolver(self.config).solve([]), (0, [()]))
@@ -0,0 +1,71 @@
+import gc
+import os
+import random
+import tempfile
+import unittest
+
+from src.msa.needleman_wunsch import NeedlemanWunschMSASolver
+# The solvers check their matrices against the class they import themselves
+from src.msa.smith_waterman import MemmapScoringMatrix, SmithWatermanMSASolver
+
+
+class TestMemmapScoringMatrix(unittest.TestCase):
+    """
+    Tests for memory-mapped MSA scoring matrices.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_entries(self):
+        """
+        Test setting and getting scores and tracebacks, which are stored as bit flags of relative offsets.
+        """
+        matrix = MemmapScoringMatrix(["ACG", "AC", "A"], scratch_dir=self.directory.name)
+        self.assertEqual(matrix.shape, (4, 3, 2))
+        self.assertEqual(matrix.tracebacks.dtype.itemsize, 1)
+
+        matrix[1, 1, 1] = 4
+        matrix.add_traceback(1, 1, 1, traceback_direction=(0, 0, 0))
+        matrix.add_traceback(1, 1, 1, traceback_direction=(1, 0, 1))
+        matrix.add_traceback(1, 1, 1, traceback_direction=(0, 0, 0))
+        matrix.add_traceback(1, 1, 1, traceback_direction=None)
+        self.assertEqual(matrix[1, 1, 1], (4, [(1, 0, 1), (0, 0, 0)]))
+        self.assertEqual(matrix.get_max_index(), (1, 1, 1))
+        self.assertEqual(matrix.get_max_score(), 4)
+
+        matrix[2, 1, 1] = -2
+        matrix[2, 1, 1] = [(2, 1, 0)]
+        self.assertEqual(matrix.get_score(2, 1, 1), -2)
+        self.assertEqual(matrix.get_traceback(2, 1, 1), [(2, 1, 0)])
+        matrix.close()
+
+    def test_same_alignments(self):
+        """
+        Test that memory-mapped matrices give the same score, alignments and counts as object matrices.
+        """
+        random.seed(19)
+        config = {'match': 5, 'mismatch': -2, 'indel': -4, 'two gaps': 0}
+        for solver_cls in (SmithWatermanMSASolver, NeedlemanWunschMSASolver):
+            solver = solver_cls(config)
+            memmap_solver = solver_cls(config, memmap_threshold=0, scratch_dir=self.directory.name)
+            for _ in range(10):
+                sequences = [''.join(random.choice("ACGW") for _ in range(random.randint(1, 6))) for _ in range(3)]
+
+                self.assertEqual(memmap_solver.solve(sequences), solver.solve(sequences))
+                self.assertIsInstance(memmap_solver.scoring_matrix, MemmapScoringMatrix)
+                self.assertEqual(memmap_solver.count_alignments(sequences), solver.count_alignments(sequences))
+
+        del memmap_solver
+        gc.collect()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_too_many_sequences(self):
+        """
+        Test that tracebacks with more offsets than the widest integer type are refused.
+        """
+        with self.assertRaises(ValueError):
+            MemmapScoringMatrix(["A"] * 7, scratch_dir=self.directory.name)
@@ -1,3 +1,4 @@
+import sys
 import unittest
 
 from src.fasta_parser.fasta_parser import parse
@@ -45,6 +46,19 @@ class TestNeedlemanWunschMSA(unittest.TestCase):
 
         self.check_alignments(alignments, correct_alignments)
 
+    def test_move_scores(self) -> None:
+        """
+        Test the precomputed sum-of-pairs scores of the pairs of sequences and of the moves.
+        """
+        solver = NeedlemanWunschMSASolver(self.config)
+        solver.solve(["AC", "A", "CA"])
+
+        self.assertEqual(solver.pair_scores[0, 2].tolist(), [[-2, 5], [5, -2]])
+        self.assertEqual(solver.move_scores[-1, -1, -1], (0, [(0, 1), (0, 2), (1, 2)]))
+        self.assertEqual(solver.move_scores[-1, -1, 0], (-8, [(0, 1)]))
+        self.assertEqual(solver.move_scores[0, 0, -1], (-8, []))
+        self.assertNotIn((0, 0, 0), solver.move_scores)
+
 
 class TestNeedlemanWunschMSA2D(TestNeedlemanWunschMSA):
     """
@@ -126,3 +140,56 @@ class TestNeedlemanWunschMSA2D(TestNeedlemanWunschMSA):
         self.assertEqual(score, 10)
 
         self.check_alignments(alignments, correct_alignments)
+
+    def test_solve_max_alignments(self):
+        """
+        Test that the number of alignments can be limited, and that they are found in a deterministic order.
+        """
+        sequences = [
+            "GYSSA",
+            "NTEAFF"
+        ]
+
+        solver = NeedlemanWunschMSASolver(self.config)
+        score, alignments = solver.solve(sequences)
+        limited_score, limited_alignments = solver.solve(sequences, max_alignments=2)
+
+        self.assertEqual(limited_score, score)
+        self.assertEqual(limited_alignments, alignments[:2])
+        with self.assertRaises(ValueError):
+            solver.solve(sequences, max_alignments=-1)
+
+        score, alignments = solver.solve_iter(sequences)
+
+        self.assertEqual(next(alignments), limited_alignments[0])
+
+    def test_count_alignments(self):
+        """
+        Test that counting the optimal alignments matches the number of alignments found by the traceback.
+        """
+        for sequences in [["GYSSA", "NTEAFF"], ["AATCGC", "AACGAA"]]:
+            solver = NeedlemanWunschMSASolver(self.config)
+            score, alignments = solver.solve(sequences)
+
+            self.assertEqual(solver.count_alignments(sequences), (score, len(alignments)))
+
+    def test_solve_without_recursion(self):
+        """
+        Test that the traceback does not recurse, by solving with a recursion limit below the alignment length.
+        """
+        sequences = [
+            "AATCG" * 30,
+            "AACG" * 30,
+        ]
+
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(100)
+        try:
+            solver = NeedlemanWunschMSASolver(self.config)
+            score, alignments = solver.solve(sequences, max_alignments=1)
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+
+        self.assertEqual(len(alignments), 1)
+        self.assertEqual(alignments[0][0].replace('-', ''), sequences[0])
+        self.assertEqual(alignments[0][1].replace('-', ''), sequences[1])
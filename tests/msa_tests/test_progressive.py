@@ -0,0 +1,95 @@
+import random
+import unittest
+
+import numpy as np
+
+from src.msa.needleman_wunsch import NeedlemanWunschMSASolver
+from src.msa.progressive import ProgressiveMSASolver, neighbor_joining, upgma
+
+
+class TestProgressiveMSA(unittest.TestCase):
+    """
+    Tests for the progressive multiple sequence alignment solver.
+    """
+    config = {
+        "match": 5,
+        "mismatch": -2,
+        "indel": -4,
+        "two gaps": 0
+    }
+
+    def setUp(self) -> None:
+        """
+        Set up the test case, with a distance matrix of two pairs of close sequences.
+        """
+        self.distances = np.array([[0, 2, 8, 9],
+                                   [2, 0, 8, 9],
+                                   [8, 8, 0, 3],
+                                   [9, 9, 3, 0]])
+
+    def test_upgma(self) -> None:
+        """
+        Test that UPGMA joins the closest pairs first.
+        """
+        self.assertEqual(upgma(self.distances), [(0, 1), (2, 3), (4, 5)])
+        self.assertEqual(upgma(np.zeros((1, 1))), [])
+
+    def test_neighbor_joining(self) -> None:
+        """
+        Test that neighbour joining joins every sequence once, and the neighbouring pairs first.
+        """
+        merges = neighbor_joining(self.distances)
+        self.assertEqual(len(merges), 3)
+        self.assertIn(merges[0], [(0, 1), (2, 3)])
+        self.assertEqual(sorted(index for merge in merges for index in merge), [0, 1, 2, 3, 4, 5])
+
+    def test_two_sequences(self) -> None:
+        """
+        Test that two sequences get the score of the exact solver, as a single pair of profiles is aligned exactly.
+        """
+        random.seed(24)
+        for _ in range(20):
+            sequences = [''.join(random.choice("ACGT") for _ in range(random.randint(0, 8))) for _ in range(2)]
+            score, alignments = ProgressiveMSASolver(self.config, workers=1).solve(sequences)
+            exact_score, exact_alignments = NeedlemanWunschMSASolver(self.config).solve(sequences)
+            self.assertEqual(score, exact_score)
+            self.assertIn(alignments[0], exact_alignments)
+
+    def test_solve(self) -> None:
+        """
+        Test that the alignment of many related sequences keeps every sequence, has columns of equal length and scores
+        better than padding the sequences with gaps.
+        """
+        random.seed(7)
+        base = ''.join(random.choice("ARNDCQEGHILKMFPSTWYV") for _ in range(40))
+        sequences = [''.join(char for char in base if random.random() > 0.1) for _ in range(30)]
+        for guide_tree in ProgressiveMSASolver.guide_tree_methods:
+            solver = ProgressiveMSASolver(self.config, guide_tree=guide_tree, workers=1)
+            score, alignments = solver.solve(sequences)
+            self.assertEqual(len(alignments), 1)
+            self.assertEqual(len({len(row) for row in alignments[0]}), 1)
+            self.assertEqual([row.replace("-", "") for row in alignments[0]], sequences)
+            self.assertEqual(len(solver.merges), len(sequences) - 1)
+            padded = tuple(sequence.ljust(len(base), "-") for sequence in sequences)
+            self.assertGreater(score, solver.sum_of_pairs(padded))
+
+    def test_sum_of_pairs(self) -> None:
+        """
+        Test the sum-of-pairs score of an alignment, every pair of rows scored column by column.
+        """
+        solver = ProgressiveMSASolver(self.config)
+        # Columns score -8, -3, 15, -3, 1 and -10
+        self.assertEqual(solver.sum_of_pairs(("--CTAC", "-GC-A-", "TGCTCT")), -8)
+        self.assertEqual(solver.sum_of_pairs(("AC-", "ACG")), 6)
+        self.assertEqual(solver.sum_of_pairs(("ACG",)), 0)
+
+    def test_edge_cases(self) -> None:
+        """
+        Test no sequences, a single sequence and empty sequences.
+        """
+        solver = ProgressiveMSASolver(self.config, workers=1)
+        self.assertEqual(solver.solve([]), (0, [()]))
+        self.assertEqual(solver.solve(["ACG"]), (0, [("ACG",)]))
+        self.assertEqual(solver.solve(["", "AC", ""]), (-16, [("--", "AC", "--")]))
+        with self.assertRaises(ValueError):
+            ProgressiveMSASolver(self.config, guide_tree="unknown")
@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from src.fasta_parser.fasta_parser import parse
 from src.msa.scoring_matrix.scoring_matrix import ScoringMatrix, ScoringMatrixEntry
 
@@ -378,3 +380,48 @@ class TestScoringMatrix4D(unittest.TestCase):
         self.assertEqual(self.scoring_matrix.get_traceback(0, 0, 0, 0), [(1, 1, 1, 1)])
         self.assertEqual(self.scoring_matrix[0, 0, 0, 0], 2)
         self.assertEqual(self.scoring_matrix[0, 0, 0, 1], 0)
+
+
+class TestScoringMatrixStorage(unittest.TestCase):
+    """
+    Test the numeric storage of the scores and tracebacks of an MSA scoring matrix.
+    """
+
+    def test_arrays(self):
+        """
+        Test that scores and tracebacks are stored in numeric arrays, with a traceback bit per relative offset.
+        """
+        scoring_matrix = ScoringMatrix(["ACG", "AC", "A"])
+        self.assertEqual(scoring_matrix.scores.dtype, np.int64)
+        self.assertEqual(scoring_matrix.tracebacks.dtype, np.uint8)
+        self.assertEqual(ScoringMatrix.bytes_per_entry(3), 9)
+
+        scoring_matrix.set_score(2, 1, 1, score=7)
+        scoring_matrix.add_traceback(2, 1, 1, traceback_direction=(1, 0, 0))
+        scoring_matrix.add_traceback(2, 1, 1, traceback_direction=(2, 1, 0))
+        scoring_matrix.add_traceback(2, 1, 1, traceback_direction=(1, 0, 0))
+        self.assertEqual(scoring_matrix.get_traceback(2, 1, 1), [(2, 1, 0), (1, 0, 0)])
+        self.assertEqual(scoring_matrix.tracebacks[2, 1, 1], 0b10000010)
+        self.assertEqual(scoring_matrix.get_max_index(), (2, 1, 1))
+        self.assertEqual(scoring_matrix[2, 1, 1], ScoringMatrixEntry(7, [(2, 1, 0), (1, 0, 0)]))
+
+    def test_float_scores(self):
+        """
+        Test that floating point scores are kept with a floating point score type.
+        """
+        scoring_matrix = ScoringMatrix(["AC", "A"], np.float64)
+        scoring_matrix[1, 1] = -1.5
+        self.assertEqual(scoring_matrix.get_score(1, 1), -1.5)
+        self.assertEqual(scoring_matrix.get_max_score(), 0)
+
+    def test_many_sequences(self):
+        """
+        Test that the tracebacks of more sequences than bits in the widest integer type are Python integers.
+        """
+        scoring_matrix = ScoringMatrix(["AC"] * 7)
+        self.assertEqual(scoring_matrix.tracebacks.dtype, object)
+
+        index = (1,) * 7
+        scoring_matrix.add_traceback(*index, traceback_direction=(0,) * 7)
+        scoring_matrix.add_traceback(*index, traceback_direction=(1,) * 6 + (0,))
+        self.assertEqual(scoring_matrix.get_traceback(*index), [(1,) * 6 + (0,), (0,) * 7])
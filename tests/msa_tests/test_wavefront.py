@@ -0,0 +1,64 @@
+import random
+import unittest
+
+import numpy as np
+
+from src.msa.needleman_wunsch import NeedlemanWunschMSASolver
+from src.msa.smith_waterman import SmithWatermanMSASolver
+
+
+class TestWavefront(unittest.TestCase):
+    """
+    Tests for filling MSA scoring matrices one hyperplane at a time.
+    """
+
+    def assert_same_matrix(self, solver_cls, config: dict, sequences: list):
+        """
+        Assert that the wavefront engine gives the same scores, tracebacks and alignments as the python engine.
+        """
+        solver = solver_cls(config)
+        wavefront_solver = solver_cls(config, engine="wavefront")
+        self.assertEqual(wavefront_solver.solve(sequences), solver.solve(sequences))
+        self.assertTrue(np.array_equal(wavefront_solver.scoring_matrix.scores, solver.scoring_matrix.scores))
+        self.assertTrue(np.array_equal(wavefront_solver.scoring_matrix.tracebacks, solver.scoring_matrix.tracebacks))
+        self.assertEqual(wavefront_solver.count_alignments(sequences), solver.count_alignments(sequences))
+
+    def test_same_as_python(self):
+        """
+        Test random sequences with integer and floating point scores, for 2 to 4 sequences.
+        """
+        random.seed(22)
+        configs = [{"match": 5, "mismatch": -2, "indel": -4, "two gaps": 0},
+                   {"match": 1.5, "mismatch": -1, "indel": -2.25, "two gaps": 0.5}]
+        for config in configs:
+            for solver_cls in (NeedlemanWunschMSASolver, SmithWatermanMSASolver):
+                for count in (2, 3, 4):
+                    for _ in range(4):
+                        sequences = [''.join(random.choice("ACGT") for _ in range(random.randint(1, 5)))
+                                     for _ in range(count)]
+                        self.assert_same_matrix(solver_cls, config, sequences)
+
+    def test_edge_cases(self):
+        """
+        Test empty sequences, a single sequence and more sequences than fit in an integer of traceback bits.
+        """
+        config = {"indel": -4, "two gaps": 0}
+        for solver_cls in (NeedlemanWunschMSASolver, SmithWatermanMSASolver):
+            self.assert_same_matrix(solver_cls, config, ["", "AR"])
+            self.assert_same_matrix(solver_cls, config, ["ARN"])
+            self.assert_same_matrix(solver_cls, config, ["AR", "A", "RA", "N", "A", "NA", "R"])
+
+    def test_proteins(self):
+        """
+        Test that three related protein sequences of 60 residues are aligned without losing any residue.
+        """
+        random.seed(3)
+        amino_acids = "ARNDCQEGHILKMFPSTWYV"
+        sequence = ''.join(random.choice(amino_acids) for _ in range(60))
+        sequences = [sequence] + [''.join(c if random.random() > 0.2 else random.choice(amino_acids) for c in sequence)
+                                  for _ in range(2)]
+        solver = NeedlemanWunschMSASolver({"indel": -4, "two gaps": 0}, engine="wavefront")
+        score, alignments = solver.solve(sequences, max_alignments=1)
+        self.assertEqual(len(alignments), 1)
+        self.assertTrue(all(aligned.replace("-", "") == original for aligned, original in zip(alignments[0],
+                                                                                               sequences)))
@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+
+from src.psa.all_pairs import align_all_pairs, _tasks
+from src.psa.needleman_wunsch import NeedlemanWunschPSASolver
+from src.psa.smith_waterman import SmithWatermanPSASolver
+
+
+class TestAllPairs(unittest.TestCase):
+    """
+    Tests for aligning all pairs of sequences.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+        """
+        self.config = {'match': 2, 'mismatch': -1, 'indel': -2}
+        self.sequences = ["ACGTACGT", "ACGTTTACGT", "TTT", "ACGTACGT", "GATTACA", "CCCCGGGG"]
+
+    def test_all_pairs_scores(self):
+        """
+        Test that the matrix holds the score of every pair of sequences.
+        """
+        for solver in (NeedlemanWunschPSASolver(self.config), SmithWatermanPSASolver(self.config)):
+            expected = np.array([[solver.score(sequence_1, sequence_2)[0] for sequence_2 in self.sequences]
+                                 for sequence_1 in self.sequences])
+
+            matrix = align_all_pairs(solver, self.sequences, workers=1, chunk_size=2)
+
+            self.assertTrue(np.array_equal(matrix, expected))
+
+    def test_all_pairs_process_pool(self):
+        """
+        Test that aligning with a process pool gives the same matrix as aligning in a single process.
+        """
+        solver = NeedlemanWunschPSASolver(self.config)
+
+        self.assertTrue(np.array_equal(align_all_pairs(solver, self.sequences, workers=2, chunk_size=3),
+                                       align_all_pairs(solver, self.sequences, workers=1)))
+
+    def test_all_pairs_distance(self):
+        """
+        Test the distance matrix, which is zero for identical sequences.
+        """
+        solver = NeedlemanWunschPSASolver(self.config)
+        scores = align_all_pairs(solver, self.sequences, workers=1)
+
+        distances = align_all_pairs(solver, self.sequences, distance=True, workers=1)
+
+        self.assertEqual(distances[0, 3], 0)
+        self.assertTrue(np.array_equal(np.diag(distances), np.zeros(len(self.sequences))))
+        self.assertEqual(distances[0, 1], (scores[0, 0] + scores[1, 1]) / 2 - scores[0, 1])
+
+    def test_tasks_longest_first(self):
+        """
+        Test that every unordered pair is scheduled once, longest pairs first.
+        """
+        lengths = [10, 8, 8, 5, 3, 1]
+
+        tasks = list(_tasks(lengths, 2))
+        pairs = [(row, column) for row, start, end in tasks for column in range(start, end)]
+        first_pair_sizes = [lengths[row] * lengths[start] for row, start, _ in tasks]
+
+        self.assertEqual(sorted(pairs), [(row, column) for row in range(6) for column in range(row, 6)])
+        self.assertEqual(first_pair_sizes, sorted(first_pair_sizes, reverse=True))
@@ -0,0 +1,75 @@
+import unittest
+
+from blosum import BLOSUM
+
+from src.fasta_parser.fasta_parser import parse
+from src.psa.needleman_wunsch import NeedlemanWunschPSASolver
+
+
+class TestBanded(unittest.TestCase):
+    """
+    Tests for the banded engine of the Needleman-Wunsch solver.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+        """
+        sequences = list(parse("psa_tests/test_inputs/test.fasta").values())
+        self.sequence1 = sequences[0]
+        self.sequence2 = sequences[1]
+
+    def check_same_as_python_engine(self, config: dict, sequence1: str, sequence2: str, band: int) -> None:
+        """
+        Check that the banded engine finds the same score and alignments as the python engine.
+        :param config: Configuration for the solver.
+        :param sequence1: The first sequence.
+        :param sequence2: The second sequence.
+        :param band: Initial band half-width.
+        """
+        python_solver = NeedlemanWunschPSASolver(config=config, substitution_matrix=BLOSUM(62))
+        banded_solver = NeedlemanWunschPSASolver(config=config, substitution_matrix=BLOSUM(62), engine="banded",
+                                                 band=band)
+
+        python_score, python_alignments = python_solver.solve(sequence1, sequence2)
+        banded_score, banded_alignments = banded_solver.solve(sequence1, sequence2)
+
+        self.assertEqual(python_score, banded_score)
+        self.assertEqual(sorted(python_alignments), sorted(banded_alignments))
+
+    def test_linear_gaps(self):
+        """
+        Test the banded engine with linear gap penalties, starting from bands that are too narrow.
+        """
+        for band in [0, 1, 4]:
+            self.check_same_as_python_engine({'indel': -4}, self.sequence1, self.sequence2, band)
+            self.check_same_as_python_engine({'indel': -4}, self.sequence2, self.sequence1, band)
+
+    def test_affine_gaps(self):
+        """
+        Test the banded engine with affine gap penalties.
+        """
+        for band in [0, 2]:
+            self.check_same_as_python_engine({'gap open': -5, 'gap extend': -1}, self.sequence1, self.sequence2, band)
+            self.check_same_as_python_engine({'gap open': -1, 'gap extend': -3}, self.sequence1, self.sequence2, band)
+
+    def test_near_identical_sequences(self):
+        """
+        Test that near-identical sequences are aligned within a narrow band.
+        """
+        sequence2 = self.sequence1[:5] + self.sequence1[6:] + 'W'
+
+        solver = NeedlemanWunschPSASolver(config={'indel': -4}, substitution_matrix=BLOSUM(62), engine="banded",
+                                          band=2)
+        solver.solve(self.sequence1, sequence2)
+
+        self.assertEqual(solver.scoring_matrix.band, 2)
+        self.assertFalse(solver.scoring_matrix.covers_matrix())
+        self.check_same_as_python_engine({'indel': -4}, self.sequence1, sequence2, 2)
+
+    def test_negative_band(self):
+        """
+        Test that a negative band half-width is rejected.
+        """
+        with self.assertRaises(ValueError):
+            NeedlemanWunschPSASolver(config={'indel': -4}, engine="banded", band=-1)
@@ -0,0 +1,74 @@
+import random
+import unittest
+
+from src.psa.bit_parallel import edit_alignment, edit_distance
+from src.psa.needleman_wunsch import NeedlemanWunschPSASolver
+
+
+class TestBitParallel(unittest.TestCase):
+    """
+    Tests for the bit-parallel edit distance engine.
+    """
+
+    @staticmethod
+    def levenshtein(sequence_1: str, sequence_2: str) -> int:
+        """
+        Calculate the edit distance with the textbook dynamic programming, one row at a time.
+        :param sequence_1: The first sequence.
+        :param sequence_2: The second sequence.
+        :return: The edit distance.
+        """
+        row = list(range(len(sequence_2) + 1))
+        for i, char_1 in enumerate(sequence_1, start=1):
+            previous_row, row = row, [i]
+            for j, char_2 in enumerate(sequence_2, start=1):
+                row.append(min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + (char_1 != char_2)))
+        return row[-1]
+
+    def test_edit_distance(self):
+        """
+        Test the edit distance and alignment against the textbook dynamic programming, including patterns longer than
+        a machine word.
+        """
+        random.seed(16)
+        for _ in range(200):
+            sequence_1 = ''.join(random.choice("ACG") for _ in range(random.randint(0, 150)))
+            sequence_2 = ''.join(random.choice("ACG") for _ in range(random.randint(0, 150)))
+            distance = self.levenshtein(sequence_1, sequence_2)
+
+            self.assertEqual(edit_distance(sequence_1, sequence_2), distance)
+            alignment_distance, (aligned_1, aligned_2) = edit_alignment(sequence_1, sequence_2)
+            self.assertEqual(alignment_distance, distance)
+            self.assertEqual(aligned_1.replace('-', ''), sequence_1)
+            self.assertEqual(aligned_2.replace('-', ''), sequence_2)
+            self.assertEqual(sum(char_1 != char_2 for char_1, char_2 in zip(aligned_1, aligned_2)), distance)
+
+    def test_edit_cost(self):
+        """
+        Test which configs are recognised as edit distance.
+        """
+        self.assertEqual(NeedlemanWunschPSASolver({'match': 0, 'mismatch': -1, 'indel': -1}).edit_cost(), (0, 1))
+        self.assertEqual(NeedlemanWunschPSASolver({'match': 2, 'mismatch': -1, 'indel': -2}).edit_cost(), (1, 3))
+        self.assertIsNone(NeedlemanWunschPSASolver({'match': 5, 'mismatch': -2, 'indel': -4}).edit_cost())
+        self.assertIsNone(NeedlemanWunschPSASolver({'match': 0, 'mismatch': -1, 'gap open': -2,
+                                                    'gap extend': -1}).edit_cost())
+        self.assertIsNone(NeedlemanWunschPSASolver({'indel': -1}).edit_cost())
+
+        with self.assertRaises(ValueError):
+            NeedlemanWunschPSASolver({'indel': -1}, engine="myers")
+
+    def test_myers_engine(self):
+        """
+        Test that the myers engine finds an optimal alignment with the same score as the python engine.
+        """
+        sequence_1, sequence_2 = "GATTACAGATTACA", "GACTATAGATACCA"
+        for config in ({'match': 0, 'mismatch': -1, 'indel': -1}, {'match': 2, 'mismatch': -1, 'indel': -2}):
+            python_solver = NeedlemanWunschPSASolver(config)
+            myers_solver = NeedlemanWunschPSASolver(config, engine="myers")
+
+            score, alignments = myers_solver.solve(sequence_1, sequence_2)
+
+            self.assertEqual(score, python_solver.solve(sequence_1, sequence_2)[0])
+            self.assertEqual(score, python_solver.score(sequence_1, sequence_2)[0])
+            self.assertEqual(len(alignments), 1)
+            self.assertEqual(myers_solver.alignment_score(alignments[0]), score)
@@ -0,0 +1,96 @@
+import unittest
+
+import numpy as np
+from blosum import BLOSUM
+
+from src.fasta_parser.fasta_parser import parse
+from src.psa.linear_space import horizontal_gap_scores
+from src.psa.needleman_wunsch import NeedlemanWunschPSASolver
+
+
+class TestHirschberg(unittest.TestCase):
+    """
+    Tests for the linear space (Hirschberg) engine of the Needleman-Wunsch solver.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+        """
+        sequences = list(parse("psa_tests/test_inputs/test.fasta").values())
+        self.sequence1 = sequences[0]
+        self.sequence2 = sequences[1]
+
+    def check_same_score(self, config: dict, sequence1: str, sequence2: str) -> None:
+        """
+        Check that the Hirschberg engine finds an alignment with the same score as the full scoring matrix.
+        :param config: Configuration for the solver.
+        :param sequence1: The first sequence.
+        :param sequence2: The second sequence.
+        """
+        score, _ = NeedlemanWunschPSASolver(config=config, substitution_matrix=BLOSUM(62)).solve(sequence1, sequence2)
+
+        solver = NeedlemanWunschPSASolver(config=config, substitution_matrix=BLOSUM(62), engine="hirschberg")
+        hirschberg_score, alignments = solver.solve(sequence1, sequence2)
+
+        self.assertEqual(hirschberg_score, score)
+        self.assertEqual(len(alignments), 1)
+        self.assertEqual(alignments[0][0].replace('-', ''), sequence1)
+        self.assertEqual(alignments[0][1].replace('-', ''), sequence2)
+        self.assertEqual(solver.alignment_score(alignments[0]), score)
+        self.assertIsNone(solver.scoring_matrix)
+
+    def test_linear_gaps(self):
+        """
+        Test the Hirschberg engine with linear gap penalties.
+        """
+        for indel in [-3, -4, -15]:
+            self.check_same_score({'indel': indel}, self.sequence1, self.sequence2)
+            self.check_same_score({'indel': indel}, self.sequence2, self.sequence1)
+
+    def test_affine_gaps(self):
+        """
+        Test the Hirschberg engine with affine gap penalties.
+        """
+        self.check_same_score({'gap open': -5, 'gap extend': -1}, self.sequence1, self.sequence2)
+        self.check_same_score({'gap open': -11, 'gap extend': -1}, self.sequence1 + self.sequence2, self.sequence2)
+        self.check_same_score({'gap open': -8, 'gap extend': -2}, "GYSSASKIIF", "SKIIFGYSSA")
+
+    def test_single_alignment(self):
+        """
+        Test the alignment found with a unique optimal alignment.
+        """
+        solver = NeedlemanWunschPSASolver(config={'indel': -3}, substitution_matrix=BLOSUM(62),
+                                          engine="hirschberg")
+        score, alignments = solver.solve(self.sequence1, self.sequence2)
+
+        self.assertEqual(score, -11)
+        self.assertEqual(alignments, [("GYSSA--SKIIF", "N-TEAFFGQGT-")])
+
+    def test_gap_open_cheaper_than_extend(self):
+        """
+        Test that gap penalties which make opening a gap cheaper than extending one are refused.
+        """
+        solver = NeedlemanWunschPSASolver(config={'gap open': -1, 'gap extend': -5}, engine="hirschberg")
+
+        with self.assertRaises(ValueError):
+            solver.solve(self.sequence1, self.sequence2)
+
+
+class TestHorizontalGapScores(unittest.TestCase):
+    """
+    Tests for the horizontal gap scores of a row segment.
+    """
+
+    def test_running_maximum(self):
+        """
+        Test that the running maximum matches resolving the entries one by one.
+        """
+        best = np.array([3, -2, 7, 0, -5, 4, 1])
+        for gap_open, gap_extend in [(-3, -1), (-2, -2), (-1, -3)]:
+            expected = [-4]
+            for index in range(1, len(best)):
+                expected.append(max(max(best[index - 1], expected[-1]) + gap_open, expected[-1] + gap_extend))
+
+            with self.subTest(gap_open=gap_open, gap_extend=gap_extend):
+                self.assertEqual(horizontal_gap_scores(best, -4, gap_open, gap_extend).tolist(), expected)
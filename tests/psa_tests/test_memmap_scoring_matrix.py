@@ -0,0 +1,72 @@
+import gc
+import os
+import random
+import tempfile
+import unittest
+
+# The solvers check their matrices against the class they import themselves
+from src.psa.needleman_wunsch import MemmapScoringMatrix, NeedlemanWunschPSASolver
+from src.psa.smith_waterman import SmithWatermanPSASolver
+
+
+class TestMemmapScoringMatrix(unittest.TestCase):
+    """
+    Tests for memory-mapped PSA scoring matrices and the row by row fill.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_same_alignments(self):
+        """
+        Test that memory-mapped matrices give the same score, alignments and counts as in-memory matrices, for linear
+        and affine gaps.
+        """
+        random.seed(19)
+        for config in ({'match': 5, 'mismatch': -2, 'indel': -4},
+                       {'match': 2, 'mismatch': -3, 'gap open': -5, 'gap extend': -1},
+                       {'match': 2, 'mismatch': -1, 'gap open': -1, 'gap extend': -3}):
+            for solver_cls in (SmithWatermanPSASolver, NeedlemanWunschPSASolver):
+                solver = solver_cls(config, engine="wavefront")
+                memmap_solver = solver_cls(config, memmap_threshold=0, scratch_dir=self.directory.name)
+                for _ in range(10):
+                    sequence_1 = ''.join(random.choice("ACGW") for _ in range(random.randint(0, 15)))
+                    sequence_2 = ''.join(random.choice("ACGW") for _ in range(random.randint(0, 15)))
+
+                    self.assertEqual(memmap_solver.solve(sequence_1, sequence_2), solver.solve(sequence_1, sequence_2))
+                    self.assertIsInstance(memmap_solver.scoring_matrix, MemmapScoringMatrix)
+                    self.assertEqual(memmap_solver.count_alignments(sequence_1, sequence_2),
+                                     solver.count_alignments(sequence_1, sequence_2))
+
+    def test_threshold(self):
+        """
+        Test that only matrices larger than the threshold are memory-mapped.
+        """
+        config = {'match': 5, 'mismatch': -2, 'indel': -4}
+        # 11 x 11 entries of three int64 planes and a uint8 plane
+        solver = NeedlemanWunschPSASolver(config, memmap_threshold=11 * 11 * 25, scratch_dir=self.directory.name)
+
+        solver.solve("ACGTACGTAC", "ACGTACGTAC")
+        self.assertNotIsInstance(solver.scoring_matrix, MemmapScoringMatrix)
+        solver.solve("ACGTACGTACG", "ACGTACGTAC")
+        self.assertIsInstance(solver.scoring_matrix, MemmapScoringMatrix)
+
+    def test_cleanup(self):
+        """
+        Test that the files of a matrix are removed when it is closed or garbage collected.
+        """
+        matrix = MemmapScoringMatrix.smith_waterman("ACGT", "ACG", scratch_dir=self.directory.name)
+        self.assertEqual(len(os.listdir(matrix.scratch.path)), 4)
+        matrix.close()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+        solver = SmithWatermanPSASolver({'match': 5, 'mismatch': -2, 'indel': -4}, memmap_threshold=0,
+                                        scratch_dir=self.directory.name)
+        solver.solve("ACGT", "ACG")
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+        del solver
+        gc.collect()
+        self.assertEqual(os.listdir(self.directory.name), [])
@@ -1,3 +1,4 @@
+import math
 import unittest
 
 from blosum import BLOSUM
@@ -96,3 +97,116 @@ class TestNeedlemanWunsch(unittest.TestCase):
 
         for alignment in alignments:
             self.assertIn(alignment, correct_pairs)
+
+    def test_needleman_wunsch_affine(self):
+        """
+        Test the Needleman-Wunsch algorithm with affine gap penalties.
+        """
+        sequences = parse("psa_tests/test_inputs/test.fasta")
+
+        sequence_ids = list(sequences.keys())
+        sequence2 = sequences[sequence_ids[1]]
+        sequence1 = sequences[sequence_ids[0]]
+
+        config = {
+            'gap open': -5,
+            'gap extend': -1
+        }
+
+        solver = NeedlemanWunschPSASolver(config=config, substitution_matrix=BLOSUM(62))
+
+        score, alignments = solver.solve(sequence_1=sequence1, sequence_2=sequence2)
+
+        self.assertEqual(score, -9)
+        self.assertEqual(len(alignments), 2)
+
+        correct_pairs = [
+            ("GYSSASKIIF----", "N-TEA---FFGQGT"),
+            ("GYSSASKIIF----", "N----TEAFFGQGT")
+        ]
+
+        for alignment in alignments:
+            self.assertIn(alignment, correct_pairs)
+
+    def test_needleman_wunsch_linear_gap_keys(self):
+        """
+        Test that equal gap open and gap extend penalties behave like the indel penalty.
+        """
+        sequences = parse("psa_tests/test_inputs/test.fasta")
+
+        sequence_ids = list(sequences.keys())
+        sequence2 = sequences[sequence_ids[1]]
+        sequence1 = sequences[sequence_ids[0]]
+
+        linear_solver = NeedlemanWunschPSASolver(config={'indel': -4}, substitution_matrix=BLOSUM(62))
+        affine_solver = NeedlemanWunschPSASolver(config={'gap open': -4, 'gap extend': -4},
+                                                 substitution_matrix=BLOSUM(62))
+
+        linear_score, linear_alignments = linear_solver.solve(sequence_1=sequence1, sequence_2=sequence2)
+        affine_score, affine_alignments = affine_solver.solve(sequence_1=sequence1, sequence_2=sequence2)
+
+        self.assertEqual(linear_score, affine_score)
+        self.assertEqual(sorted(linear_alignments), sorted(affine_alignments))
+
+    def test_needleman_wunsch_score_only(self):
+        """
+        Test that the score-only entry point matches the score of the full scoring matrix.
+        """
+        sequences = parse("psa_tests/test_inputs/test.fasta")
+
+        sequence_ids = list(sequences.keys())
+        sequence2 = sequences[sequence_ids[1]]
+        sequence1 = sequences[sequence_ids[0]]
+
+        for config in [{'indel': -4}, {'gap open': -5, 'gap extend': -1}]:
+            solver = NeedlemanWunschPSASolver(config=config, substitution_matrix=BLOSUM(62))
+
+            score, _ = solver.solve(sequence_1=sequence1, sequence_2=sequence2)
+
+            self.assertEqual(solver.score(sequence1, sequence2), (score, None, (len(sequence2), len(sequence1))))
+            self.assertEqual(solver.score(sequence2, sequence1)[0], score)
+
+    def test_needleman_wunsch_count_alignments(self):
+        """
+        Test that counting the optimal alignments matches the number of alignments found by the traceback.
+        """
+        sequences = parse("psa_tests/test_inputs/test.fasta")
+
+        sequence_ids = list(sequences.keys())
+        sequence2 = sequences[sequence_ids[1]]
+        sequence1 = sequences[sequence_ids[0]]
+
+        for config in [{'indel': -4}, {'gap open': -5, 'gap extend': -1}]:
+            solver = NeedlemanWunschPSASolver(config=config, substitution_matrix=BLOSUM(62))
+
+            score, alignments = solver.solve(sequence_1=sequence1, sequence_2=sequence2)
+
+            self.assertEqual(solver.count_alignments(sequence1, sequence2), (score, len(alignments)))
+
+    def test_needleman_wunsch_count_alignments_large(self):
+        """
+        Test that the number of optimal alignments is counted exactly, even when it is far too large to enumerate.
+        """
+        solver = NeedlemanWunschPSASolver(config={'match': 1, 'mismatch': -1, 'indel': 0})
+
+        # With free gaps, every way to interleave 40 'A's with 40 'C's is optimal
+        score, count = solver.count_alignments('A' * 40, 'C' * 40)
+
+        self.assertEqual(score, 0)
+        self.assertEqual(count, math.comb(80, 40))
+        self.assertEqual(solver.count_alignments('A' * 6, 'C' * 6)[1], len(solver.solve('A' * 6, 'C' * 6)[1]))
+
+    def test_needleman_wunsch_long_sequences(self):
+        """
+        Test that the traceback works for alignments far longer than the recursion limit.
+        """
+        sequence1 = "GYSSASKIIFGSGTRLSIRP" * 150
+        sequence2 = sequence1[:1000] + sequence1[1001:] + "W"
+
+        solver = NeedlemanWunschPSASolver(config={'indel': -4}, substitution_matrix=BLOSUM(62), engine="banded")
+        score, alignments = solver.solve(sequence_1=sequence1, sequence_2=sequence2, max_alignments=1)
+
+        self.assertEqual(len(alignments), 1)
+        self.assertEqual(alignments[0][0].replace('-', ''), sequence1)
+        self.assertEqual(alignments[0][1].replace('-', ''), sequence2)
+        self.assertEqual(solver.alignment_score(alignments[0]), score)
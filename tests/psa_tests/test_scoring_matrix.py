@@ -1,7 +1,10 @@
+import pickle
 import unittest
 
-from psa.enums import Direction
-from psa.scoring_matrix.scoring_matrix import ScoringMatrix
+import numpy as np
+
+# Direction is taken from the scoring matrix module, so it is the enum the module itself compares against
+from src.psa.scoring_matrix.scoring_matrix import Direction, ScoringMatrix
 
 
 class TestScoringMatrix(unittest.TestCase):
@@ -95,3 +98,28 @@ class TestScoringMatrix(unittest.TestCase):
         self.matrix.set_score(1, 0, 3)
         self.assertEqual(self.matrix.max_score(), 3)
         self.assertEqual(self.matrix.max_score_index(), (1, 0))
+
+    def test_traceback_bits(self):
+        """
+        Test that tied tracebacks are stored as bit flags in a single byte per entry.
+        """
+        self.matrix.add_traceback(1, 1, Direction.LEFT)
+        self.matrix.add_traceback(1, 1, Direction.DIAGONAL)
+        self.matrix.add_traceback(1, 1, Direction.LEFT)
+
+        self.assertEqual(self.matrix.get_traceback(1, 1), [Direction.DIAGONAL, Direction.LEFT])
+        self.assertEqual(self.matrix.tracebacks.dtype, np.uint8)
+        self.assertEqual(self.matrix.tracebacks.shape, (self.matrix.height(), self.matrix.width()))
+
+    def test_pickle(self):
+        """
+        Test that the scoring matrix survives pickling.
+        """
+        self.matrix.set_score(1, 2, 3)
+        self.matrix.add_traceback(1, 2, Direction.UP)
+
+        matrix = pickle.loads(pickle.dumps(self.matrix))
+
+        self.assertEqual(matrix.get_score(1, 2), 3)
+        self.assertEqual(matrix.get_traceback(1, 2), [Direction.UP])
+        self.assertEqual(matrix.top_sequence, self.matrix.top_sequence)
@@ -0,0 +1,75 @@
+import unittest
+
+from blosum import BLOSUM
+
+from src.fasta_parser.fasta_parser import parse_generator
+from src.psa.needleman_wunsch import NeedlemanWunschPSASolver
+from src.psa.search import search
+from src.psa.smith_waterman import SmithWatermanPSASolver
+
+
+class TestSearch(unittest.TestCase):
+    """
+    Tests for searching a database with a query.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+        """
+        self.config = {'gap open': -11, 'gap extend': -1}
+        self.query = "GYSSASKIIFGSGTRLSIRP"
+        self.database = [
+            ("exact", "GYSSASKIIFGSGTRLSIRP"),
+            ("unrelated", "WWWWWWWW"),
+            ("j_region", "NTEAFFGQGTRLTVV"),
+            ("substring", "MKGYSSASKIIFGSGMK"),
+            ("j_region_copy", "NTEAFFGQGTRLTVV"),
+        ]
+
+    def test_search_ranking(self):
+        """
+        Test that the hits are the best scoring entries, best first and in database order for ties.
+        """
+        solver = SmithWatermanPSASolver(self.config, BLOSUM(62))
+        hits = search(solver, self.query, self.database, top=4, workers=1, chunk_size=2)
+
+        self.assertEqual([hit.sequence_id for hit in hits], ["exact", "substring", "j_region", "j_region_copy"])
+
+        reference_solver = SmithWatermanPSASolver(self.config, BLOSUM(62))
+        for hit in hits:
+            sequence = dict(self.database)[hit.sequence_id]
+            self.assertEqual((hit.score, hit.start, hit.end),
+                             reference_solver.score(self.query, sequence, locate_start=True))
+
+    def test_search_top(self):
+        """
+        Test that only the requested number of hits is kept, and that at least one must be.
+        """
+        solver = SmithWatermanPSASolver(self.config, BLOSUM(62))
+
+        self.assertEqual([hit.sequence_id for hit in search(solver, self.query, self.database, top=1, workers=1)],
+                         ["exact"])
+        with self.assertRaises(ValueError):
+            search(solver, self.query, self.database, top=0, workers=1)
+
+    def test_search_process_pool(self):
+        """
+        Test that searching with a process pool finds the same hits as searching in a single process.
+        """
+        solver = SmithWatermanPSASolver(self.config, BLOSUM(62))
+
+        self.assertEqual(search(solver, self.query, self.database, top=3, workers=2, chunk_size=1),
+                         search(solver, self.query, self.database, top=3, workers=1))
+
+    def test_search_global(self):
+        """
+        Test searching with global alignment scores, from a fasta file.
+        """
+        solver = NeedlemanWunschPSASolver({'indel': -4}, BLOSUM(62))
+        hits = search(solver, self.query, parse_generator("psa_tests/test_inputs/test.fasta"), workers=1)
+
+        self.assertEqual(len(hits), 2)
+        self.assertEqual(hits[0].sequence_id, "unknown_J_region_1")
+        self.assertIsNone(hits[0].start)
+        self.assertEqual(hits[0].end, (10, len(self.query)))
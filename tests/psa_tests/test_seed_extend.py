@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from src.psa.seed_extend import KmerIndex, seed_and_extend, _x_drop
+from src.psa.smith_waterman import SmithWatermanPSASolver
+
+
+class TestSeedExtend(unittest.TestCase):
+    """
+    Tests for the seed-and-extend heuristic.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+        """
+        self.solver = SmithWatermanPSASolver({'gap open': -11, 'gap extend': -1})
+        self.query = ("MKTAYIAKQRQISFVKSHFSRQLEERLGLIEVQAPILSRVGDGTQDNLSGAEKAVQVKVKALPDAQFEVVHSLAKWKRQT"
+                      "LGQHDFSAGEGLYTHMKALRPDEDRLSPLHSVYVDQWDWERVMGDGERQFSTLKSTVEAIWAGIKATEAAVSEEFGLAPF"
+                      "LPDQIHFVHSQELLSRYPDLDAKGRERAIAKDLGAVFLVGIGGKLSDGHRHDVRAPDYDDWAVGF")
+        self.database = [
+            ("unrelated", "WWWWPPPPCCCCWWWWPPPPCCCC"),
+            ("homologue", "GGGG" + self.query[20:120].replace("SR", "SK") + "GGGG"),
+            ("gapped_homologue", self.query[40:100] + "NNN" + self.query[100:160]),
+            ("short", "MKT"),
+        ]
+        self.index = KmerIndex(self.database, word_size=3)
+
+    def test_index(self):
+        """
+        Test that the index finds every occurrence of a word.
+        """
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.lookup("MKT").tolist(), [[3, 0]])
+        self.assertEqual(self.index.lookup("WWP").tolist(), [[0, 2], [0, 14]])
+        self.assertEqual(len(self.index.lookup("XYZ")), 0)
+
+    def test_x_drop(self):
+        """
+        Test that an ungapped extension stops once the score drops too far below the best score.
+        """
+        self.assertEqual(_x_drop(np.array([2, 2, -1, 3, -5, -5, 20]), 8), (6, 4))
+        self.assertEqual(_x_drop(np.array([2, 2, -1, 3, -5, -5, 20]), 10), (16, 7))
+        self.assertEqual(_x_drop(np.array([-1, -1]), 5), (0, 0))
+
+    def test_seed_and_extend(self):
+        """
+        Test that homologues are found with their optimal local alignment score, and that the stages are counted.
+        """
+        hits, statistics = seed_and_extend(self.solver, self.query, self.index, top=10, ungapped_threshold=30)
+
+        self.assertEqual([hit.sequence_id for hit in hits], ["gapped_homologue", "homologue"])
+        for hit in hits:
+            sequence = dict(self.database)[hit.sequence_id]
+            self.assertEqual((hit.score, hit.start, hit.end), self.solver.score(self.query, sequence,
+                                                                                locate_start=True))
+
+        self.assertEqual(statistics.sequences, 4)
+        self.assertEqual(statistics.gapped_alignments, 2)
+        self.assertEqual(statistics.hits, 2)
+        self.assertLessEqual(statistics.extended_seeds, statistics.seeds)
+        for _, kept, pruned in statistics.stages():
+            self.assertGreaterEqual(kept, 0)
+            self.assertGreaterEqual(pruned, 0)
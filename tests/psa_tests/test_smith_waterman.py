@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from blosum import BLOSUM
@@ -65,6 +66,32 @@ class TestSmithWaterman(unittest.TestCase):
         for alignment in alignments:
             self.assertIn(alignment, correct_pairs)
 
+    def test_smith_waterman_affine(self):
+        """
+        Test the Smith-Waterman algorithm with affine gap penalties, which prefer a single longer gap.
+        """
+        config = {
+            'match': 5,
+            'mismatch': -2,
+            'gap open': -6,
+            'gap extend': -1
+        }
+
+        solver = SmithWatermanPSASolver(config=config)
+
+        score, alignments = solver.solve(sequence_1="ACGTTTACGT", sequence_2="ACGTACGT")
+
+        self.assertEqual(score, 33)
+        self.assertEqual(len(alignments), 2)
+
+        correct_pairs = [
+            ("ACGTTTACGT", "ACG--TACGT"),
+            ("ACGTTTACGT", "ACGT--ACGT")
+        ]
+
+        for alignment in alignments:
+            self.assertIn(alignment, correct_pairs)
+
     def test_psa_init_match_mismatch(self):
         """
         Test that a PSA solver's score matrix uses match and mismatch values if they are provided.
@@ -118,3 +145,73 @@ class TestSmithWaterman(unittest.TestCase):
 
         for alignment in alignments:
             self.assertIn(alignment, correct_pairs)
+
+    def test_smith_waterman_score_only(self):
+        """
+        Test that the score-only entry point finds the score and the start and end cells of the best local alignment.
+        """
+        sequences = parse("psa_tests/test_inputs/assignment_test.fasta")
+
+        sequences = list(sequences.values())
+
+        sequence1 = sequences[0]
+        sequence2 = sequences[1]
+
+        config = {
+            "match": 5,
+            "mismatch": -2,
+            "indel": -4
+        }
+
+        solver = SmithWatermanPSASolver(config=config)
+
+        score, start, end = solver.score(sequence1, sequence2, locate_start=True)
+
+        self.assertEqual(score, 28)
+        self.assertEqual(sequence1[start[1] - 1:end[1]], "FGSGTRL")
+        self.assertEqual(sequence2[start[0] - 1:end[0]], "FGQGTRL")
+        self.assertEqual(solver.score(sequence1, sequence2), (score, None, end))
+        self.assertIsNone(solver.scoring_matrix)
+
+    def test_smith_waterman_max_alignments(self):
+        """
+        Test that the number of alignments can be limited, and that they are found in a deterministic order.
+        """
+        config = {
+            "match": 5,
+            "mismatch": -4,
+            "indel": -2
+        }
+
+        solver = SmithWatermanPSASolver(config=config)
+
+        score, alignments = solver.solve("ACGTTTACGT", "ACGTACGT")
+        limited_score, limited_alignments = solver.solve("ACGTTTACGT", "ACGTACGT", max_alignments=2)
+
+        self.assertEqual(len(alignments), len(set(alignments)))
+        self.assertGreater(len(alignments), 2)
+        self.assertEqual(limited_score, score)
+        self.assertEqual(limited_alignments, alignments[:2])
+        with self.assertRaises(ValueError):
+            solver.solve("ACGTTTACGT", "ACGTACGT", max_alignments=-1)
+
+    def test_smith_waterman_count_alignments(self):
+        """
+        Test that counting the optimal alignments matches the number of distinct alignments found by the traceback, also
+        when the same alignment is found from several starting points.
+        """
+        solver = SmithWatermanPSASolver(config={'match': 1, 'mismatch': -1, 'indel': -1})
+
+        self.assertEqual(solver.count_alignments('A', 'AAAACCA'), (1, 1))
+        self.assertEqual(solver.count_alignments('CC', 'CACA'), (1, len(solver.solve('CC', 'CACA')[1])))
+
+        random.seed(9)
+        for config in [{'match': 1, 'mismatch': -1, 'indel': -1}, {'match': 2, 'mismatch': -1, 'gap open': -2,
+                                                                   'gap extend': -1}]:
+            solver = SmithWatermanPSASolver(config=config)
+            for _ in range(50):
+                sequence1 = ''.join(random.choice("AC") for _ in range(random.randint(1, 8)))
+                sequence2 = ''.join(random.choice("AC") for _ in range(random.randint(1, 8)))
+                score, alignments = solver.solve(sequence_1=sequence1, sequence_2=sequence2)
+
+                self.assertEqual(solver.count_alignments(sequence1, sequence2), (score, len(alignments)))
@@ -0,0 +1,97 @@
+import random
+import unittest
+
+import numpy as np
+
+from src.psa.needleman_wunsch import NeedlemanWunschPSASolver
+from src.psa.smith_waterman import SmithWatermanPSASolver
+from src.psa.waterman_eggert import DeclumpingMatrix
+
+
+class TestWatermanEggert(unittest.TestCase):
+    """
+    Tests for Waterman-Eggert declumping of local alignments.
+    """
+
+    def test_repeated_domains(self):
+        """
+        Test that every copy of a repeated segment is found, best first.
+        """
+        solver = SmithWatermanPSASolver({'match': 5, 'mismatch': -2, 'indel': -4})
+        sequence_1, sequence_2 = "GGGTTTACGTACGAAAACCCACGTACGAA", "TTACGTACGA"
+
+        alignments = solver.top_alignments(sequence_1, sequence_2, 3)
+
+        self.assertEqual([alignment.score for alignment in alignments], [50, 40, 23])
+        self.assertEqual(alignments[0].score, solver.solve(sequence_1, sequence_2)[0])
+        self.assertEqual((alignments[0].start, alignments[0].end), ((1, 5), (10, 14)))
+        self.assertEqual(alignments[0].alignment, ("TTACGTACGA", "TTACGTACGA"))
+        self.assertEqual((alignments[1].start, alignments[1].end), ((3, 21), (10, 28)))
+        self.assertEqual(alignments[1].alignment, ("ACGTACGA", "ACGTACGA"))
+
+    def test_no_shared_pairs(self):
+        """
+        Test that alignments never align the same pair of characters, and are scored like the solver scores them.
+        """
+        random.seed(18)
+        solver = SmithWatermanPSASolver({'match': 2, 'mismatch': -3, 'gap open': -5, 'gap extend': -1})
+        for _ in range(20):
+            sequence_1 = ''.join(random.choice("ACG") for _ in range(random.randint(1, 40)))
+            sequence_2 = ''.join(random.choice("ACG") for _ in range(random.randint(1, 40)))
+
+            alignments = solver.top_alignments(sequence_1, sequence_2, 5)
+
+            pairs = set()
+            for alignment in alignments:
+                self.assertEqual(solver.alignment_score(alignment.alignment), alignment.score)
+                x, y = alignment.start[0] - 1, alignment.start[1] - 1
+                for char_1, char_2 in zip(*alignment.alignment):
+                    x, y = x + (char_2 != '-'), y + (char_1 != '-')
+                    if '-' not in (char_1, char_2):
+                        self.assertNotIn((x, y), pairs)
+                        pairs.add((x, y))
+                self.assertEqual((x, y), alignment.end)
+            self.assertEqual([alignment.score for alignment in alignments],
+                             sorted([alignment.score for alignment in alignments], reverse=True))
+
+    def test_partial_recalculation(self):
+        """
+        Test that recalculating only the entries depending on forbidden entries gives the same matrices as filling them
+        from scratch.
+        """
+        random.seed(19)
+        solver = SmithWatermanPSASolver({'match': 5, 'mismatch': -4, 'gap open': -8, 'gap extend': -2})
+        sequence_1 = ''.join(random.choice("ACGT") for _ in range(80))
+        sequence_2 = ''.join(random.choice("ACGT") for _ in range(60))
+        substitution_scores = solver.substitution_scores(sequence_1, sequence_2)
+        matrix = DeclumpingMatrix(substitution_scores, solver.gap_open, solver.gap_extend)
+
+        for _ in range(4):
+            steps = matrix.traceback(*matrix.max_score_index())
+            matrix.forbid([(x, y) for x, y, direction in steps if direction.name == "DIAGONAL"])
+
+            expected = DeclumpingMatrix(substitution_scores, solver.gap_open, solver.gap_extend)
+            expected.forbidden = matrix.forbidden.copy()
+            for x in range(1, expected.scores.shape[0]):
+                expected.fill_row(x, 1, expected.scores.shape[1] - 1)
+
+            np.testing.assert_array_equal(matrix.scores, expected.scores)
+            np.testing.assert_array_equal(matrix.left_scores, expected.left_scores)
+            np.testing.assert_array_equal(matrix.up_scores, expected.up_scores)
+
+    def test_global_solver(self):
+        """
+        Test that global alignments cannot be declumped.
+        """
+        with self.assertRaises(ValueError):
+            NeedlemanWunschPSASolver({'match': 5, 'mismatch': -2, 'indel': -4}).top_alignments("ACGT", "ACGT", 2)
+
+    def test_empty_sequences(self):
+        """
+        Test that empty sequences have no local alignments.
+        """
+        solver = SmithWatermanPSASolver({'match': 5, 'mismatch': -2, 'indel': -4})
+
+        self.assertEqual(solver.top_alignments("", "ACG", 2), [])
+        self.assertEqual(solver.top_alignments("ACG", "", 2), [])
+        self.assertEqual(solver.top_alignments("", "", 2), [])
@@ -0,0 +1,83 @@
+import unittest
+
+from blosum import BLOSUM
+
+from src.fasta_parser.fasta_parser import parse
+from src.psa.needleman_wunsch import NeedlemanWunschPSASolver
+from src.psa.smith_waterman import SmithWatermanPSASolver
+
+
+class TestWavefront(unittest.TestCase):
+    """
+    Tests for the numpy anti-diagonal wavefront engine.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+        """
+        sequences = list(parse("psa_tests/test_inputs/test.fasta").values())
+        self.sequence1 = sequences[0]
+        self.sequence2 = sequences[1]
+
+    def check_same_as_python_engine(self, solver_cls, config: dict) -> None:
+        """
+        Check that the wavefront engine finds the same score and alignments as the python engine.
+        :param solver_cls: Solver class to check.
+        :param config: Configuration for the solver.
+        """
+        python_solver = solver_cls(config=config, substitution_matrix=BLOSUM(62))
+        wavefront_solver = solver_cls(config=config, substitution_matrix=BLOSUM(62), engine="wavefront")
+
+        python_score, python_alignments = python_solver.solve(self.sequence1, self.sequence2)
+        wavefront_score, wavefront_alignments = wavefront_solver.solve(self.sequence1, self.sequence2)
+
+        self.assertEqual(python_score, wavefront_score)
+        self.assertEqual(sorted(python_alignments), sorted(wavefront_alignments))
+
+        for x in range(python_solver.scoring_matrix.height()):
+            for y in range(python_solver.scoring_matrix.width()):
+                self.assertEqual(python_solver.scoring_matrix.get_score(x, y),
+                                 wavefront_solver.scoring_matrix.get_score(x, y))
+                self.assertEqual(python_solver.scoring_matrix.get_traceback(x, y),
+                                 wavefront_solver.scoring_matrix.get_traceback(x, y))
+
+    def test_smith_waterman(self):
+        """
+        Test the wavefront engine for the Smith-Waterman solver.
+        """
+        self.check_same_as_python_engine(SmithWatermanPSASolver, {'indel': -1})
+        self.check_same_as_python_engine(SmithWatermanPSASolver, {'gap open': -5, 'gap extend': -1})
+
+    def test_needleman_wunsch(self):
+        """
+        Test the wavefront engine for the Needleman-Wunsch solver.
+        """
+        self.check_same_as_python_engine(NeedlemanWunschPSASolver, {'indel': -4})
+        self.check_same_as_python_engine(NeedlemanWunschPSASolver, {'gap open': -5, 'gap extend': -1})
+
+    def test_assignment(self):
+        """
+        Test the wavefront engine with the assignment example.
+        """
+        sequences = list(parse("psa_tests/test_inputs/assignment_test.fasta").values())
+
+        config = {
+            "match": 5,
+            "mismatch": -2,
+            "indel": -4,
+            "two gaps": 0
+        }
+
+        solver = SmithWatermanPSASolver(config=config, engine="wavefront")
+        score, alignments = solver.solve(sequence_1=sequences[0], sequence_2=sequences[1])
+
+        self.assertEqual(score, 28)
+        self.assertEqual(alignments, [("FGSGTRL", "FGQGTRL")])
+
+    def test_unsupported_engine(self):
+        """
+        Test that an unknown engine is refused.
+        """
+        with self.assertRaises(ValueError):
+            SmithWatermanPSASolver(config={'indel': -1}, engine="unknown")
@@ -0,0 +1,97 @@
+import random
+import unittest
+
+from src.psa.needleman_wunsch import NeedlemanWunschPSASolver
+from src.psa.wfa import wfa_align
+
+
+class TestWFA(unittest.TestCase):
+    """
+    Tests for the wavefront alignment (WFA) engine.
+    """
+
+    @staticmethod
+    def mutate(sequence: str, edits: int) -> str:
+        """
+        Apply random substitutions, deletions and insertions to a sequence.
+        :param sequence: Sequence to mutate.
+        :param edits: Number of edits.
+        :return: The mutated sequence.
+        """
+        characters = list(sequence)
+        for _ in range(edits):
+            position = random.randrange(len(characters) + 1)
+            kind = random.random()
+            if kind < 0.5 and position < len(characters):
+                characters[position] = random.choice("ACGT")
+            elif kind < 0.75 and position < len(characters):
+                del characters[position]
+            else:
+                characters.insert(position, random.choice("ACGT"))
+        return ''.join(characters)
+
+    def test_wfa_align(self):
+        """
+        Test the penalties of the wavefront alignment on small cases.
+        """
+        self.assertEqual(wfa_align("GATTACA", "GATTACA", 4, 6, 2), (0, ("GATTACA", "GATTACA")))
+        self.assertEqual(wfa_align("GATTACA", "GATCACA", 4, 6, 2), (4, ("GATTACA", "GATCACA")))
+        self.assertEqual(wfa_align("GATTACA", "GACA", 4, 6, 2), (12, ("GATTACA", "GA---CA")))
+        self.assertEqual(wfa_align("", "ACG", 4, 6, 2), (12, ("---", "ACG")))
+        self.assertEqual(wfa_align("", "", 4, 6, 2), (0, ("", "")))
+
+        with self.assertRaises(ValueError):
+            wfa_align("A", "C", 0, 6, 2)
+
+    def test_wfa_penalties(self):
+        """
+        Test which configs are converted to wavefront alignment penalties.
+        """
+        self.assertEqual(NeedlemanWunschPSASolver({'match': 5, 'mismatch': -2, 'indel': -4}).wfa_penalties(),
+                         (14, 0, 13))
+        self.assertEqual(NeedlemanWunschPSASolver({'match': 1, 'mismatch': -1, 'gap open': -3,
+                                                   'gap extend': -1}).wfa_penalties(), (4, 4, 3))
+        self.assertIsNone(NeedlemanWunschPSASolver({'indel': -1}).wfa_penalties())
+        self.assertIsNone(NeedlemanWunschPSASolver({'match': 1, 'mismatch': -1, 'gap open': -1,
+                                                    'gap extend': -3}).wfa_penalties())
+
+        with self.assertRaises(ValueError):
+            NeedlemanWunschPSASolver({'indel': -1}, engine="wfa")
+
+    def test_wfa_engine(self):
+        """
+        Test that the wfa engine finds an optimal alignment with the same score as the wavefront engine, for linear and
+        affine gaps.
+        """
+        random.seed(17)
+        for config in ({'match': 5, 'mismatch': -2, 'indel': -4},
+                       {'match': 3, 'mismatch': -3, 'gap open': -5, 'gap extend': -2},
+                       {'match': 2.0, 'mismatch': -1.0, 'indel': -1.5}):
+            wavefront_solver = NeedlemanWunschPSASolver(config, engine="wavefront")
+            wfa_solver = NeedlemanWunschPSASolver(config, engine="wfa")
+            for _ in range(20):
+                sequence_1 = ''.join(random.choice("ACGT") for _ in range(random.randint(1, 60)))
+                sequence_2 = self.mutate(sequence_1, random.randint(0, 6)) or "A"
+
+                score, alignments = wfa_solver.solve(sequence_1, sequence_2)
+
+                self.assertEqual(score, wavefront_solver.solve(sequence_1, sequence_2, max_alignments=1)[0])
+                self.assertEqual(len(alignments), 1)
+                self.assertEqual(wfa_solver.alignment_score(alignments[0]), score)
+
+    def test_engine_per_call(self):
+        """
+        Test choosing the engine for a single call.
+        """
+        solver = NeedlemanWunschPSASolver({'match': 5, 'mismatch': -2, 'indel': -4})
+        sequence_1, sequence_2 = "GATTACAGATTACA", "GATTACAGATACA"
+
+        score, alignments = solver.solve(sequence_1, sequence_2, engine="wfa")
+
+        self.assertEqual(score, solver.solve(sequence_1, sequence_2)[0])
+        self.assertEqual(len(alignments), 1)
+        self.assertEqual(solver.engine.value, "python")
+        with self.assertRaises(ValueError):
+            solver.solve(sequence_1, sequence_2, engine="myers")
+        with self.assertRaises(ValueError):
+            solver.solve(sequence_1, sequence_2, engine="wavefront")
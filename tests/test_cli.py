@@ -2,6 +2,8 @@ import os
 import unittest
 from typing import List
 
+import numpy as np
+
 from main import main
 
 
@@ -183,3 +185,308 @@ class TestCLIDirect(TestCLI):
         ]
 
         self.verify_output(correct_output_lines)
+
+    def test_cli_msa_progressive(self):
+        """
+        Test the CLI with progressive multiple sequence alignment.
+        """
+        args = [
+            "-c", self.config_file_path,
+            "-i", self.input_file_path,
+            "-o", self.output_file_path,
+            "msa", "progressive", "--workers", "1"
+        ]
+
+        main(args=args)
+
+        correct_output_lines = [
+            "unknown_J_region_1: GYSSASKIIFGSGTRLSIRP",
+            "unknown_J_region_2: NT-EA---FFGQGTRL-TVV",
+            "unknown_J_region_3: NY-GY---TFGSGTRL-TVV"
+        ]
+
+        self.verify_output(correct_output_lines)
+
+    def test_cli_msa_center_star(self):
+        """
+        Test the CLI with center-star multiple sequence alignment.
+        """
+        args = [
+            "-c", self.config_file_path,
+            "-i", self.input_file_path,
+            "-o", self.output_file_path,
+            "msa", "--engine", "wavefront", "center_star", "--workers", "1"
+        ]
+
+        main(args=args)
+
+        correct_output_lines = [
+            "unknown_J_region_1: GYSSASKIIFGSGTRLSIRP",
+            "unknown_J_region_2: NT----EAFFGQGTRL-TVV",
+            "unknown_J_region_3: NY----GYTFGSGTRL-TVV"
+        ]
+
+        self.verify_output(correct_output_lines)
+
+    def test_cli_psa_auto(self):
+        """
+        Test the CLI with an automatically selected pairwise engine.
+        """
+        args = [
+            "-c", self.config_file_path,
+            "-i", self.input_file_path,
+            "-o", self.output_file_path,
+            "psa", "--engine", "auto", "needleman_wunsch"
+        ]
+
+        main(args=args)
+
+        correct_output_lines = [
+            "unknown_J_region_1: GYSSASKIIFGSGTRLSIRP",
+            "unknown_J_region_2: N-TEA---FFGQGTRL-TVV"
+        ]
+
+        self.verify_output(correct_output_lines)
+
+    def test_cli_memory_limit(self):
+        """
+        Test that the CLI refuses an alignment that does not fit in the memory limit, even when rerouted.
+        """
+        args = [
+            "-c", self.config_file_path,
+            "-i", self.input_file_path,
+            "-o", self.output_file_path,
+            "--memory-limit", "0.001",
+            "msa", "needleman_wunsch"
+        ]
+
+        with self.assertRaises(SystemExit):
+            main(args=args)
+
+    def test_cli_memory_limit_reroute(self):
+        """
+        Test that the CLI reroutes a needleman_wunsch msa that does not fit in the memory limit to a heuristic solver,
+        and a psa with an automatically selected engine to only calculating the score.
+        """
+        args = [
+            "-c", self.config_file_path,
+            "-i", self.input_file_path,
+            "-o", self.output_file_path,
+            "--memory-limit", "0.01",
+            "msa", "needleman_wunsch"
+        ]
+
+        main(args=args)
+
+        correct_output_lines = [
+            "unknown_J_region_1: GYSSASKIIFGSGTRLSIRP",
+            "unknown_J_region_2: NT-EA---FFGQGTRL-TVV",
+            "unknown_J_region_3: NY-GY---TFGSGTRL-TVV"
+        ]
+
+        self.verify_output(correct_output_lines)
+
+        args[-2:] = ["psa", "--engine", "auto", "smith_waterman"]
+        main(args=args)
+
+        self.verify_output(["score: 28", "start: 6 10", "end: 12 16"])
+
+    def test_cli_search(self):
+        """
+        Test the CLI with a database search, which ranks the hits best first and keeps the best --top hits.
+        """
+        args = [
+            "-c", self.config_file_path,
+            "-i", self.input_file_path,
+            "-o", self.output_file_path,
+            "psa", "search", "-q", self.input_file_path, "--workers", "1"
+        ]
+
+        main(args=args)
+
+        correct_output_lines = [
+            "unknown_J_region_1: score 100 start 1 1 end 20 20",
+            "unknown_J_region_3: score 35 start 6 10 end 12 16",
+            "unknown_J_region_2: score 28 start 6 10 end 12 16"
+        ]
+
+        self.verify_output(correct_output_lines)
+
+        main(args=args + ["--top", "2"])
+
+        with open(self.output_file_path, 'r') as output_file:
+            self.assertEqual(output_file.read().splitlines(), [
+                "unknown_J_region_1: score 100 start 1 1 end 20 20",
+                "unknown_J_region_3: score 35 start 6 10 end 12 16"
+            ])
+
+        with self.assertRaises(SystemExit):
+            main(args=args + ["--top", "0"])
+
+    def test_cli_all_pairs(self):
+        """
+        Test the CLI scoring every pair of sequences, saved as a .npy matrix.
+        """
+        output_file_path = os.path.join(self.output_dir_path, 'all_pairs.npy')
+        args = [
+            "-c", self.config_file_path,
+            "-i", self.input_file_path,
+            "-o", output_file_path,
+            "psa", "all_pairs", "--algorithm", "smith_waterman", "--workers", "1"
+        ]
+
+        main(args=args)
+
+        np.testing.assert_array_equal(np.load(output_file_path), [[100, 28, 35],
+                                                                  [28, 75, 43],
+                                                                  [35, 43, 75]])
+
+        main(args=args + ["--distance"])
+
+        np.testing.assert_array_equal(np.load(output_file_path), [[0, 59.5, 52.5],
+                                                                  [59.5, 0, 32],
+                                                                  [52.5, 32, 0]])
+
+    def test_cli_count_alignments(self):
+        """
+        Test the CLI counting the optimal alignments, which writes the score and the number of alignments.
+        """
+        args = [
+            "-c", self.config_file_path,
+            "-i", self.input_file_path,
+            "-o", self.output_file_path,
+            "--count-alignments",
+            "psa", "needleman_wunsch"
+        ]
+
+        main(args=args)
+
+        self.verify_output(["score: -1", "alignments: 64"])
+
+        args[args.index("needleman_wunsch")] = "smith_waterman"
+        main(args=args)
+
+        self.verify_output(["score: 28", "alignments: 1"])
+
+    def test_cli_score_only(self):
+        """
+        Test the CLI only calculating the alignment score, which writes the score and the end (and start) of the
+        alignment, but no alignments.
+        """
+        output_file_path = os.path.join(self.output_dir_path, 'score_only.txt')
+        all_file_path = output_file_path.replace('.txt', '_all.txt')
+        if os.path.exists(all_file_path):
+            os.remove(all_file_path)
+        args = [
+            "-c", self.config_file_path,
+            "-i", self.input_file_path,
+            "-o", output_file_path,
+            "psa", "--score-only", "needleman_wunsch"
+        ]
+
+        main(args=args)
+
+        with open(output_file_path, 'r') as output_file:
+            self.assertEqual(output_file.read().splitlines(), ["score: -1", "end: 15 20"])
+
+        args[-1] = "smith_waterman"
+        main(args=args)
+
+        with open(output_file_path, 'r') as output_file:
+            self.assertEqual(output_file.read().splitlines(), ["score: 28", "start: 6 10", "end: 12 16"])
+        self.assertFalse(os.path.exists(all_file_path))
+
+    def test_cli_max_alignments(self):
+        """
+        Test that the CLI writes at most --max-alignments alignments to the file with all alignments.
+        """
+        output_file_path = os.path.join(self.output_dir_path, 'max_alignments.txt')
+        args = [
+            "-c", self.config_file_path,
+            "-i", self.input_file_path,
+            "-o", output_file_path,
+            "--max-alignments", "3",
+            "psa", "needleman_wunsch"
+        ]
+
+        for max_alignments in [3, 5]:
+            args[args.index("--max-alignments") + 1] = str(max_alignments)
+            main(args=args)
+
+            with open(output_file_path.replace('.txt', '_all.txt'), 'r') as all_file:
+                alignments = all_file.read().strip().split('\n\n')
+            self.assertEqual(len(alignments), max_alignments)
+            self.assertEqual(len(set(alignments)), max_alignments)
+
+        for max_alignments in ["0", "-1"]:
+            args[args.index("--max-alignments") + 1] = max_alignments
+            with self.assertRaises(SystemExit):
+                main(args=args)
+
+    def test_cli_top_alignments(self):
+        """
+        Test the CLI writing the best local alignments that do not share aligned pairs, best first.
+        """
+        args = [
+            "-c", self.config_file_path,
+            "-i", self.input_file_path,
+            "-o", self.output_file_path,
+            "psa", "smith_waterman", "--top", "2"
+        ]
+
+        main(args=args)
+
+        correct_output_lines = [
+            "# 1: score 28 start 6 10 end 12 16",
+            "unknown_J_region_1: FGSGTRL",
+            "unknown_J_region_2: FGQGTRL",
+            "",
+            "# 2: score 5 start 2 14 end 2 14",
+            "unknown_J_region_1: T",
+            "unknown_J_region_2: T",
+            ""
+        ]
+
+        self.verify_output(correct_output_lines)
+
+        for top in ["0", "-1"]:
+            with self.assertRaises(SystemExit):
+                main(args=args[:-1] + [top])
+
+    def test_cli_memmap(self):
+        """
+        Test that memory-mapping the scoring matrices to files in the scratch directory writes the same alignments as
+        keeping them in memory.
+        """
+        output_file_path = os.path.join(self.output_dir_path, 'memmap.txt')
+        all_file_path = output_file_path.replace('.txt', '_all.txt')
+        for mode in ["psa", "msa"]:
+            args = [
+                "-c", self.config_file_path,
+                "-i", self.input_file_path,
+                "-o", output_file_path,
+                "--max-alignments", "4",
+                mode, "needleman_wunsch"
+            ]
+            outputs = []
+            for memmap_args in [[], ["--memmap-threshold", "0", "--scratch-dir", self.output_dir_path]]:
+                main(args=memmap_args + args)
+
+                with open(output_file_path, 'r') as output_file, open(all_file_path, 'r') as all_file:
+                    outputs.append((output_file.read(), all_file.read()))
+
+            self.assertEqual(outputs[0], outputs[1])
+
+    def test_cli_unsupported_engine(self):
+        """
+        Test that the CLI reports engines that cannot run an alignment as usage errors.
+        """
+        for options in [
+            ["psa", "--engine", "hirschberg", "smith_waterman"],
+            ["psa", "--engine", "myers", "needleman_wunsch"],
+            ["--count-alignments", "psa", "--engine", "hirschberg", "needleman_wunsch"],
+            ["--count-alignments", "psa", "--engine", "wfa", "needleman_wunsch"]
+        ]:
+            args = ["-c", self.config_file_path, "-i", self.input_file_path, "-o", self.output_file_path] + options
+            with self.subTest(options=options), self.assertRaises(SystemExit):
+                main(args=args)
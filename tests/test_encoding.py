@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+from blosum import BLOSUM
+
+from src.encoding import Encoder
+from src.msa.needleman_wunsch import NeedlemanWunschMSASolver
+from src.psa.needleman_wunsch import NeedlemanWunschPSASolver
+
+
+class TestEncoder(unittest.TestCase):
+    """
+    Tests for the encoding of sequences and substitution matrices.
+    """
+
+    def test_encode(self):
+        """
+        Test that sequences are encoded into uint8 codes that index the substitution table.
+        """
+        substitution_matrix = BLOSUM(62)
+        encoder = Encoder(substitution_matrix)
+        sequence_1, sequence_2 = "GYSSASKIIF", "NTEAFFGQGT"
+
+        codes_1, codes_2 = encoder.encode(sequence_1), encoder.encode(sequence_2)
+
+        self.assertEqual(codes_1.dtype, np.uint8)
+        self.assertEqual(''.join(encoder.alphabet[code] for code in codes_1), sequence_1)
+        table = encoder.table[codes_1[:, None], codes_2[None, :]]
+        for i, char_1 in enumerate(sequence_1):
+            for j, char_2 in enumerate(sequence_2):
+                self.assertEqual(table[i, j], substitution_matrix[char_1][char_2])
+
+    def test_encode_unknown_character(self):
+        """
+        Test that unknown characters are scored as the substitution matrix scores them.
+        """
+        encoder = Encoder(BLOSUM(62))
+        codes = encoder.encode("AUA")
+        self.assertEqual(encoder.table[codes[1], codes[0]], -np.inf)
+        self.assertEqual(encoder.table[codes[0], codes[2]], 4)
+
+        encoder = Encoder({'A': {'A': 1, 'C': -1}, 'C': {'A': -1, 'C': 1}})
+        with self.assertRaises(KeyError):
+            encoder.encode("ACU")
+
+    def test_match_mismatch_overrides(self):
+        """
+        Test that the substitution table of the solvers includes the match and mismatch overrides.
+        """
+        config = {'match': 5, 'mismatch': -4, 'indel': -2, 'two gaps': 0}
+
+        for solver in (NeedlemanWunschPSASolver(config), NeedlemanWunschMSASolver(config)):
+            table = solver.substitution_table
+            self.assertEqual(table.dtype, np.int64)
+            self.assertTrue(np.array_equal(np.diag(table), np.full(len(table), 5)))
+            self.assertTrue(np.all(table[~np.eye(len(table), dtype=bool)] == -4))
@@ -0,0 +1,155 @@
+import random
+import unittest
+
+import numpy as np
+
+from src.estimation import MemoryLimitError, check_memory_limit, estimate_center_star, estimate_edits, estimate_msa, \
+    estimate_progressive, estimate_psa, estimate_score, select_msa_solver, select_psa_engine
+from src.msa.center_star import CenterStarMSASolver
+from src.msa.needleman_wunsch import NeedlemanWunschMSASolver
+from src.msa.progressive import ProgressiveMSASolver
+from src.psa.needleman_wunsch import NeedlemanWunschPSASolver
+from src.psa.smith_waterman import SmithWatermanPSASolver
+
+
+class TestEstimation(unittest.TestCase):
+    """
+    Tests for the resource estimates and the engine selection.
+    """
+
+    def setUp(self):
+        self.config = {"match": 5, "mismatch": -2, "indel": -4, "two gaps": 0}
+        generator = random.Random(7)
+        self.sequence_1 = ''.join(generator.choice('ACGT') for _ in range(5000))
+        mutated = list(self.sequence_1)
+        for position in generator.sample(range(len(mutated)), 25):
+            mutated[position] = 'ACGT'[('ACGT'.index(mutated[position]) + 1) % 4]
+        self.sequence_2 = ''.join(mutated)
+        self.unrelated = ''.join(generator.choice('ACGT') for _ in range(5000))
+
+    def test_estimate_edits(self):
+        """
+        Test that the estimated number of edits follows how similar the sequences are.
+        """
+        self.assertEqual(estimate_edits(self.sequence_1, self.sequence_1), 0)
+        self.assertLess(estimate_edits(self.sequence_1, self.sequence_2), 100)
+        self.assertGreater(estimate_edits(self.sequence_1, self.unrelated), 1000)
+        self.assertEqual(estimate_edits("ACGT", "ACGTACGT"), 8)
+
+    def test_full_matrix(self):
+        """
+        Test the estimates of the engines that store the whole scoring matrix, in memory or memory-mapped.
+        """
+        solver = NeedlemanWunschPSASolver(self.config, engine="wavefront")
+        estimate = estimate_psa(solver, "ACGTA", "ACG")
+        self.assertEqual(estimate.engine, "wavefront")
+        self.assertEqual(estimate.cells, 24)
+        self.assertEqual(estimate.traceback_bytes, 24)
+        self.assertEqual(estimate.disk, 0)
+        self.assertTrue(estimate.all_alignments)
+
+        memmap_solver = NeedlemanWunschPSASolver(self.config, engine="wavefront", memmap_threshold=0)
+        memmap_estimate = estimate_psa(memmap_solver, "ACGTA", "ACG")
+        self.assertEqual(memmap_estimate.disk, 24 * 25)
+        self.assertLess(memmap_estimate.memory, estimate.memory)
+
+    def test_linear_space(self):
+        """
+        Test that the linear-space engines need far less memory than the full matrix.
+        """
+        solver = NeedlemanWunschPSASolver(self.config)
+        full = estimate_psa(solver, self.sequence_1, self.unrelated, "wavefront")
+        for engine in ["hirschberg", "banded"]:
+            estimate = estimate_psa(solver, self.sequence_1, self.sequence_2, engine)
+            self.assertLess(estimate.memory, full.memory / 10)
+        self.assertFalse(estimate_psa(solver, self.sequence_1, self.sequence_2, "hirschberg").all_alignments)
+        self.assertLess(estimate_score(solver, self.sequence_1, self.sequence_2).memory, full.memory / 1000)
+
+    def test_select_engine(self):
+        """
+        Test that the fastest engine that fits in the memory limit is selected.
+        """
+        solver = NeedlemanWunschPSASolver(self.config)
+        self.assertEqual(select_psa_engine(solver, self.sequence_1, self.sequence_2).engine, "banded")
+        self.assertEqual(select_psa_engine(solver, self.sequence_1, self.sequence_2, all_alignments=False).engine,
+                         "wfa")
+        self.assertEqual(select_psa_engine(solver, self.sequence_1, self.unrelated).engine, "wavefront")
+
+        # Unrelated sequences only fit in a small memory limit with a linear-space engine
+        limit = 10 * 1024 ** 2
+        self.assertEqual(select_psa_engine(solver, self.sequence_1, self.unrelated, limit).engine, "hirschberg")
+        with self.assertRaises(MemoryLimitError):
+            select_psa_engine(solver, self.sequence_1, self.unrelated, limit, single_alignment_fallback=False)
+
+        local_solver = SmithWatermanPSASolver(self.config)
+        self.assertEqual(select_psa_engine(local_solver, "ACGT", "AGT").engine, "wavefront")
+        with self.assertRaises(MemoryLimitError):
+            select_psa_engine(local_solver, self.sequence_1, self.unrelated, limit)
+        self.assertEqual(select_psa_engine(local_solver, self.sequence_1, self.unrelated, limit,
+                                           score_only_fallback=True).engine, "score-only")
+        with self.assertRaises(MemoryLimitError):
+            select_psa_engine(local_solver, self.sequence_1, self.unrelated, 1024, score_only_fallback=True)
+
+    def test_msa(self):
+        """
+        Test that the msa estimate grows with the product of the sequence lengths, and is refused over the limit.
+        """
+        solver = NeedlemanWunschMSASolver(self.config)
+        sequences = ["ACGT" * 50] * 6
+        estimate = estimate_msa(solver, sequences)
+        self.assertEqual(estimate.cells, int(np.prod([201] * 6, dtype=object)))
+        self.assertEqual(estimate.engine, "full matrix")
+        with self.assertRaisesRegex(MemoryLimitError, "^The msa scoring matrix needs"):
+            check_memory_limit(estimate, 1024 ** 3)
+        check_memory_limit(estimate_msa(solver, ["ACGT", "AGT", "ACT"]), 1024 ** 2)
+
+        memmap_estimate = estimate_msa(NeedlemanWunschMSASolver(self.config, memmap_threshold=0), sequences)
+        self.assertGreater(memmap_estimate.memory, 0)
+        self.assertLess(memmap_estimate.memory, estimate.memory)
+        self.assertGreater(memmap_estimate.disk, 0)
+
+        # The hyperplanes of the wavefront engine stay in memory when the scoring matrix is memory-mapped
+        wavefront_estimate = estimate_msa(NeedlemanWunschMSASolver(self.config, engine="wavefront",
+                                                                   memmap_threshold=0), sequences)
+        self.assertGreater(wavefront_estimate.memory, memmap_estimate.memory)
+        with self.assertRaisesRegex(MemoryLimitError, "memory-mapped msa scoring matrix"):
+            check_memory_limit(wavefront_estimate, 1024 ** 3)
+
+    def test_progressive(self):
+        """
+        Test that a progressive alignment of many sequences needs far less than an exact one of a few.
+        """
+        sequences = ["ACGT" * 50] * 200
+        estimate = estimate_progressive(ProgressiveMSASolver(self.config), sequences)
+        self.assertEqual(estimate.engine, "progressive")
+        self.assertEqual(estimate.cells, 201 ** 2 * (200 * 201 // 2 + 199))
+        self.assertFalse(estimate.all_alignments)
+        self.assertLess(estimate.memory, estimate_msa(NeedlemanWunschMSASolver(self.config), sequences[:4]).memory)
+
+    def test_center_star(self):
+        """
+        Test that the center-star estimate adds an alignment to the center for every other sequence.
+        """
+        sequences = ["ACGT" * 50] * 200
+        estimate = estimate_center_star(CenterStarMSASolver(self.config, engine="wavefront"), sequences)
+        self.assertEqual(estimate.engine, "center-star")
+        self.assertEqual(estimate.cells, 201 ** 2 * (200 * 201 // 2 + 199))
+        self.assertEqual(estimate.traceback_bytes, 201 ** 2)
+        self.assertEqual(estimate_center_star(CenterStarMSASolver(self.config), ["ACGT"]).cells, 25)
+
+    def test_select_msa_solver(self):
+        """
+        Test that the fastest heuristic msa solver that fits in the memory limit is selected.
+        """
+        sequences = ["ACGT" * 50] * 20
+        progressive_solver, center_star_solver = ProgressiveMSASolver(self.config), CenterStarMSASolver(self.config)
+        progressive = estimate_progressive(progressive_solver, sequences)
+        center_star = estimate_center_star(center_star_solver, sequences)
+        fastest = min([progressive, center_star], key=lambda estimate: estimate.seconds)
+
+        candidates = [(progressive_solver, progressive), (center_star_solver, center_star)]
+
+        self.assertEqual(select_msa_solver(candidates)[1], fastest)
+        self.assertEqual(select_msa_solver(candidates, progressive.memory), (progressive_solver, progressive))
+        with self.assertRaises(MemoryLimitError):
+            select_msa_solver(candidates, 1024)
@@ -0,0 +1,58 @@
+import gc
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.scratch import ScratchDirectory, memmap_size
+
+
+class TestScratch(unittest.TestCase):
+    """
+    Tests for the scratch directory of memory-mapped arrays.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_array(self):
+        """
+        Test that arrays are file-backed and filled with their initial value.
+        """
+        with ScratchDirectory(self.directory.name) as scratch:
+            zeros = scratch.array("zeros", (3, 4), np.int64)
+            filled = scratch.array("filled", (2, 2), np.float64, -np.inf)
+
+            self.assertIsInstance(zeros, np.memmap)
+            self.assertTrue(np.all(zeros == 0))
+            self.assertTrue(np.all(filled == -np.inf))
+            self.assertEqual(sorted(os.listdir(scratch.path)), ["filled.dat", "zeros.dat"])
+
+    def test_cleanup(self):
+        """
+        Test that the scratch directory is removed when closed and when garbage collected.
+        """
+        scratch = ScratchDirectory(self.directory.name)
+        scratch.array("scores", (10, 10), np.int64)
+        scratch.close()
+        self.assertTrue(scratch.closed)
+        self.assertEqual(os.listdir(self.directory.name), [])
+        with self.assertRaises(ValueError):
+            scratch.array("scores", (10, 10), np.int64)
+
+        scratch = ScratchDirectory(self.directory.name)
+        scratch.array("scores", (10, 10), np.int64)
+        del scratch
+        gc.collect()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_memmap_size(self):
+        """
+        Test the size of the planes of a matrix, which must not overflow.
+        """
+        self.assertEqual(memmap_size((11, 21), 25), 11 * 21 * 25)
+        self.assertEqual(memmap_size((10 ** 6,) * 3, 9), 9 * 10 ** 18)
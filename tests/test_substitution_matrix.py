@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from blosum import BLOSUM
+
+from src.psa.smith_waterman import SmithWatermanPSASolver
+from src.substitution_matrix import get_substitution_matrix, load_substitution_matrix, register_substitution_matrix, \
+    save_substitution_matrix, SubstitutionMatrix
+
+
+class TestSubstitutionMatrix(unittest.TestCase):
+    """
+    Tests for compiled substitution matrices and their registry.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.matrix_path = os.path.join(self.directory.name, "matrix.txt")
+        with open(self.matrix_path, "w") as file:
+            file.write("# Small test matrix\n"
+                       "   A  C  G  T\n"
+                       "A  2 -1 -1 -1\n"
+                       "C -1  2 -1 -1\n"
+                       "G -1 -1  2 -1\n"
+                       "T -1 -1 -1  2\n")
+
+    def tearDown(self) -> None:
+        """
+        Clean up the test case.
+        """
+        self.directory.cleanup()
+
+    def test_from_blosum(self):
+        """
+        Test that a compiled BLOSUM matrix scores like the blosum package, including characters it does not know.
+        """
+        blosum = BLOSUM(62)
+        matrix = SubstitutionMatrix.from_dict(blosum)
+
+        for char in blosum:
+            for other_char in blosum:
+                self.assertEqual(matrix[char][other_char], blosum[char][other_char])
+        self.assertEqual(matrix['A']['U'], -np.inf)
+        self.assertNotIn('U', matrix)
+        self.assertFalse(matrix.table.flags.writeable)
+
+    def test_registry_caches(self):
+        """
+        Test that the registry compiles a matrix once per set of overrides.
+        """
+        matrix = get_substitution_matrix("BLOSUM62", 5, -4)
+
+        self.assertIs(get_substitution_matrix("BLOSUM62", 5, -4), matrix)
+        self.assertIsNot(get_substitution_matrix("BLOSUM62"), matrix)
+        self.assertEqual(matrix['A']['A'], 5)
+        self.assertEqual(matrix['A']['C'], -4)
+        self.assertEqual(get_substitution_matrix("BLOSUM62")['A']['A'], 4)
+
+        solver = SmithWatermanPSASolver({'match': 5, 'mismatch': -4, 'indel': -2})
+        self.assertEqual(solver.substitution_matrix['A']['C'], -4)
+        self.assertIs(SmithWatermanPSASolver({'match': 5, 'mismatch': -4, 'indel': -2}).substitution_matrix,
+                      solver.substitution_matrix)
+
+    def test_load_text_file(self):
+        """
+        Test loading a matrix in the NCBI text format, by path and by registered name.
+        """
+        matrix = load_substitution_matrix(self.matrix_path)
+        self.assertEqual(matrix.alphabet, ('A', 'C', 'G', 'T'))
+        self.assertEqual(matrix['G']['G'], 2)
+        self.assertEqual(matrix['G']['T'], -1)
+
+        register_substitution_matrix("test nucleotides", self.matrix_path)
+        self.assertEqual(get_substitution_matrix("test nucleotides")['G']['T'], -1)
+        solver = SmithWatermanPSASolver({'substitution matrix': self.matrix_path, 'indel': -2})
+        self.assertEqual(solver.solve("ACGT", "ACGT")[0], 8)
+
+    def test_save_and_load_npy(self):
+        """
+        Test that a compiled matrix survives saving it as .npy.
+        """
+        path = os.path.join(self.directory.name, "blosum62.npy")
+        matrix = get_substitution_matrix("BLOSUM62")
+
+        save_substitution_matrix(matrix, path)
+        loaded = load_substitution_matrix(path)
+
+        self.assertEqual(loaded.alphabet, matrix.alphabet)
+        self.assertTrue(np.array_equal(loaded.table, matrix.table))
+        self.assertEqual(loaded.table.dtype, matrix.table.dtype)